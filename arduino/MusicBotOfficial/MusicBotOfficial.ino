@@ -4,8 +4,8 @@
   This is the sketch that should stay uploaded to the Arduino Uno during normal
   piano playback. Python sends it a stream of timestamped PCA9685 PWM events over
   USB serial. The sketch does not understand MIDI directly; it only receives
-  already-converted commands such as BEGIN, EVENT, COMMIT, PLAY, FIRE, and
-  ALL_OFF.
+  already-converted commands such as BEGIN, EVENT, NOTE, COMMIT, PLAY, FIRE,
+  and ALL_OFF.
 
   Hardware path:
     Arduino Uno A4/A5 shared I2C bus -> PCA9685 PWM boards in parallel ->
@@ -36,25 +36,67 @@ static const uint8_t RUNTIME_PCA9685_I2C_ADDRESSES[RUNTIME_PCA_BOARD_COUNT] = {
 };
 static const uint16_t RUNTIME_PCA9685_PWM_FREQUENCY_HZ = 250;
 static const uint32_t RUNTIME_SERIAL_BAUD = 115200;
-static const uint8_t RUNTIME_PROTOCOL_VERSION = 5;
+// Rates Python may switch to with BAUD; all are exact on the Uno's 16 MHz clock.
+static const uint32_t RUNTIME_FAST_SERIAL_BAUDS[] = {250000, 500000, 1000000};
+// A new rate must carry a PING within this long, or the runtime falls back.
+static const uint16_t RUNTIME_BAUD_CONFIRM_MS = 1500;
+static const uint8_t RUNTIME_PROTOCOL_VERSION = 13;
 static const uint8_t RUNTIME_SUSTAIN_PEDAL_CHANNEL = 61;
 static const uint32_t RUNTIME_OUTPUT_FAILSAFE_MS = 6000;
 static const uint32_t RUNTIME_PEDAL_FAILSAFE_MS = 1200;
+// Serial handling stops taking new command lines once this slice is spent or
+// a playback event is due, so dispatch never waits behind a burst of input.
+static const uint16_t RUNTIME_SERIAL_SLICE_BUDGET_US = 500;
+// The output failsafe checks this many channels per loop() pass, round robin.
+static const uint8_t FAILSAFE_CHANNELS_PER_PASS = 16;
+// Loop timing counters for the PERF command. Each measured section costs a
+// micros() call (about 4 us on the Uno); set false to compile them out.
+static const bool RUNTIME_PERF_ENABLED = true;
 
 // Small RAM buffer for streamed events. Python keeps refilling this while
-// playback is running so the Uno does not need to store an entire song.
-static const uint8_t EVENT_BUFFER_CAPACITY = 48;
+// playback is running so the Uno does not need to store an entire song. Each
+// slot is 13 bytes with its NOTE envelope; one NOTE slot replaces the two or
+// three EVENT slots of a note, so 32 slots still hold more song than 48 did.
+static const uint8_t EVENT_BUFFER_CAPACITY = 32;
 static const uint16_t LINE_BUFFER_SIZE = 96;
+// NOTE events hand their hold and release writes to one of these timers.
+static const uint8_t NOTE_TIMER_CAPACITY = 16;
+// Channels (such as the sustain pedal) whose hold the runtime re-asserts itself.
+static const uint8_t REFRESH_CHANNEL_CAPACITY = 4;
+
+// What servicePlayback does with a strike that is more than the LATE limit
+// behind its due time. Releases and the sustain pedal are never changed.
+enum LateStrikeAction : uint8_t {
+  LATE_STRIKE_PLAY,
+  LATE_STRIKE_DROP,
+  LATE_STRIKE_SOFTEN,
+};
 
-// One low-level actuator event: wait dt_ms, then set one global channel to pwm.
+// One low-level actuator event: wait dt, then set one global channel to pwm.
+// dt is in milliseconds, or microseconds when the song was started with BEGIN <count> US.
 // Global channel 0-63 is translated into a PCA9685 board plus its local channel.
 // pwm = 0 releases the solenoid, higher values create strike/hold force.
+// A NOTE event also carries its envelope: holdPwm after strikeMs, then a
+// release durationMs after the strike. durationMs = 0 marks a plain EVENT.
 typedef struct {
-  uint32_t dt_ms;
+  uint32_t dt;
   uint8_t channel;
   uint16_t pwm;
+  uint16_t holdPwm;
+  uint16_t strikeMs;
+  uint16_t durationMs;
 } SolenoidEvent;
 
+// Pending hold/release writes for a note that started from a NOTE event.
+typedef struct {
+  bool active;
+  bool holdPending;
+  uint8_t channel;
+  uint16_t holdPwm;
+  uint32_t holdAt;
+  uint32_t releaseAt;
+} NoteTimer;
+
 Adafruit_PWMServoDriver pwmBoards[RUNTIME_PCA_BOARD_COUNT] = {
     Adafruit_PWMServoDriver(RUNTIME_PCA9685_I2C_ADDRESSES[0]),
     Adafruit_PWMServoDriver(RUNTIME_PCA9685_I2C_ADDRESSES[1]),
@@ -74,28 +116,121 @@ uint32_t receivedSongEventCount = 0;
 uint32_t playedSongEventCount = 0;
 
 // transferActive means Python is still loading a song. playbackActive means
-// millis()-based timing is currently applying PWM events to the hardware.
+// playbackClock()-based timing is currently applying PWM events to the hardware.
 bool transferActive = false;
 bool playbackActive = false;
 bool playbackPaused = false;
 bool dueTimeArmed = false;
-
-uint32_t nextEventDueAtMs = 0;
-uint32_t lastEventDueAtMs = 0;
-uint32_t pauseStartedAtMs = 0;
+bool songTimeInMicros = false;
+
+// Due and pause times use the song's clock unit (see playbackClock()).
+uint32_t nextEventDueAt = 0;
+uint32_t lastEventDueAt = 0;
+uint32_t pauseStartedAt = 0;
+// Hold refresh set by REFRESH <channel> <period_ms>: while a song is streaming,
+// a held channel is rewritten with its current PWM every periodMs.
+typedef struct {
+  uint8_t channel;
+  uint16_t periodMs;
+  uint16_t pwm;
+  uint32_t lastWriteAtMs;
+} ChannelRefresh;
+
+NoteTimer noteTimers[NOTE_TIMER_CAPACITY];
+ChannelRefresh channelRefreshes[REFRESH_CHANNEL_CAPACITY];
+uint8_t channelRefreshCount = 0;
+
+// Late-strike policy set by LATE <limit_ms> DROP|SOFT <percent> for the current song.
+LateStrikeAction lateStrikeAction = LATE_STRIKE_PLAY;
+uint16_t lateStrikeLimitMs = 0;
+uint8_t lateSoftenPercent = 100;
+uint32_t lateDroppedCount = 0;
+uint32_t lateSoftenedCount = 0;
+// One bit per channel whose plain EVENT strike was dropped: its hold writes are
+// skipped too until the next release, so a dropped note is never held silently.
+// A dropped NOTE carries its own hold and release, so it never sets a bit.
+uint8_t lateDroppedChannels[RUNTIME_GLOBAL_CHANNEL_COUNT / 8] = {0};
 bool channelOutputActive[RUNTIME_GLOBAL_CHANNEL_COUNT] = {false};
 uint32_t channelOutputStartedAtMs[RUNTIME_GLOBAL_CHANNEL_COUNT] = {0};
 
 char lineBuffer[LINE_BUFFER_SIZE];
 uint8_t lineLength = 0;
 
+// Set by BAUD until a PING arrives at the new rate.
+bool baudConfirmPending = false;
+uint32_t baudSwitchedAtMs = 0;
+
+// Total and worst duration of one measured section since the last PERF RESET.
+typedef struct {
+  uint32_t totalUs;
+  uint32_t maxUs;
+} PerfTimer;
+
+uint32_t perfWindowStartedAtMs = 0;
+uint32_t perfLoopCount = 0;
+uint32_t perfPwmWriteCount = 0;
+uint32_t perfLateMaxUs = 0;
+uint32_t perfLateTotalUs = 0;
+uint32_t perfDispatchCount = 0;
+PerfTimer perfLoop = {0, 0};
+PerfTimer perfPollSerial = {0, 0};
+PerfTimer perfPlayback = {0, 0};
+PerfTimer perfFailsafe = {0, 0};
+PerfTimer perfPwmWrite = {0, 0};
+
+void recordPerf(PerfTimer &timer, uint32_t elapsedUs) {
+  timer.totalUs += elapsedUs;
+  if (elapsedUs > timer.maxUs) {
+    timer.maxUs = elapsedUs;
+  }
+}
+
+void resetPerf() {
+  perfWindowStartedAtMs = millis();
+  perfLoopCount = 0;
+  perfPwmWriteCount = 0;
+  perfLateMaxUs = 0;
+  perfLateTotalUs = 0;
+  perfDispatchCount = 0;
+  perfLoop = {0, 0};
+  perfPollSerial = {0, 0};
+  perfPlayback = {0, 0};
+  perfFailsafe = {0, 0};
+  perfPwmWrite = {0, 0};
+}
+
+uint32_t playbackClock() {
+  // micros() has 4 us granularity on a 16 MHz Uno and wraps after ~71 minutes;
+  // all due-time comparisons below are wrap-safe.
+  return songTimeInMicros ? micros() : millis();
+}
+
 uint8_t freeEventSlots() {
   return EVENT_BUFFER_CAPACITY - bufferedEventCount;
 }
 
-void allChannelsOff() {
+void clearNoteTimers() {
+  for (uint8_t timerIndex = 0; timerIndex < NOTE_TIMER_CAPACITY; timerIndex++) {
+    noteTimers[timerIndex].active = false;
+  }
+}
+
+uint8_t activeNoteTimerCount() {
+  uint8_t count = 0;
+  for (uint8_t timerIndex = 0; timerIndex < NOTE_TIMER_CAPACITY; timerIndex++) {
+    if (noteTimers[timerIndex].active) {
+      count++;
+    }
+  }
+  return count;
+}
+
+void releaseAllOutputs() {
   // Turn every output off on every PCA9685 board, even if the current build
-  // only wires some channels. This is the safest stop state.
+  // only wires some channels. This is the safest stop state. Pending NOTE
+  // holds are dropped too so nothing re-energizes afterwards. REFRESH channels
+  // keep their held PWM, so PAUSE can re-assert it on RESUME.
+  clearNoteTimers();
   for (uint8_t boardIndex = 0; boardIndex < RUNTIME_PCA_BOARD_COUNT; boardIndex++) {
     for (uint8_t channel = 0; channel < RUNTIME_PCA_CHANNELS_PER_BOARD; channel++) {
       pwmBoards[boardIndex].setPWM(channel, 0, 0);
@@ -107,6 +242,14 @@ void allChannelsOff() {
   }
 }
 
+void allChannelsOff() {
+  // Like releaseAllOutputs(), but the REFRESH holds end too.
+  for (uint8_t refreshIndex = 0; refreshIndex < channelRefreshCount; refreshIndex++) {
+    channelRefreshes[refreshIndex].pwm = 0;
+  }
+  releaseAllOutputs();
+}
+
 bool probeI2cAddress(uint8_t address) {
   Wire.beginTransmission(address);
   return Wire.endTransmission() == 0;
@@ -187,7 +330,20 @@ void setGlobalChannelPwm(uint8_t globalChannel, uint16_t pwmValue) {
 
   uint8_t boardIndex = globalChannel / RUNTIME_PCA_CHANNELS_PER_BOARD;
   uint8_t localChannel = globalChannel % RUNTIME_PCA_CHANNELS_PER_BOARD;
-  pwmBoards[boardIndex].setPWM(localChannel, 0, pwmValue);
+  if (RUNTIME_PERF_ENABLED) {
+    uint32_t writeStartedAt = micros();
+    pwmBoards[boardIndex].setPWM(localChannel, 0, pwmValue);
+    recordPerf(perfPwmWrite, micros() - writeStartedAt);
+    perfPwmWriteCount++;
+  } else {
+    pwmBoards[boardIndex].setPWM(localChannel, 0, pwmValue);
+  }
+  for (uint8_t refreshIndex = 0; refreshIndex < channelRefreshCount; refreshIndex++) {
+    if (channelRefreshes[refreshIndex].channel == globalChannel) {
+      channelRefreshes[refreshIndex].pwm = pwmValue;
+      channelRefreshes[refreshIndex].lastWriteAtMs = millis();
+    }
+  }
   if (pwmValue == 0) {
     channelOutputActive[globalChannel] = false;
     channelOutputStartedAtMs[globalChannel] = 0;
@@ -204,9 +360,61 @@ uint32_t outputFailsafeMsForChannel(uint8_t channel) {
   return RUNTIME_OUTPUT_FAILSAFE_MS;
 }
 
+void serviceChannelRefresh() {
+  // Re-assert held REFRESH channels only while the song is still streaming. If
+  // Python goes quiet and the buffer runs dry, refreshing stops and the output
+  // failsafe releases the channel as usual.
+  if (!playbackActive || playbackPaused || bufferedEventCount == 0) {
+    return;
+  }
+  uint32_t now = millis();
+  for (uint8_t refreshIndex = 0; refreshIndex < channelRefreshCount; refreshIndex++) {
+    ChannelRefresh &refresh = channelRefreshes[refreshIndex];
+    if (refresh.pwm == 0 || (uint32_t)(now - refresh.lastWriteAtMs) < refresh.periodMs) {
+      continue;
+    }
+    // Rewriting through setGlobalChannelPwm also restarts the failsafe window,
+    // so a refreshed channel counts as alive rather than stuck.
+    setGlobalChannelPwm(refresh.channel, refresh.pwm);
+  }
+}
+
+bool setChannelRefresh(uint8_t channel, uint16_t periodMs) {
+  for (uint8_t refreshIndex = 0; refreshIndex < channelRefreshCount; refreshIndex++) {
+    if (channelRefreshes[refreshIndex].channel != channel) {
+      continue;
+    }
+    if (periodMs == 0) {
+      channelRefreshes[refreshIndex] = channelRefreshes[channelRefreshCount - 1];
+      channelRefreshCount--;
+    } else {
+      channelRefreshes[refreshIndex].periodMs = periodMs;
+    }
+    return true;
+  }
+  if (periodMs == 0) {
+    return true;
+  }
+  if (channelRefreshCount >= REFRESH_CHANNEL_CAPACITY) {
+    return false;
+  }
+  ChannelRefresh &refresh = channelRefreshes[channelRefreshCount++];
+  refresh.channel = channel;
+  refresh.periodMs = periodMs;
+  refresh.pwm = 0;
+  refresh.lastWriteAtMs = millis();
+  return true;
+}
+
+uint8_t failsafeNextChannel = 0;
+
 void serviceOutputFailsafe() {
+  // A stuck output only needs catching within its failsafe time, so spread the
+  // 64-channel scan over several passes to keep each loop() short.
   uint32_t now = millis();
-  for (uint8_t channel = 0; channel < RUNTIME_GLOBAL_CHANNEL_COUNT; channel++) {
+  for (uint8_t checked = 0; checked < FAILSAFE_CHANNELS_PER_PASS; checked++) {
+    uint8_t channel = failsafeNextChannel;
+    failsafeNextChannel = (uint8_t)((failsafeNextChannel + 1) % RUNTIME_GLOBAL_CHANNEL_COUNT);
     if (!channelOutputActive[channel]) {
       continue;
     }
@@ -220,6 +428,132 @@ void serviceOutputFailsafe() {
   }
 }
 
+void cancelNoteTimer(uint8_t channel) {
+  // A newer event on the channel takes over from any envelope still pending.
+  for (uint8_t timerIndex = 0; timerIndex < NOTE_TIMER_CAPACITY; timerIndex++) {
+    if (noteTimers[timerIndex].active && noteTimers[timerIndex].channel == channel) {
+      noteTimers[timerIndex].active = false;
+    }
+  }
+}
+
+void startNoteTimer(const SolenoidEvent &event, uint32_t strikeAt) {
+  // Python only sends as many overlapping NOTEs as the HELLO reply advertises.
+  // If the table is full anyway, release the note that is due to end soonest.
+  uint32_t unitsPerMs = songTimeInMicros ? 1000UL : 1UL;
+  uint8_t slot = NOTE_TIMER_CAPACITY;
+  for (uint8_t timerIndex = 0; timerIndex < NOTE_TIMER_CAPACITY; timerIndex++) {
+    if (!noteTimers[timerIndex].active) {
+      slot = timerIndex;
+      break;
+    }
+    if (slot == NOTE_TIMER_CAPACITY ||
+        (int32_t)(noteTimers[timerIndex].releaseAt - noteTimers[slot].releaseAt) < 0) {
+      slot = timerIndex;
+    }
+  }
+  if (noteTimers[slot].active) {
+    setGlobalChannelPwm(noteTimers[slot].channel, 0);
+  }
+
+  noteTimers[slot].active = true;
+  noteTimers[slot].channel = event.channel;
+  noteTimers[slot].holdPwm = event.holdPwm;
+  noteTimers[slot].holdPending = event.holdPwm > 0 && event.strikeMs < event.durationMs;
+  noteTimers[slot].holdAt = strikeAt + (uint32_t)event.strikeMs * unitsPerMs;
+  noteTimers[slot].releaseAt = strikeAt + (uint32_t)event.durationMs * unitsPerMs;
+}
+
+void serviceNoteTimers(uint32_t now) {
+  for (uint8_t timerIndex = 0; timerIndex < NOTE_TIMER_CAPACITY; timerIndex++) {
+    NoteTimer &timer = noteTimers[timerIndex];
+    if (!timer.active) {
+      continue;
+    }
+    if (timer.holdPending && (int32_t)(now - timer.holdAt) >= 0) {
+      setGlobalChannelPwm(timer.channel, timer.holdPwm);
+      timer.holdPending = false;
+    }
+    if ((int32_t)(now - timer.releaseAt) >= 0) {
+      setGlobalChannelPwm(timer.channel, 0);
+      timer.active = false;
+    }
+  }
+}
+
+bool playbackDeadlineDue() {
+  // True when servicePlayback has an event or NOTE timer write due right now.
+  if (!playbackActive || playbackPaused) {
+    return false;
+  }
+  uint32_t now = playbackClock();
+  if (dueTimeArmed && (int32_t)(now - nextEventDueAt) >= 0) {
+    return true;
+  }
+  for (uint8_t timerIndex = 0; timerIndex < NOTE_TIMER_CAPACITY; timerIndex++) {
+    const NoteTimer &timer = noteTimers[timerIndex];
+    if (!timer.active) {
+      continue;
+    }
+    if ((timer.holdPending && (int32_t)(now - timer.holdAt) >= 0) || (int32_t)(now - timer.releaseAt) >= 0) {
+      return true;
+    }
+  }
+  return false;
+}
+
+void clearLateStrikePolicy() {
+  lateStrikeAction = LATE_STRIKE_PLAY;
+  lateStrikeLimitMs = 0;
+  lateSoftenPercent = 100;
+  lateDroppedCount = 0;
+  lateSoftenedCount = 0;
+  memset(lateDroppedChannels, 0, sizeof(lateDroppedChannels));
+}
+
+bool lateStrikeDropped(uint8_t channel) {
+  return (lateDroppedChannels[channel / 8] & (1 << (channel % 8))) != 0;
+}
+
+void applySongEvent(const SolenoidEvent &event, uint32_t dueAt, uint32_t latenessMs) {
+  SolenoidEvent applied = event;
+  bool noteStrike = applied.durationMs > 0;
+  if (applied.pwm == 0 || noteStrike) {
+    // A release ends any dropped strike on the channel. So does a NOTE: it is
+    // always a fresh strike, never a hold write of the note that was dropped.
+    lateDroppedChannels[applied.channel / 8] &= (uint8_t)~(1 << (applied.channel % 8));
+  } else if (lateStrikeDropped(applied.channel)) {
+    return;
+  }
+
+  if (applied.pwm > 0 &&
+      lateStrikeAction != LATE_STRIKE_PLAY &&
+      latenessMs > lateStrikeLimitMs &&
+      applied.channel != RUNTIME_SUSTAIN_PEDAL_CHANNEL &&
+      !channelOutputActive[applied.channel]) {
+    if (lateStrikeAction == LATE_STRIKE_DROP) {
+      // A dropped NOTE takes its hold and release with it; a plain strike
+      // mutes the channel until its release EVENT arrives.
+      if (!noteStrike) {
+        lateDroppedChannels[applied.channel / 8] |= (uint8_t)(1 << (applied.channel % 8));
+      }
+      lateDroppedCount++;
+      return;
+    }
+    applied.pwm = (uint16_t)((uint32_t)applied.pwm * lateSoftenPercent / 100);
+    if (applied.pwm < applied.holdPwm) {
+      applied.pwm = applied.holdPwm;
+    }
+    lateSoftenedCount++;
+  }
+
+  cancelNoteTimer(applied.channel);
+  setGlobalChannelPwm(applied.channel, applied.pwm);
+  if (applied.durationMs > 0) {
+    startNoteTimer(applied, dueAt);
+  }
+}
+
 void resetEventQueue() {
   bufferHead = 0;
   bufferTail = 0;
@@ -234,9 +568,12 @@ void resetSongState(bool stopOutputs) {
   expectedSongEventCount = 0;
   receivedSongEventCount = 0;
   playedSongEventCount = 0;
-  nextEventDueAtMs = 0;
-  lastEventDueAtMs = 0;
-  pauseStartedAtMs = 0;
+  nextEventDueAt = 0;
+  lastEventDueAt = 0;
+  pauseStartedAt = 0;
+  songTimeInMicros = false;
+  channelRefreshCount = 0;
+  clearLateStrikePolicy();
   resetEventQueue();
   if (stopOutputs) {
     allChannelsOff();
@@ -279,7 +616,39 @@ void sendReady() {
   Serial.print(F("READY "));
   Serial.print(RUNTIME_PROTOCOL_VERSION);
   Serial.print(F(" BUFFER "));
-  Serial.println(EVENT_BUFFER_CAPACITY);
+  Serial.print(EVENT_BUFFER_CAPACITY);
+  Serial.print(F(" NOTES "));
+  Serial.println(NOTE_TIMER_CAPACITY);
+}
+
+bool supportedSerialBaud(uint32_t baud) {
+  if (baud == RUNTIME_SERIAL_BAUD) {
+    return true;
+  }
+  for (uint8_t rateIndex = 0; rateIndex < sizeof(RUNTIME_FAST_SERIAL_BAUDS) / sizeof(RUNTIME_FAST_SERIAL_BAUDS[0]);
+       rateIndex++) {
+    if (RUNTIME_FAST_SERIAL_BAUDS[rateIndex] == baud) {
+      return true;
+    }
+  }
+  return false;
+}
+
+void switchSerialBaud(uint32_t baud) {
+  // Let the last reply drain at the old rate, then drop any half-read line.
+  Serial.flush();
+  Serial.end();
+  Serial.begin(baud);
+  lineLength = 0;
+}
+
+void serviceBaudConfirm() {
+  // If Python never got a PING through at the new rate, go back to the
+  // default so it can reach the runtime again with HELLO.
+  if (baudConfirmPending && (uint32_t)(millis() - baudSwitchedAtMs) >= RUNTIME_BAUD_CONFIRM_MS) {
+    baudConfirmPending = false;
+    switchSerialBaud(RUNTIME_SERIAL_BAUD);
+  }
 }
 
 void sendOk(const __FlashStringHelper *message) {
@@ -325,15 +694,19 @@ void sendStatus() {
   Serial.print(F(" free="));
   Serial.print(freeEventSlots());
   Serial.print(F(" total="));
-  Serial.println(expectedSongEventCount);
+  Serial.print(expectedSongEventCount);
+  Serial.print(F(" dropped="));
+  Serial.print(lateDroppedCount);
+  Serial.print(F(" softened="));
+  Serial.println(lateSoftenedCount);
 }
 
 bool parseEventLine(const char *line, SolenoidEvent *eventOut) {
-  // EVENT lines come from Python in the form: EVENT <dt_ms> <global_channel> <pwm>.
+  // EVENT lines come from Python in the form: EVENT <dt> <global_channel> <pwm>.
   unsigned long dtValue = 0;
   unsigned int channelValue = 0;
   unsigned int pwmValue = 0;
-  int parsed = sscanf(line, "EVENT %lu %u %u", &dtValue, &channelValue, &pwmValue);
+  int parsed = sscanf_P(line, PSTR("EVENT %lu %u %u"), &dtValue, &channelValue, &pwmValue);
   if (parsed != 3) {
     return false;
   }
@@ -341,9 +714,48 @@ bool parseEventLine(const char *line, SolenoidEvent *eventOut) {
     return false;
   }
 
-  eventOut->dt_ms = (uint32_t)dtValue;
+  eventOut->dt = (uint32_t)dtValue;
   eventOut->channel = (uint8_t)channelValue;
   eventOut->pwm = (uint16_t)pwmValue;
+  eventOut->holdPwm = 0;
+  eventOut->strikeMs = 0;
+  eventOut->durationMs = 0;
+  return true;
+}
+
+bool parseNoteLine(const char *line, SolenoidEvent *eventOut) {
+  // NOTE lines come from Python in the form:
+  // NOTE <dt> <global_channel> <strike_pwm> <hold_pwm> <strike_ms> <duration_ms>.
+  // hold_pwm = 0 releases straight after the strike.
+  unsigned long dtValue = 0;
+  unsigned int channelValue = 0;
+  unsigned int strikePwmValue = 0;
+  unsigned int holdPwmValue = 0;
+  unsigned int strikeMsValue = 0;
+  unsigned int durationMsValue = 0;
+  int parsed = sscanf_P(
+      line,
+      PSTR("NOTE %lu %u %u %u %u %u"),
+      &dtValue,
+      &channelValue,
+      &strikePwmValue,
+      &holdPwmValue,
+      &strikeMsValue,
+      &durationMsValue);
+  if (parsed != 6) {
+    return false;
+  }
+  if (channelValue >= RUNTIME_GLOBAL_CHANNEL_COUNT || strikePwmValue == 0 || strikePwmValue > 4095 ||
+      holdPwmValue > 4095 || durationMsValue == 0 || strikeMsValue > durationMsValue) {
+    return false;
+  }
+
+  eventOut->dt = (uint32_t)dtValue;
+  eventOut->channel = (uint8_t)channelValue;
+  eventOut->pwm = (uint16_t)strikePwmValue;
+  eventOut->holdPwm = (uint16_t)holdPwmValue;
+  eventOut->strikeMs = (uint16_t)strikeMsValue;
+  eventOut->durationMs = (uint16_t)durationMsValue;
   return true;
 }
 
@@ -364,9 +776,9 @@ bool parseFireLine(
 
   // FIRE is a calibration-only helper used by scripts/piano_tools.py.
   // It performs one strike/hold/release pulse without loading a song.
-  int parsed = sscanf(
+  int parsed = sscanf_P(
       line,
-      "FIRE %u %u %u %u %u %u",
+      PSTR("FIRE %u %u %u %u %u %u"),
       &channelValue,
       &strikePwmValue,
       &holdPwmValue,
@@ -416,7 +828,7 @@ void performCalibrationFire(
 
 void armDueTimeFromBufferedHead() {
   // The queue stores relative delays. Once an event reaches the head of the
-  // queue, convert that delay into an absolute millis() deadline.
+  // queue, convert that delay into an absolute playbackClock() deadline.
   if (!playbackActive || playbackPaused || dueTimeArmed || bufferedEventCount == 0) {
     return;
   }
@@ -427,9 +839,9 @@ void armDueTimeFromBufferedHead() {
   }
 
   if (playedSongEventCount == 0) {
-    nextEventDueAtMs = millis() + nextEvent.dt_ms;
+    nextEventDueAt = playbackClock() + nextEvent.dt;
   } else {
-    nextEventDueAtMs = lastEventDueAtMs + nextEvent.dt_ms;
+    nextEventDueAt = lastEventDueAt + nextEvent.dt;
   }
   dueTimeArmed = true;
 }
@@ -438,7 +850,7 @@ void finishPlayback() {
   playbackActive = false;
   playbackPaused = false;
   dueTimeArmed = false;
-  pauseStartedAtMs = 0;
+  pauseStartedAt = 0;
   allChannelsOff();
   sendOk(F("PLAYBACK_DONE"));
 }
@@ -463,8 +875,10 @@ void pausePlayback() {
   }
 
   playbackPaused = true;
-  pauseStartedAtMs = millis();
-  allChannelsOff();
+  pauseStartedAt = playbackClock();
+  // Pedal holds now live in the REFRESH table rather than in the stream, so
+  // they are kept across the pause and written again on RESUME.
+  releaseAllOutputs();
   sendOk(F("PAUSED"));
 }
 
@@ -474,73 +888,144 @@ void resumePlayback() {
     return;
   }
 
-  uint32_t pausedMs = millis() - pauseStartedAtMs;
+  uint32_t pausedFor = playbackClock() - pauseStartedAt;
   if (playedSongEventCount > 0) {
-    lastEventDueAtMs += pausedMs;
+    lastEventDueAt += pausedFor;
   }
   if (dueTimeArmed) {
-    nextEventDueAtMs += pausedMs;
+    nextEventDueAt += pausedFor;
   }
   playbackPaused = false;
-  pauseStartedAtMs = 0;
+  pauseStartedAt = 0;
+  for (uint8_t refreshIndex = 0; refreshIndex < channelRefreshCount; refreshIndex++) {
+    if (channelRefreshes[refreshIndex].pwm > 0) {
+      setGlobalChannelPwm(channelRefreshes[refreshIndex].channel, channelRefreshes[refreshIndex].pwm);
+    }
+  }
   armDueTimeFromBufferedHead();
   sendOk(F("RESUMED"));
 }
 
+void printPerfPair(const __FlashStringHelper *label, uint32_t first, uint32_t second) {
+  Serial.print(label);
+  Serial.print(first);
+  Serial.print('/');
+  Serial.print(second);
+}
+
+void sendPerf() {
+  // Averages are per loop() pass, except pwm (per setPWM write) and late (per
+  // dispatched event).
+  // Kept short: the Uno blocks while this line drains at the serial baud rate.
+  uint32_t loops = perfLoopCount > 0 ? perfLoopCount : 1;
+  uint32_t writes = perfPwmWriteCount > 0 ? perfPwmWriteCount : 1;
+  Serial.print(F("PERF win="));
+  Serial.print(millis() - perfWindowStartedAtMs);
+  Serial.print(F(" loops="));
+  Serial.print(perfLoopCount);
+  printPerfPair(F(" loop="), perfLoop.totalUs / loops, perfLoop.maxUs);
+  printPerfPair(F(" poll="), perfPollSerial.totalUs / loops, perfPollSerial.maxUs);
+  printPerfPair(F(" play="), perfPlayback.totalUs / loops, perfPlayback.maxUs);
+  printPerfPair(F(" fs="), perfFailsafe.totalUs / loops, perfFailsafe.maxUs);
+  Serial.print(F(" pwm="));
+  Serial.print(perfPwmWriteCount);
+  printPerfPair(F("/"), perfPwmWrite.totalUs / writes, perfPwmWrite.maxUs);
+  Serial.print(F(" late="));
+  Serial.print(perfDispatchCount);
+  printPerfPair(F("/"), perfLateTotalUs / (perfDispatchCount > 0 ? perfDispatchCount : 1), perfLateMaxUs);
+  Serial.println();
+}
+
 void handleCommand(const char *line) {
   // Text protocol used by Python:
   // HELLO/STATUS inspect the runtime, BEGIN/EVENT/COMMIT load events,
   // PLAY/PAUSE/RESUME control timed output, and STOP/CLEAR/ALL_OFF recover to a safe state.
-  if (strcmp(line, "PING") == 0) {
+  if (strcmp_P(line, PSTR("PING")) == 0) {
+    baudConfirmPending = false;
     Serial.println(F("PONG"));
     return;
   }
 
-  if (strcmp(line, "HELLO") == 0) {
+  if (strcmp_P(line, PSTR("HELLO")) == 0) {
     sendReady();
     return;
   }
 
-  if (strcmp(line, "HELP") == 0) {
+  if (strcmp_P(line, PSTR("HELP")) == 0) {
     Serial.println(
-        F("OK COMMANDS HELLO PING STATUS I2C BEGIN EVENT COMMIT PLAY PAUSE RESUME STOP CLEAR FIRE ALL_OFF"));
+        F("OK COMMANDS HELLO PING BAUD STATUS I2C BEGIN EVENT NOTE REFRESH LATE COMMIT END PLAY PAUSE RESUME STOP CLEAR FIRE ALL_OFF PERF"));
     return;
   }
 
-  if (strcmp(line, "I2C") == 0) {
+  if (strcmp_P(line, PSTR("I2C")) == 0) {
+    // Probing all 64 addresses takes milliseconds, too long during a song.
+    if (playbackActive) {
+      sendError(F("BUSY"));
+      return;
+    }
     sendI2cStatus();
     return;
   }
 
-  if (strcmp(line, "ALL_OFF") == 0) {
+  unsigned long requestedBaud = 0;
+  if (sscanf_P(line, PSTR("BAUD %lu"), &requestedBaud) == 1) {
+    if (playbackActive) {
+      sendError(F("BUSY"));
+      return;
+    }
+    if (!supportedSerialBaud((uint32_t)requestedBaud)) {
+      sendError(F("BAD_BAUD"));
+      return;
+    }
+    Serial.print(F("OK BAUD "));
+    Serial.println(requestedBaud);
+    switchSerialBaud((uint32_t)requestedBaud);
+    baudConfirmPending = requestedBaud != RUNTIME_SERIAL_BAUD;
+    baudSwitchedAtMs = millis();
+    return;
+  }
+
+  if (strcmp_P(line, PSTR("ALL_OFF")) == 0) {
     allChannelsOff();
     sendOk(F("ALL_OFF"));
     return;
   }
 
-  if (strcmp(line, "STOP") == 0) {
+  if (strcmp_P(line, PSTR("STOP")) == 0) {
     playbackActive = false;
     playbackPaused = false;
     dueTimeArmed = false;
-    pauseStartedAtMs = 0;
+    pauseStartedAt = 0;
     allChannelsOff();
     sendOk(F("STOPPED"));
     return;
   }
 
-  if (strcmp(line, "CLEAR") == 0) {
+  if (strcmp_P(line, PSTR("CLEAR")) == 0) {
     resetSongState(true);
     sendOk(F("CLEARED"));
     return;
   }
 
-  if (strcmp(line, "STATUS") == 0) {
+  if (strcmp_P(line, PSTR("STATUS")) == 0) {
     sendStatus();
     return;
   }
 
+  if (strcmp_P(line, PSTR("PERF")) == 0) {
+    sendPerf();
+    return;
+  }
+
+  if (strcmp_P(line, PSTR("PERF RESET")) == 0) {
+    // Report the window that just ended, then start a new one.
+    sendPerf();
+    resetPerf();
+    return;
+  }
+
   unsigned long requestedCount = 0;
-  if (sscanf(line, "BEGIN %lu", &requestedCount) == 1) {
+  if (sscanf_P(line, PSTR("BEGIN %lu"), &requestedCount) == 1) {
     resetSongState(true);
     if (requestedCount == 0) {
       sendError(F("EMPTY_SONG"));
@@ -548,14 +1033,63 @@ void handleCommand(const char *line) {
     }
     transferActive = true;
     expectedSongEventCount = (uint32_t)requestedCount;
+    songTimeInMicros = strstr_P(line, PSTR(" US")) != NULL;
     Serial.print(F("OK BEGIN capacity="));
     Serial.print(EVENT_BUFFER_CAPACITY);
     Serial.print(F(" total="));
-    Serial.println(expectedSongEventCount);
+    Serial.print(expectedSongEventCount);
+    Serial.print(F(" unit="));
+    Serial.println(songTimeInMicros ? F("us") : F("ms"));
+    return;
+  }
+
+  unsigned int refreshChannel = 0;
+  unsigned int refreshPeriodMs = 0;
+  if (sscanf_P(line, PSTR("REFRESH %u %u"), &refreshChannel, &refreshPeriodMs) == 2) {
+    if (refreshChannel >= RUNTIME_GLOBAL_CHANNEL_COUNT) {
+      sendError(F("BAD_REFRESH"));
+      return;
+    }
+    if (!setChannelRefresh((uint8_t)refreshChannel, (uint16_t)refreshPeriodMs)) {
+      sendError(F("REFRESH_FULL"));
+      return;
+    }
+    Serial.print(F("OK REFRESH channel="));
+    Serial.print(refreshChannel);
+    Serial.print(F(" period="));
+    Serial.println(refreshPeriodMs);
     return;
   }
 
-  if (strncmp(line, "EVENT ", 6) == 0) {
+  unsigned int lateLimitMs = 0;
+  if (sscanf_P(line, PSTR("LATE %u"), &lateLimitMs) == 1) {
+    unsigned int softenPercent = 0;
+    if (lateLimitMs == 0) {
+      lateStrikeAction = LATE_STRIKE_PLAY;
+    } else if (strstr_P(line, PSTR(" DROP")) != NULL) {
+      lateStrikeAction = LATE_STRIKE_DROP;
+    } else if (sscanf_P(line, PSTR("LATE %*u SOFT %u"), &softenPercent) == 1 && softenPercent <= 100) {
+      lateStrikeAction = LATE_STRIKE_SOFTEN;
+      lateSoftenPercent = (uint8_t)softenPercent;
+    } else {
+      sendError(F("BAD_LATE"));
+      return;
+    }
+    lateStrikeLimitMs = (uint16_t)lateLimitMs;
+    Serial.print(F("OK LATE limit="));
+    Serial.print(lateStrikeLimitMs);
+    Serial.print(F(" action="));
+    if (lateStrikeAction == LATE_STRIKE_SOFTEN) {
+      Serial.print(F("soft percent="));
+      Serial.println(lateSoftenPercent);
+    } else {
+      Serial.println(lateStrikeAction == LATE_STRIKE_DROP ? F("drop") : F("play"));
+    }
+    return;
+  }
+
+  bool isNoteLine = strncmp_P(line, PSTR("NOTE "), 5) == 0;
+  if (isNoteLine || strncmp_P(line, PSTR("EVENT "), 6) == 0) {
     if (!transferActive) {
       sendError(F("BEGIN_REQUIRED"));
       return;
@@ -570,7 +1104,8 @@ void handleCommand(const char *line) {
     }
 
     SolenoidEvent parsedEvent;
-    if (!parseEventLine(line, &parsedEvent)) {
+    bool parsedOk = isNoteLine ? parseNoteLine(line, &parsedEvent) : parseEventLine(line, &parsedEvent);
+    if (!parsedOk) {
       sendError(F("BAD_EVENT"));
       return;
     }
@@ -584,7 +1119,7 @@ void handleCommand(const char *line) {
     return;
   }
 
-  if (strcmp(line, "COMMIT") == 0) {
+  if (strcmp_P(line, PSTR("COMMIT")) == 0) {
     Serial.print(F("OK ACCEPTED recv="));
     Serial.print(receivedSongEventCount);
     Serial.print(F(" free="));
@@ -594,22 +1129,34 @@ void handleCommand(const char *line) {
     return;
   }
 
-  if (strcmp(line, "PLAY") == 0) {
+  if (strcmp_P(line, PSTR("END")) == 0) {
+    // Python thinned the stream: the song ends after the events received so far.
+    if (!transferActive || receivedSongEventCount == 0) {
+      sendError(F("BEGIN_REQUIRED"));
+      return;
+    }
+    expectedSongEventCount = receivedSongEventCount;
+    Serial.print(F("OK END total="));
+    Serial.println(expectedSongEventCount);
+    return;
+  }
+
+  if (strcmp_P(line, PSTR("PLAY")) == 0) {
     beginPlayback();
     return;
   }
 
-  if (strcmp(line, "PAUSE") == 0) {
+  if (strcmp_P(line, PSTR("PAUSE")) == 0) {
     pausePlayback();
     return;
   }
 
-  if (strcmp(line, "RESUME") == 0) {
+  if (strcmp_P(line, PSTR("RESUME")) == 0) {
     resumePlayback();
     return;
   }
 
-  if (strncmp(line, "FIRE ", 5) == 0) {
+  if (strncmp_P(line, PSTR("FIRE "), 5) == 0) {
     if (playbackActive) {
       sendError(F("BUSY"));
       return;
@@ -643,7 +1190,11 @@ void handleCommand(const char *line) {
 
 void pollSerial() {
   // Build one newline-terminated command at a time without using dynamic String
-  // allocation. That keeps RAM use predictable on the Uno.
+  // allocation. That keeps RAM use predictable on the Uno. After each command,
+  // yield back to loop() if an event is due or the slice budget is spent; the
+  // remaining bytes wait in the UART buffer until the next pass.
+  serviceBaudConfirm();
+  uint32_t sliceStartedAt = micros();
   while (Serial.available() > 0) {
     char incoming = (char)Serial.read();
     if (incoming == '\r') {
@@ -656,6 +1207,9 @@ void pollSerial() {
         handleCommand(lineBuffer);
       }
       lineLength = 0;
+      if ((uint32_t)(micros() - sliceStartedAt) >= RUNTIME_SERIAL_SLICE_BUDGET_US || playbackDeadlineDue()) {
+        return;
+      }
       continue;
     }
 
@@ -678,18 +1232,21 @@ void servicePlayback() {
     return;
   }
 
+  uint32_t now = playbackClock();
+  serviceNoteTimers(now);
+
   armDueTimeFromBufferedHead();
   if (!dueTimeArmed) {
     if (expectedSongEventCount > 0 &&
         playedSongEventCount >= expectedSongEventCount &&
-        bufferedEventCount == 0) {
+        bufferedEventCount == 0 &&
+        activeNoteTimerCount() == 0) {
       finishPlayback();
     }
     return;
   }
 
-  uint32_t now = millis();
-  if ((int32_t)(now - nextEventDueAtMs) < 0) {
+  if ((int32_t)(now - nextEventDueAt) < 0) {
     return;
   }
 
@@ -700,15 +1257,25 @@ void servicePlayback() {
       return;
     }
 
-    setGlobalChannelPwm(event.channel, event.pwm);
+    uint32_t lateness = now - nextEventDueAt;
+    if (RUNTIME_PERF_ENABLED) {
+      uint32_t latenessUs = songTimeInMicros ? lateness : lateness * 1000UL;
+      if (latenessUs > perfLateMaxUs) {
+        perfLateMaxUs = latenessUs;
+      }
+      perfLateTotalUs += latenessUs;
+      perfDispatchCount++;
+    }
+    applySongEvent(event, nextEventDueAt, songTimeInMicros ? lateness / 1000UL : lateness);
     playedSongEventCount++;
-    lastEventDueAtMs = nextEventDueAtMs;
+    lastEventDueAt = nextEventDueAt;
     dueTimeArmed = false;
 
     if (expectedSongEventCount > 0 &&
         playedSongEventCount >= expectedSongEventCount &&
         bufferedEventCount == 0 &&
-        receivedSongEventCount >= expectedSongEventCount) {
+        receivedSongEventCount >= expectedSongEventCount &&
+        activeNoteTimerCount() == 0) {
       finishPlayback();
       return;
     }
@@ -717,7 +1284,7 @@ void servicePlayback() {
     if (!dueTimeArmed) {
       return;
     }
-    if ((int32_t)(now - nextEventDueAtMs) < 0) {
+    if ((int32_t)(now - nextEventDueAt) < 0) {
       return;
     }
   }
@@ -737,12 +1304,35 @@ void setup() {
     ;  // Wait for native USB boards; no-op on Uno after startup.
   }
   delay(50);
+  resetPerf();
   sendReady();
 }
 
 void loop() {
   // Serial loading and timed playback are both non-blocking during normal songs.
-  pollSerial();
+  // Due events go first; pollSerial() then handles input until the next event
+  // is due or its slice budget runs out, so an event waits at most for one
+  // command line plus one failsafe pass.
+  if (!RUNTIME_PERF_ENABLED) {
+    servicePlayback();
+    serviceChannelRefresh();
+    pollSerial();
+    serviceOutputFailsafe();
+    return;
+  }
+
+  uint32_t loopStartedAt = micros();
   servicePlayback();
+  serviceChannelRefresh();
+  uint32_t playbackEndedAt = micros();
+  pollSerial();
+  uint32_t pollEndedAt = micros();
   serviceOutputFailsafe();
+  uint32_t loopEndedAt = micros();
+
+  recordPerf(perfPlayback, playbackEndedAt - loopStartedAt);
+  recordPerf(perfPollSerial, pollEndedAt - playbackEndedAt);
+  recordPerf(perfFailsafe, loopEndedAt - pollEndedAt);
+  recordPerf(perfLoop, loopEndedAt - loopStartedAt);
+  perfLoopCount++;
 }
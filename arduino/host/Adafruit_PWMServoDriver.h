@@ -0,0 +1,21 @@
+/*
+  Host stand-in for one PCA9685 board. It keeps the last PWM written to each
+  channel and counts setPWM() calls so host runs can inspect the outputs.
+*/
+
+#pragma once
+
+#include <stdint.h>
+
+class Adafruit_PWMServoDriver {
+ public:
+  explicit Adafruit_PWMServoDriver(uint8_t address) : address(address) {}
+  void begin() {}
+  void setPWMFreq(float frequency) { frequencyHz = frequency; }
+  void setPWM(uint8_t channel, uint16_t on, uint16_t off);
+
+  uint8_t address;
+  float frequencyHz = 0.0f;
+  uint16_t values[16] = {0};
+  uint32_t writeCount = 0;
+};
@@ -0,0 +1,67 @@
+/*
+  Host stand-in for the Arduino core, just enough to build MusicBotOfficial.ino
+  with g++ on Linux. The clock and serial port are provided by host_main.cpp.
+*/
+
+#pragma once
+
+#include <stddef.h>
+#include <stdint.h>
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+
+// The Uno keeps these strings in flash (avr/pgmspace.h); the host has one address space.
+#define PROGMEM
+#define PSTR(string_literal) (string_literal)
+#define strcmp_P strcmp
+#define strncmp_P strncmp
+#define strstr_P strstr
+#define sscanf_P sscanf
+
+class __FlashStringHelper;
+#define F(string_literal) (reinterpret_cast<const __FlashStringHelper *>(string_literal))
+
+#define DEC 10
+#define HEX 16
+
+// Arduino's unsigned long is 32 bits on the Uno, so the host clock wraps the same way.
+uint32_t millis();
+uint32_t micros();
+void delay(unsigned long ms);
+
+class HardwareSerial {
+ public:
+  void begin(unsigned long baud);
+  void end() {}
+  void flush() {}
+  explicit operator bool() const { return true; }
+  int available();
+  int read();
+
+  size_t print(const char *text);
+  size_t print(const __FlashStringHelper *text);
+  size_t print(char value);
+  size_t print(unsigned char value, int base = DEC);
+  size_t print(int value, int base = DEC);
+  size_t print(unsigned int value, int base = DEC);
+  size_t print(long value, int base = DEC);
+  size_t print(unsigned long value, int base = DEC);
+
+  size_t println();
+  template <typename T>
+  size_t println(T value) {
+    size_t written = print(value);
+    return written + println();
+  }
+  template <typename T>
+  size_t println(T value, int base) {
+    size_t written = print(value, base);
+    return written + println();
+  }
+
+ private:
+  size_t printNumber(unsigned long value, bool negative, int base);
+};
+
+extern HardwareSerial Serial;
@@ -0,0 +1,23 @@
+/*
+  Host stand-in for the Arduino Wire library. Only address probing is modelled:
+  endTransmission() succeeds for addresses host_main.cpp marks as present.
+*/
+
+#pragma once
+
+#include <stdint.h>
+
+class TwoWire {
+ public:
+  void begin() {}
+  void setClock(uint32_t) {}
+  void beginTransmission(uint8_t address) { pendingAddress = address; }
+  uint8_t endTransmission();
+
+  bool devicePresent[128] = {false};
+
+ private:
+  uint8_t pendingAddress = 0;
+};
+
+extern TwoWire Wire;
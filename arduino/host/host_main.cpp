@@ -0,0 +1,451 @@
+/*
+  Host-native build of the MusicBotOfficial runtime
+
+  Compiles the real MusicBotOfficial.ino against the stub Arduino.h, Wire.h and
+  Adafruit_PWMServoDriver.h in this folder so the command parser, ring buffer,
+  playback timing and failsafe can be exercised on Linux.
+
+  Modes:
+    musicbot_host                  serial protocol on stdin/stdout, real clock
+    musicbot_host --manual-clock   time only moves on @ADVANCE (scripted runs)
+    musicbot_host --pty            serve the protocol on a pseudo-terminal so
+                                   `convert_midi.py --port /dev/pts/N` can stream
+    musicbot_host --bench N        time parsing and dispatch of N events
+    musicbot_host --max-baud RATE  garble the sketch's replies while it runs
+                                   faster than RATE (tests BAUD fallback)
+
+  Lines starting with '@' are handled by the host and never reach the sketch:
+    @ADVANCE <ms> [step_us]   move the manual clock, running loop() every step
+    @TIME                     report the host clock
+    @PWM <global_channel>     report the last PWM written to a channel
+    @BAUD                     report the sketch's current serial baud rate
+    @QUIT                     exit
+*/
+
+#include <errno.h>
+#include <fcntl.h>
+#include <poll.h>
+#include <termios.h>
+#include <time.h>
+#include <unistd.h>
+
+#include <chrono>
+#include <deque>
+#include <string>
+#include <thread>
+
+#include "Arduino.h"
+#include "../MusicBotOfficial/MusicBotOfficial.ino"
+
+namespace host {
+
+bool manualClock = false;
+uint64_t manualMicros = 0;
+uint64_t clockStartMicros = 0;
+bool tracePwm = false;
+bool discardOutput = false;
+int inputFd = STDIN_FILENO;
+int outputFd = STDOUT_FILENO;
+std::deque<char> serialInput;
+unsigned long serialBaud = 0;
+unsigned long maxCleanBaud = 0;
+const auto realClockStart = std::chrono::steady_clock::now();
+
+uint64_t nowMicros() {
+  if (manualClock) {
+    return clockStartMicros + manualMicros;
+  }
+  auto elapsed = std::chrono::steady_clock::now() - realClockStart;
+  return clockStartMicros +
+         (uint64_t)std::chrono::duration_cast<std::chrono::microseconds>(elapsed).count();
+}
+
+void writeOutput(const char *data, size_t length) {
+  if (discardOutput) {
+    return;
+  }
+  while (length > 0) {
+    ssize_t written = write(outputFd, data, length);
+    if (written > 0) {
+      data += written;
+      length -= (size_t)written;
+      continue;
+    }
+    if (written < 0 && (errno == EAGAIN || errno == EWOULDBLOCK)) {
+      // Like the Uno's USB bridge, drop output nobody is reading.
+      struct pollfd writable = {outputFd, POLLOUT, 0};
+      if (poll(&writable, 1, 50) <= 0) {
+        return;
+      }
+      continue;
+    }
+    if (written < 0 && errno == EINTR) {
+      continue;
+    }
+    return;
+  }
+}
+
+void writeOutput(const std::string &text) {
+  writeOutput(text.data(), text.size());
+}
+
+bool serialGarbled() {
+  return maxCleanBaud > 0 && serialBaud > maxCleanBaud;
+}
+
+void writeSerial(const char *data, size_t length) {
+  // A link that cannot carry the sketch's rate delivers noise instead of text.
+  if (!serialGarbled()) {
+    writeOutput(data, length);
+    return;
+  }
+  std::string noise(length, '\xF0');
+  writeOutput(noise);
+}
+
+int globalChannelFor(const Adafruit_PWMServoDriver &board, uint8_t localChannel) {
+  for (uint8_t boardIndex = 0; boardIndex < RUNTIME_PCA_BOARD_COUNT; boardIndex++) {
+    if (&pwmBoards[boardIndex] == &board) {
+      return boardIndex * RUNTIME_PCA_CHANNELS_PER_BOARD + localChannel;
+    }
+  }
+  return -1;
+}
+
+}  // namespace host
+
+HardwareSerial Serial;
+TwoWire Wire;
+
+uint32_t millis() {
+  return (uint32_t)(host::nowMicros() / 1000ULL);
+}
+
+uint32_t micros() {
+  return (uint32_t)host::nowMicros();
+}
+
+void delay(unsigned long ms) {
+  if (host::manualClock) {
+    host::manualMicros += (uint64_t)ms * 1000ULL;
+    return;
+  }
+  std::this_thread::sleep_for(std::chrono::milliseconds(ms));
+}
+
+void HardwareSerial::begin(unsigned long baud) {
+  host::serialBaud = baud;
+}
+
+int HardwareSerial::available() {
+  return (int)host::serialInput.size();
+}
+
+int HardwareSerial::read() {
+  if (host::serialInput.empty()) {
+    return -1;
+  }
+  char incoming = host::serialInput.front();
+  host::serialInput.pop_front();
+  return (unsigned char)incoming;
+}
+
+size_t HardwareSerial::print(const char *text) {
+  size_t length = strlen(text);
+  host::writeSerial(text, length);
+  return length;
+}
+
+size_t HardwareSerial::print(const __FlashStringHelper *text) {
+  return print(reinterpret_cast<const char *>(text));
+}
+
+size_t HardwareSerial::print(char value) {
+  host::writeSerial(&value, 1);
+  return 1;
+}
+
+size_t HardwareSerial::print(unsigned char value, int base) {
+  return printNumber(value, false, base);
+}
+
+size_t HardwareSerial::print(int value, int base) {
+  return print((long)value, base);
+}
+
+size_t HardwareSerial::print(unsigned int value, int base) {
+  return printNumber(value, false, base);
+}
+
+size_t HardwareSerial::print(long value, int base) {
+  if (value < 0 && base == DEC) {
+    return printNumber((unsigned long)(-value), true, base);
+  }
+  return printNumber((unsigned long)value, false, base);
+}
+
+size_t HardwareSerial::print(unsigned long value, int base) {
+  return printNumber(value, false, base);
+}
+
+size_t HardwareSerial::println() {
+  host::writeSerial("\r\n", 2);
+  return 2;
+}
+
+size_t HardwareSerial::printNumber(unsigned long value, bool negative, int base) {
+  char text[24];
+  int length = snprintf(text, sizeof(text), base == HEX ? "%s%lX" : "%s%lu", negative ? "-" : "", value);
+  host::writeSerial(text, (size_t)length);
+  return (size_t)length;
+}
+
+uint8_t TwoWire::endTransmission() {
+  // 2 is the Wire "address NACK" result the sketch treats as a missing board.
+  return devicePresent[pendingAddress & 0x7F] ? 0 : 2;
+}
+
+void Adafruit_PWMServoDriver::setPWM(uint8_t channel, uint16_t, uint16_t off) {
+  values[channel & 0x0F] = off;
+  writeCount++;
+  if (host::tracePwm) {
+    fprintf(
+        stderr,
+        "PWM t_us=%llu channel=%d value=%u\n",
+        (unsigned long long)host::nowMicros(),
+        host::globalChannelFor(*this, channel),
+        off);
+  }
+}
+
+namespace host {
+
+void runLoopOnce() {
+  loop();
+}
+
+void advanceManualClock(uint64_t advanceMicros, uint64_t stepMicros) {
+  if (stepMicros == 0) {
+    stepMicros = 250;
+  }
+  uint64_t targetMicros = manualMicros + advanceMicros;
+  while (manualMicros < targetMicros) {
+    uint64_t remaining = targetMicros - manualMicros;
+    manualMicros += remaining < stepMicros ? remaining : stepMicros;
+    runLoopOnce();
+  }
+}
+
+void handleHostCommand(const std::string &line) {
+  unsigned long long amount = 0;
+  unsigned long long step = 0;
+  int channel = 0;
+  char reply[96];
+  if (sscanf(line.c_str(), "@ADVANCE %llu %llu", &amount, &step) >= 1) {
+    if (!manualClock) {
+      writeOutput("@ERROR MANUAL_CLOCK_REQUIRED\r\n");
+      return;
+    }
+    advanceManualClock(amount * 1000ULL, step);
+    snprintf(reply, sizeof(reply), "@OK TIME us=%llu\r\n", (unsigned long long)nowMicros());
+  } else if (line == "@TIME") {
+    snprintf(reply, sizeof(reply), "@TIME us=%llu ms=%lu\r\n", (unsigned long long)nowMicros(), (unsigned long)millis());
+  } else if (sscanf(line.c_str(), "@PWM %d", &channel) == 1 && channel >= 0 &&
+             channel < RUNTIME_GLOBAL_CHANNEL_COUNT) {
+    const Adafruit_PWMServoDriver &board = pwmBoards[channel / RUNTIME_PCA_CHANNELS_PER_BOARD];
+    snprintf(
+        reply,
+        sizeof(reply),
+        "@PWM channel=%d value=%u\r\n",
+        channel,
+        board.values[channel % RUNTIME_PCA_CHANNELS_PER_BOARD]);
+  } else if (line == "@BAUD") {
+    snprintf(reply, sizeof(reply), "@BAUD rate=%lu\r\n", serialBaud);
+  } else if (line == "@QUIT") {
+    exit(0);
+  } else {
+    snprintf(reply, sizeof(reply), "@ERROR UNKNOWN_HOST_COMMAND\r\n");
+  }
+  writeOutput(reply);
+}
+
+void acceptInput(const char *data, size_t length, std::string &pendingLine) {
+  for (size_t index = 0; index < length; index++) {
+    pendingLine.push_back(data[index]);
+    if (data[index] != '\n') {
+      continue;
+    }
+    if (!pendingLine.empty() && pendingLine[0] == '@') {
+      std::string command = pendingLine.substr(0, pendingLine.find_first_of("\r\n"));
+      handleHostCommand(command);
+    } else if (serialGarbled()) {
+      serialInput.insert(serialInput.end(), pendingLine.size(), '\xF0');
+    } else {
+      serialInput.insert(serialInput.end(), pendingLine.begin(), pendingLine.end());
+    }
+    pendingLine.clear();
+    // Let the sketch see each line before the next one, as a 115200 baud link would.
+    runLoopOnce();
+  }
+}
+
+int openPty() {
+  int master = posix_openpt(O_RDWR | O_NOCTTY);
+  if (master < 0 || grantpt(master) != 0 || unlockpt(master) != 0) {
+    perror("posix_openpt");
+    exit(1);
+  }
+  const char *slavePath = ptsname(master);
+  // Keep one slave handle open so the master does not report EIO between clients.
+  int slave = open(slavePath, O_RDWR | O_NOCTTY);
+  struct termios settings;
+  if (slave >= 0 && tcgetattr(slave, &settings) == 0) {
+    cfmakeraw(&settings);
+    tcsetattr(slave, TCSANOW, &settings);
+  }
+  fcntl(master, F_SETFL, fcntl(master, F_GETFL) | O_NONBLOCK);
+  fprintf(stderr, "PTY %s\n", slavePath);
+  fflush(stderr);
+  return master;
+}
+
+int serve() {
+  std::string pendingLine;
+  char buffer[512];
+  while (true) {
+    struct pollfd readable = {inputFd, POLLIN, 0};
+    // A manual clock only moves on input, so block until the next line.
+    int ready = poll(&readable, 1, manualClock ? -1 : 0);
+    if (ready > 0) {
+      ssize_t count = read(inputFd, buffer, sizeof(buffer));
+      if (count > 0) {
+        acceptInput(buffer, (size_t)count, pendingLine);
+      } else if (count == 0 && inputFd == STDIN_FILENO) {
+        return 0;
+      }
+    }
+    runLoopOnce();
+    if (!manualClock && ready == 0) {
+      std::this_thread::sleep_for(std::chrono::microseconds(50));
+    }
+  }
+}
+
+double elapsedNs(const std::chrono::steady_clock::time_point &start) {
+  return (double)std::chrono::duration_cast<std::chrono::nanoseconds>(std::chrono::steady_clock::now() - start).count();
+}
+
+void queueLine(const char *line) {
+  serialInput.insert(serialInput.end(), line, line + strlen(line));
+  serialInput.push_back('\n');
+}
+
+int runBenchmark(unsigned long eventCount) {
+  // A synthetic song: chords of three strikes every 5 ms, each released 5 ms later.
+  manualClock = true;
+  discardOutput = true;
+  char line[64];
+  snprintf(line, sizeof(line), "BEGIN %lu", eventCount);
+  queueLine(line);
+  pollSerial();
+
+  double parseNs = 0.0;
+  double dispatchNs = 0.0;
+  double maxLoopNs = 0.0;
+  unsigned long loopCalls = 0;
+  unsigned long queuedEvents = 0;
+  bool playing = false;
+  while (queuedEvents < eventCount || playbackActive) {
+    while (queuedEvents < eventCount && bufferedEventCount < EVENT_BUFFER_CAPACITY) {
+      unsigned long chordIndex = queuedEvents / 6;
+      unsigned long slot = queuedEvents % 6;
+      unsigned int channel = (unsigned int)((chordIndex * 7 + slot % 3 * 4) % 61);
+      unsigned int dt = slot == 0 || slot == 3 ? 5 : 0;
+      unsigned int pwm = slot < 3 ? 3000 : 0;
+      snprintf(line, sizeof(line), "EVENT %u %u %u", dt, channel, pwm);
+      queueLine(line);
+      auto parseStart = std::chrono::steady_clock::now();
+      pollSerial();
+      parseNs += elapsedNs(parseStart);
+      queuedEvents++;
+    }
+    if (!playing) {
+      queueLine("PLAY");
+      pollSerial();
+      playing = true;
+    }
+    manualMicros += 250;
+    auto loopStart = std::chrono::steady_clock::now();
+    loop();
+    double loopNs = elapsedNs(loopStart);
+    dispatchNs += loopNs;
+    maxLoopNs = loopNs > maxLoopNs ? loopNs : maxLoopNs;
+    loopCalls++;
+  }
+
+  uint32_t pwmWrites = 0;
+  for (uint8_t boardIndex = 0; boardIndex < RUNTIME_PCA_BOARD_COUNT; boardIndex++) {
+    pwmWrites += pwmBoards[boardIndex].writeCount;
+  }
+  printf("events=%lu played=%lu pwm_writes=%lu\n", eventCount, (unsigned long)playedSongEventCount, (unsigned long)pwmWrites);
+  printf("parse_ns_per_event=%.1f\n", parseNs / (double)eventCount);
+  printf("loop_calls=%lu loop_ns_avg=%.1f loop_ns_max=%.1f\n", loopCalls, dispatchNs / (double)loopCalls, maxLoopNs);
+  printf("dispatch_ns_per_event=%.1f\n", dispatchNs / (double)eventCount);
+  return playedSongEventCount == eventCount ? 0 : 1;
+}
+
+}  // namespace host
+
+int main(int argc, char **argv) {
+  bool usePty = false;
+  unsigned long benchEvents = 0;
+  for (int index = 1; index < argc; index++) {
+    std::string argument = argv[index];
+    if (argument == "--manual-clock") {
+      host::manualClock = true;
+    } else if (argument == "--pty") {
+      usePty = true;
+    } else if (argument == "--trace-pwm") {
+      host::tracePwm = true;
+    } else if (argument == "--clock-start-ms" && index + 1 < argc) {
+      // Start near a millis()/micros() wrap to exercise the wrap-safe timing.
+      host::clockStartMicros = strtoull(argv[++index], nullptr, 10) * 1000ULL;
+    } else if (argument == "--absent-board" && index + 1 < argc) {
+      // Applied below, once the configured boards have been marked present.
+      index++;
+    } else if (argument == "--max-baud" && index + 1 < argc) {
+      host::maxCleanBaud = strtoul(argv[++index], nullptr, 10);
+    } else if (argument == "--bench" && index + 1 < argc) {
+      benchEvents = strtoul(argv[++index], nullptr, 10);
+    } else {
+      fprintf(
+          stderr,
+          "usage: %s [--manual-clock] [--pty] [--trace-pwm] [--clock-start-ms MS] "
+          "[--absent-board ADDRESS] [--max-baud RATE] [--bench EVENTS]\n",
+          argv[0]);
+      return 2;
+    }
+  }
+
+  for (uint8_t boardIndex = 0; boardIndex < RUNTIME_PCA_BOARD_COUNT; boardIndex++) {
+    Wire.devicePresent[RUNTIME_PCA9685_I2C_ADDRESSES[boardIndex] & 0x7F] = true;
+  }
+  for (int index = 1; index + 1 < argc; index++) {
+    if (std::string(argv[index]) == "--absent-board") {
+      Wire.devicePresent[strtoul(argv[index + 1], nullptr, 0) & 0x7F] = false;
+    }
+  }
+
+  if (usePty) {
+    host::inputFd = host::openPty();
+    host::outputFd = host::inputFd;
+  }
+
+  host::discardOutput = benchEvents > 0;
+  setup();
+  if (benchEvents > 0) {
+    return host::runBenchmark(benchEvents);
+  }
+  return host::serve();
+}
@@ -0,0 +1,48 @@
+#!/bin/sh
+# LATE DROP with NOTE envelopes on the manual clock.
+#
+# Three NOTEs on channel 5 at 0, 500 and 1150 ms, then a plain EVENT strike
+# and release at 1500/1600 ms. The loop stalls for 100 ms around the second
+# NOTE, so it is dropped; the third NOTE and the plain strike must still play.
+#
+#   make -C arduino/host && arduino/host/late_drop_notes.sh
+set -e
+host="$(dirname "$0")/build/musicbot_host"
+
+output=$(printf '%s\n' \
+  'BEGIN 5' \
+  'LATE 10 DROP' \
+  'NOTE 0 5 3000 1500 30 200' \
+  'NOTE 500 5 3000 1500 30 200' \
+  'NOTE 650 5 3000 1500 30 200' \
+  'EVENT 350 5 2800' \
+  'EVENT 100 5 0' \
+  'PLAY' \
+  '@ADVANCE 10' \
+  '@PWM 5' \
+  '@ADVANCE 480' \
+  '@ADVANCE 100 100000' \
+  '@PWM 5' \
+  '@ADVANCE 565' \
+  '@PWM 5' \
+  '@ADVANCE 350' \
+  '@PWM 5' \
+  '@ADVANCE 100' \
+  '@PWM 5' \
+  'STATUS' \
+  '@QUIT' \
+  | "$host" --manual-clock | tr -d '\r')
+
+expected='@PWM channel=5 value=3000
+@PWM channel=5 value=0
+@PWM channel=5 value=3000
+@PWM channel=5 value=2800
+@PWM channel=5 value=0'
+
+if [ "$(printf '%s\n' "$output" | grep '^@PWM')" != "$expected" ] ||
+   ! printf '%s\n' "$output" | grep -q 'dropped=1 softened=0'; then
+  printf '%s\n' "$output"
+  echo "late_drop_notes: FAILED" >&2
+  exit 1
+fi
+echo "late_drop_notes: ok"
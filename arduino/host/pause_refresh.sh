@@ -0,0 +1,46 @@
+#!/bin/sh
+# PAUSE/RESUME during a REFRESH hold on the manual clock.
+#
+# Channel 40 is held at 300 with REFRESH 40 200 and released at 2000 ms. The
+# song is paused for 300 ms: the hold must drop to 0 while paused, come back
+# on RESUME, survive the refresh passes after it, and end with the release.
+#
+#   make -C arduino/host && arduino/host/pause_refresh.sh
+set -e
+host="$(dirname "$0")/build/musicbot_host"
+
+output=$(printf '%s\n' \
+  'BEGIN 2' \
+  'REFRESH 40 200' \
+  'EVENT 0 40 300' \
+  'EVENT 2000 40 0' \
+  'PLAY' \
+  '@ADVANCE 500' \
+  '@PWM 40' \
+  'PAUSE' \
+  '@ADVANCE 300' \
+  '@PWM 40' \
+  'RESUME' \
+  '@PWM 40' \
+  '@ADVANCE 250' \
+  '@PWM 40' \
+  '@ADVANCE 600' \
+  '@PWM 40' \
+  '@ADVANCE 700' \
+  '@PWM 40' \
+  '@QUIT' \
+  | "$host" --manual-clock | tr -d '\r')
+
+expected='@PWM channel=40 value=300
+@PWM channel=40 value=0
+@PWM channel=40 value=300
+@PWM channel=40 value=300
+@PWM channel=40 value=300
+@PWM channel=40 value=0'
+
+if [ "$(printf '%s\n' "$output" | grep '^@PWM')" != "$expected" ]; then
+  printf '%s\n' "$output"
+  echo "pause_refresh: FAILED" >&2
+  exit 1
+fi
+echo "pause_refresh: ok"
@@ -16,15 +16,23 @@ module.
 """
 
 import argparse
+import array
+import bisect
 import copy
+import csv
 import filecmp
+import hashlib
+import heapq
 import json
 import math
 import os
 import re
 import shutil
+import statistics
+import threading
 import time
-from collections import defaultdict
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 
 import mido
@@ -68,6 +76,10 @@ ACTIVE_HEADER_DIR = ARDUINO_PROJECT_DIR / "generated"
 REPO_RUNTIME_SKETCH_PATH = ARDUINO_PROJECT_DIR / "MusicBotOfficial.ino"
 DOWNLOADS_DIR = Path.home() / "Downloads"
 STREAM_MANIFEST_PATH = METADATA_DIR / "last_streamed_song.json"
+STREAM_PERF_PATH = METADATA_DIR / "last_stream_perf.csv"
+CONVERSION_CACHE_DIR = METADATA_DIR / "conversion_cache"
+PLAYABILITY_INDEX_PATH = METADATA_DIR / "playability_index.json"
+SERIAL_BAUD_CACHE_PATH = METADATA_DIR / "serial_baud_rates.json"
 MIDI_FILE_SUFFIXES = {".mid", ".midi"}
 
 DEFAULT_USER_PREFERENCES = {
@@ -96,6 +108,74 @@ DIAGNOSTIC_SOFT_VELOCITY = 45
 DIAGNOSTIC_MEDIUM_VELOCITY = 85
 DIAGNOSTIC_HARD_VELOCITY = 120
 
+# Bump the format version whenever the pipeline output changes shape so stale
+# on-disk cache entries are ignored instead of streamed.
+CONVERSION_CACHE_FORMAT_VERSION = 2
+CONVERSION_CACHE_MEMORY_ENTRIES = 8
+CONVERSION_CACHE_DISK_ENTRIES = 64
+PLAYABILITY_INDEX_FORMAT_VERSION = 1
+PLAYABILITY_DENSITY_WINDOW_MS = 1000
+BEST_SHIFT_MIN_SEMITONES = -24
+BEST_SHIFT_MAX_SEMITONES = 24
+FIT_MODE_CHOICES = ("strict", "transpose", "best-shift", "phrase-octave", "cancel")
+TIMING_RESOLUTIONS = ("ms", "us")
+# First runtime protocol that accepts `BEGIN <count> US` microsecond deltas.
+MICROSECOND_PROTOCOL_VERSION = 6
+# First runtime protocol that re-asserts a channel's hold itself after `REFRESH <channel> <period_ms>`.
+RUNTIME_REFRESH_PROTOCOL_VERSION = 8
+# First runtime protocol with the PERF loop-timing command.
+PERF_PROTOCOL_VERSION = 9
+# First runtime protocol that drops or softens late strikes after `LATE <limit_ms> DROP|SOFT <percent>`.
+LATE_STRIKE_PROTOCOL_VERSION = 11
+LATE_STRIKE_ACTIONS = ("drop", "soften")
+# First runtime protocol that accepts END, so a thinned stream can finish early.
+STREAM_QOS_PROTOCOL_VERSION = 12
+# Stream QoS levels, from full fidelity to the most thinning.
+STREAM_QOS_LEVELS = ("full", "no_refresh", "no_inner_voices")
+STREAM_QOS_LOW_WATER_CYCLES = 3
+STREAM_QOS_CALM_CYCLES = 8
+# First runtime protocol that can switch to a faster serial rate with `BAUD <rate>`.
+BAUD_NEGOTIATION_PROTOCOL_VERSION = 13
+# The runtime falls back to its default rate this long after BAUD without a PING.
+RUNTIME_BAUD_CONFIRM_SECONDS = 1.5
+BAUD_VERIFY_ATTEMPTS = 3
+# The Uno's hardware serial receive buffer. Above the base rate, Python keeps
+# no more than this many bytes unread on the runtime (see write_paced()).
+RUNTIME_RX_BUFFER_BYTES = 64
+# The BAUD probe plays chords of silent releases while Python sends whole
+# receive buffers of PINGs, so the new rate is checked with the runtime busy.
+BAUD_PROBE_CHORDS = 4
+BAUD_PROBE_CHORD_SIZE = 8
+BAUD_PROBE_CHORD_GAP_MS = 20
+BAUD_PROBE_BURSTS = 3
+# PINGs timed at the fast rate to cost one paced slice's round trip.
+PACED_ROUND_TRIP_SAMPLES = 8
+# Longest the refill planner sleeps between STATUS polls during sparse passages.
+REFILL_MAX_IDLE_MS = 250
+REFILL_SHORTFALL_REPORT_LIMIT = 5
+DEFAULT_PERF_POLL_MS = 250
+PERF_SAMPLE_FIELDS = (
+    "elapsed_ms",
+    "window_ms",
+    "loops",
+    "loop_avg_us",
+    "loop_max_us",
+    "poll_avg_us",
+    "poll_max_us",
+    "playback_avg_us",
+    "playback_max_us",
+    "failsafe_avg_us",
+    "failsafe_max_us",
+    "pwm_writes",
+    "pwm_avg_us",
+    "pwm_max_us",
+    "dispatches",
+    "late_avg_us",
+    "late_max_us",
+)
+# NOTE envelope fields are unsigned 16-bit milliseconds on the runtime.
+NOTE_ENVELOPE_MAX_MS = 65535
+
 
 def clamp(value, minimum, maximum):
     return max(minimum, min(maximum, value))
@@ -502,6 +582,204 @@ def inspect_midi_file(midi_path):
     }
 
 
+def build_pitch_histogram(note_intervals):
+    histogram = [0] * 128
+    for interval in note_intervals:
+        note = int(interval["note"])
+        if 0 <= note <= 127:
+            histogram[note] += 1
+    return histogram
+
+
+def measure_peak_note_density(note_intervals, window_ms=PLAYABILITY_DENSITY_WINDOW_MS):
+    """Most note onsets that land inside any window_ms span, as notes/second."""
+    start_times = sorted(int(interval["start_ms"]) for interval in note_intervals)
+    peak_count = 0
+    window_start = 0
+    for window_end, start_ms in enumerate(start_times):
+        while start_ms - start_times[window_start] >= window_ms:
+            window_start += 1
+        peak_count = max(peak_count, window_end - window_start + 1)
+    return round(peak_count * 1000.0 / window_ms, 2)
+
+
+def compute_playability_profile(midi_path):
+    """Summarize one MIDI for the playability index; never raises."""
+    midi_path = Path(midi_path)
+    profile = {"path": str(midi_path), "size": None, "mtime_ns": None}
+    try:
+        # The file can vanish or turn unreadable between listing and indexing.
+        stat = midi_path.stat()
+        profile["size"] = stat.st_size
+        profile["mtime_ns"] = stat.st_mtime_ns
+        mid = MidiFile(str(midi_path))
+        tempo_info = scan_tempo_info(mid)
+        note_intervals, _interval_stats = extract_note_intervals(mid)
+    except Exception as error:
+        profile["error"] = f"{type(error).__name__}: {error}"
+        return profile
+
+    range_info = analyze_note_range(note_intervals)
+    profile.update(
+        {
+            "histogram": build_pitch_histogram(note_intervals),
+            "note_count": len(note_intervals),
+            "duration_ms": max((int(interval["end_ms"]) for interval in note_intervals), default=0),
+            "tempo_bpm": round(float(tempo_info["first_bpm"]), 2),
+            "peak_notes_per_second": measure_peak_note_density(note_intervals),
+            "range_label": range_info["range_label"],
+        }
+    )
+    return profile
+
+
+def load_playability_index():
+    if not PLAYABILITY_INDEX_PATH.exists():
+        return {}
+    try:
+        with PLAYABILITY_INDEX_PATH.open("r", encoding="utf-8") as handle:
+            payload = json.load(handle)
+    except (OSError, ValueError):
+        return {}
+    if payload.get("format_version") != PLAYABILITY_INDEX_FORMAT_VERSION:
+        return {}
+    return payload.get("profiles", {})
+
+
+def save_playability_index(profiles):
+    PLAYABILITY_INDEX_PATH.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = PLAYABILITY_INDEX_PATH.with_suffix(".tmp")
+    temp_path.write_text(
+        json.dumps({"format_version": PLAYABILITY_INDEX_FORMAT_VERSION, "profiles": profiles}),
+        encoding="utf-8",
+    )
+    temp_path.replace(PLAYABILITY_INDEX_PATH)
+
+
+def is_playability_profile_current(profile, midi_path):
+    try:
+        stat = Path(midi_path).stat()
+    except OSError:
+        return False
+    return profile.get("size") == stat.st_size and profile.get("mtime_ns") == stat.st_mtime_ns
+
+
+def refresh_playability_index(midi_paths, jobs=None):
+    """Return profiles for midi_paths, computing only new or changed files.
+
+    Profiles are keyed by path and reused while the file's size and mtime are
+    unchanged, so only new downloads pay for a MIDI parse. Stale work is
+    spread across a process pool.
+    """
+    profiles = load_playability_index()
+    profiles = {path: profile for path, profile in profiles.items() if Path(path).exists()}
+    stale_paths = [
+        str(midi_path)
+        for midi_path in midi_paths
+        if not is_playability_profile_current(profiles.get(str(midi_path), {}), midi_path)
+    ]
+
+    if stale_paths:
+        jobs = max(1, min(len(stale_paths), int(jobs or os.cpu_count() or 1)))
+        if jobs == 1:
+            computed_profiles = [compute_playability_profile(path) for path in stale_paths]
+        else:
+            with ProcessPoolExecutor(max_workers=jobs) as executor:
+                computed_profiles = list(executor.map(compute_playability_profile, stale_paths, chunksize=4))
+        for profile in computed_profiles:
+            profiles[profile["path"]] = profile
+        save_playability_index(profiles)
+
+    return {str(midi_path): profiles[str(midi_path)] for midi_path in midi_paths if str(midi_path) in profiles}
+
+
+def build_effective_mapping(config, active_channel_count=None, preferred_range=None):
+    """Mapping for the given hardware count and range override, without prompts."""
+    mapping_config, _channel_sequence = apply_active_channel_limit(
+        config["mapping"],
+        config["pca9685"],
+        active_channel_count=active_channel_count,
+    )
+    if preferred_range not in (None, ""):
+        mapping_config, _layout_summary, _overridden = prompt_for_playable_range(mapping_config, preset=preferred_range)
+    return mapping_config
+
+
+def build_playable_note_mask(mapping_config):
+    return [map_note_to_channel(note, mapping_config) is not None for note in range(128)]
+
+
+def build_octave_transpose_note_mask(mapping_config):
+    return [find_octave_transpose_target(note, mapping_config) is not None for note in range(128)]
+
+
+def count_histogram_coverage(histogram, note_mask):
+    return sum(count for count, playable in zip(histogram, note_mask) if playable)
+
+
+def score_playability_profile(profile, strict_mask, transpose_mask):
+    """Strict and octave-fold coverage for a profile, straight from its histogram."""
+    histogram = profile.get("histogram")
+    note_count = int(profile.get("note_count", 0))
+    if not histogram or note_count <= 0:
+        return {"strict_count": 0, "transpose_count": 0, "strict_ratio": 0.0, "transpose_ratio": 0.0}
+
+    strict_count = count_histogram_coverage(histogram, strict_mask)
+    transpose_count = count_histogram_coverage(histogram, transpose_mask)
+    return {
+        "strict_count": strict_count,
+        "transpose_count": transpose_count,
+        "strict_ratio": strict_count / note_count,
+        "transpose_ratio": transpose_count / note_count,
+    }
+
+
+def score_semitone_shifts(histogram, note_mask, min_shift=BEST_SHIFT_MIN_SEMITONES, max_shift=BEST_SHIFT_MAX_SEMITONES):
+    """Cross-correlate the pitch histogram with the playable-note mask.
+
+    Returns {shift: playable note events} for every whole-song shift in the
+    range, so choosing a transposition costs 128 x 49 lookups instead of one
+    scheduling pass per candidate.
+    """
+    occupied_notes = [(note, count) for note, count in enumerate(histogram) if count]
+    scores = {}
+    for shift in range(int(min_shift), int(max_shift) + 1):
+        scores[shift] = sum(
+            count for note, count in occupied_notes if 0 <= note + shift <= 127 and note_mask[note + shift]
+        )
+    return scores
+
+
+def choose_best_semitone_shift(shift_scores):
+    # Most playable notes wins; ties go to the smallest move, then downward,
+    # so an already-fitting song is never shifted for no gain.
+    return min(shift_scores, key=lambda shift: (-shift_scores[shift], abs(shift), shift))
+
+
+def shift_note_intervals(note_intervals, semitone_shift):
+    shifted = []
+    for interval in note_intervals:
+        shifted_note = int(interval["note"]) + int(semitone_shift)
+        if not 0 <= shifted_note <= 127:
+            continue
+        shifted.append(
+            {
+                **interval,
+                "source_note": interval.get("source_note", interval["note"]),
+                "note": shifted_note,
+            }
+        )
+    return shifted
+
+
+def describe_semitone_shift(semitone_shift):
+    if semitone_shift == 0:
+        return "no shift (original key already fits best)"
+    direction = "up" if semitone_shift > 0 else "down"
+    noun = "semitone" if abs(semitone_shift) == 1 else "semitones"
+    return f"whole song shifted {direction} {abs(semitone_shift)} {noun}"
+
+
 def choose_input_midi(args, user_preferences):
     # Selection priority is deliberate:
     # direct path > named project song > interactive library > newest download.
@@ -681,6 +959,28 @@ def prompt_for_tempo_override(original_bpm: float, preset=None):
 def scale_intervals(note_intervals, scale: float):
     scaled = []
     for interval in note_intervals:
+        if "start_offset_us" in interval:
+            # Microsecond timelines scale the exact time and keep the remainder.
+            start_ms, start_offset_us = divmod(
+                max(0, int(round((interval["start_ms"] * 1000 + interval["start_offset_us"]) * scale))),
+                1000,
+            )
+            end_ms, end_offset_us = divmod(
+                int(round((interval["end_ms"] * 1000 + interval["end_offset_us"]) * scale)),
+                1000,
+            )
+            if end_ms <= start_ms:
+                end_ms, end_offset_us = start_ms + 1, 0
+            scaled.append(
+                {
+                    **interval,
+                    "start_ms": start_ms,
+                    "end_ms": end_ms,
+                    "start_offset_us": start_offset_us,
+                    "end_offset_us": end_offset_us,
+                }
+            )
+            continue
         start_ms = max(0, int(round(interval["start_ms"] * scale)))
         end_ms = max(start_ms + 1, int(round(interval["end_ms"] * scale)))
         scaled.append(
@@ -711,6 +1011,13 @@ def scale_diagnostic_step_plan(step_plan, scale: float):
 def scale_pedal_events(pedal_events, scale: float):
     scaled = []
     for event in pedal_events:
+        if "time_offset_us" in event:
+            time_ms, time_offset_us = divmod(
+                max(0, int(round((event["time_ms"] * 1000 + event["time_offset_us"]) * scale))),
+                1000,
+            )
+            scaled.append({**event, "time_ms": time_ms, "time_offset_us": time_offset_us})
+            continue
         scaled.append(
             {
                 **event,
@@ -974,17 +1281,24 @@ def apply_performance_feel(note_intervals, pedal_events, config, beat_ms):
     }
 
 
-def extract_note_intervals(mid: MidiFile):
+def extract_note_intervals(mid: MidiFile, time_resolution="ms"):
     """Return note intervals in milliseconds from the merged MIDI timeline.
 
     A note interval is the musical note-level object we use before hardware
     scheduling: pitch, velocity, start time, end time, and source MIDI channel.
     Percussion channel 9 is skipped because MIDI channel 10 is conventionally
     drums, not pitched piano notes.
+
+    With `time_resolution="us"` the clock is kept exactly instead of rounding
+    every MIDI delta to a millisecond, and each interval also carries the
+    sub-millisecond remainders `start_offset_us` / `end_offset_us`.
     """
     merged = mido.merge_tracks(mid.tracks)
     tempo = DEFAULT_TEMPO_US_PER_BEAT
     current_ms = 0
+    microsecond_timeline = time_resolution == "us"
+    elapsed_seconds = 0.0
+    current_offset_us = 0
 
     active_notes = defaultdict(list)
     note_intervals = []
@@ -994,7 +1308,11 @@ def extract_note_intervals(mid: MidiFile):
     for msg in merged:
         if msg.time:
             delta_seconds = mido.tick2second(msg.time, mid.ticks_per_beat, tempo)
-            current_ms += int(round(delta_seconds * 1000.0))
+            if microsecond_timeline:
+                elapsed_seconds += delta_seconds
+                current_ms, current_offset_us = divmod(int(round(elapsed_seconds * 1000000.0)), 1000)
+            else:
+                current_ms += int(round(delta_seconds * 1000.0))
 
         if msg.type == "set_tempo":
             tempo = msg.tempo
@@ -1016,7 +1334,12 @@ def extract_note_intervals(mid: MidiFile):
 
         if is_note_on:
             active_notes[note_key].append(
-                {"start_ms": current_ms, "velocity": velocity, "source_channel": channel}
+                {
+                    "start_ms": current_ms,
+                    "start_offset_us": current_offset_us,
+                    "velocity": velocity,
+                    "source_channel": channel,
+                }
             )
             continue
 
@@ -1033,6 +1356,11 @@ def extract_note_intervals(mid: MidiFile):
                         "source_channel": pending_note["source_channel"],
                     }
                 )
+                if microsecond_timeline:
+                    note_intervals[-1]["start_offset_us"] = pending_note["start_offset_us"]
+                    note_intervals[-1]["end_offset_us"] = (
+                        current_offset_us if current_ms > pending_note["start_ms"] else 0
+                    )
             else:
                 unmatched_note_offs += 1
 
@@ -1049,6 +1377,9 @@ def extract_note_intervals(mid: MidiFile):
                     "source_channel": pending_note["source_channel"],
                 }
             )
+            if microsecond_timeline:
+                note_intervals[-1]["start_offset_us"] = pending_note["start_offset_us"]
+                note_intervals[-1]["end_offset_us"] = current_offset_us if current_ms > pending_note["start_ms"] else 0
             dangling_note_ons += 1
 
     note_intervals.sort(key=lambda item: (item["start_ms"], item["note"], item["end_ms"]))
@@ -1059,18 +1390,29 @@ def extract_note_intervals(mid: MidiFile):
     }
 
 
-def extract_sustain_pedal_events(mid: MidiFile):
-    """Return MIDI CC64 sustain pedal state changes in milliseconds."""
+def extract_sustain_pedal_events(mid: MidiFile, time_resolution="ms"):
+    """Return MIDI CC64 sustain pedal state changes in milliseconds.
+
+    `time_resolution="us"` keeps the exact clock and adds `time_offset_us`, as
+    in `extract_note_intervals`.
+    """
     merged = mido.merge_tracks(mid.tracks)
     tempo = DEFAULT_TEMPO_US_PER_BEAT
     current_ms = 0
+    microsecond_timeline = time_resolution == "us"
+    elapsed_seconds = 0.0
+    current_offset_us = 0
     events = []
     pedal_down = False
 
     for msg in merged:
         if msg.time:
             delta_seconds = mido.tick2second(msg.time, mid.ticks_per_beat, tempo)
-            current_ms += int(round(delta_seconds * 1000.0))
+            if microsecond_timeline:
+                elapsed_seconds += delta_seconds
+                current_ms, current_offset_us = divmod(int(round(elapsed_seconds * 1000000.0)), 1000)
+            else:
+                current_ms += int(round(delta_seconds * 1000.0))
 
         if msg.type == "set_tempo":
             tempo = msg.tempo
@@ -1092,6 +1434,8 @@ def extract_sustain_pedal_events(mid: MidiFile):
                 "source_channel": int(getattr(msg, "channel", -1)),
             }
         )
+        if microsecond_timeline:
+            events[-1]["time_offset_us"] = current_offset_us
 
     return events
 
@@ -1628,15 +1972,196 @@ def get_octave_transpose_candidate_notes(note, mapping_config):
     )
 
 
-def prompt_for_fit_mode(note_intervals, mapping_config, preset=None):
+def get_fit_config(config):
+    defaults = {
+        "phrase_octave": {
+            "window_beats": 8,
+            "max_octave_shift": 3,
+            "register_jump_penalty": 3.0,
+            "offset_penalty": 0.1,
+        },
+        "octave_assignment": {
+            "beam_width": 16,
+            "expansion_budget": 200000,
+        },
+    }
+    loaded = copy.deepcopy(config.get("fit", {}))
+    merged = copy.deepcopy(defaults)
+    for key, value in loaded.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key].update(value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def build_phrase_fit_options(config, source_bpm):
+    phrase_config = get_fit_config(config)["phrase_octave"]
+    beat_ms = 60000.0 / max(1.0, float(source_bpm))
+    return {
+        "window_ms": max(1, int(round(float(phrase_config["window_beats"]) * beat_ms))),
+        "window_beats": float(phrase_config["window_beats"]),
+        "max_octave_shift": max(0, int(phrase_config["max_octave_shift"])),
+        "register_jump_penalty": float(phrase_config["register_jump_penalty"]),
+        "offset_penalty": float(phrase_config["offset_penalty"]),
+    }
+
+
+def plan_phrase_octave_offsets(note_intervals, mapping_config, phrase_fit_options):
+    """Choose one octave offset per time window with a Viterbi-style DP.
+
+    Each window scores how many of its notes land on playable keys at every
+    candidate offset. Moving between offsets costs register_jump_penalty note
+    events per octave jumped, and every octave away from the written register
+    costs offset_penalty, so the melody only changes register when that buys
+    enough coverage. Work is O(notes + windows) for a fixed offset range.
+    """
+    window_ms = int(phrase_fit_options["window_ms"])
+    max_octave_shift = int(phrase_fit_options["max_octave_shift"])
+    jump_penalty = float(phrase_fit_options["register_jump_penalty"])
+    offset_penalty = float(phrase_fit_options["offset_penalty"])
+    offsets = [12 * octave for octave in range(-max_octave_shift, max_octave_shift + 1)]
+    playable_note_mask = build_playable_note_mask(mapping_config)
+
+    if not note_intervals:
+        return {"window_ms": window_ms, "window_offsets": [], "playable_count": 0, "register_changes": 0}
+
+    window_count = max(int(interval["start_ms"]) for interval in note_intervals) // window_ms + 1
+    coverage = [[0] * len(offsets) for _ in range(window_count)]
+    for interval in note_intervals:
+        window_coverage = coverage[int(interval["start_ms"]) // window_ms]
+        note = int(interval["note"])
+        for offset_index, offset in enumerate(offsets):
+            shifted_note = note + offset
+            if 0 <= shifted_note <= 127 and playable_note_mask[shifted_note]:
+                window_coverage[offset_index] += 1
+
+    scores = [coverage[0][index] - offset_penalty * abs(offset) / 12 for index, offset in enumerate(offsets)]
+    back_pointers = []
+    for window_index in range(1, window_count):
+        next_scores = []
+        pointers = []
+        for index, offset in enumerate(offsets):
+            # Ties keep the previous register, then prefer the written one.
+            best_previous = max(
+                range(len(offsets)),
+                key=lambda previous: (
+                    scores[previous] - jump_penalty * abs(offset - offsets[previous]) / 12,
+                    previous == index,
+                    -abs(offsets[previous]),
+                ),
+            )
+            next_scores.append(
+                scores[best_previous]
+                - jump_penalty * abs(offset - offsets[best_previous]) / 12
+                + coverage[window_index][index]
+                - offset_penalty * abs(offset) / 12
+            )
+            pointers.append(best_previous)
+        scores = next_scores
+        back_pointers.append(pointers)
+
+    chosen_index = max(range(len(offsets)), key=lambda index: (scores[index], -abs(offsets[index])))
+    chosen_indexes = [chosen_index]
+    for pointers in reversed(back_pointers):
+        chosen_index = pointers[chosen_index]
+        chosen_indexes.append(chosen_index)
+    chosen_indexes.reverse()
+
+    window_offsets = [offsets[index] for index in chosen_indexes]
+    return {
+        "window_ms": window_ms,
+        "window_offsets": window_offsets,
+        "playable_count": sum(coverage[window][index] for window, index in enumerate(chosen_indexes)),
+        "register_changes": sum(
+            1 for previous, current in zip(window_offsets, window_offsets[1:]) if previous != current
+        ),
+    }
+
+
+def apply_phrase_octave_offsets(note_intervals, phrase_plan):
+    window_ms = int(phrase_plan["window_ms"])
+    window_offsets = phrase_plan["window_offsets"]
+    shifted = []
+    shift_counts = defaultdict(int)
+    for interval in note_intervals:
+        window_index = min(int(interval["start_ms"]) // window_ms, len(window_offsets) - 1)
+        offset = int(window_offsets[window_index])
+        shifted_note = int(interval["note"]) + offset
+        if not 0 <= shifted_note <= 127:
+            continue
+        if offset != 0:
+            shift_counts[offset] += 1
+        shifted.append(
+            {
+                **interval,
+                "source_note": interval.get("source_note", interval["note"]),
+                "note": shifted_note,
+            }
+        )
+
+    return shifted, {
+        "remapped_note_events": sum(shift_counts.values()),
+        "shift_counts": dict(sorted(shift_counts.items())),
+        "shift_summary": summarize_octave_shift_counts(shift_counts),
+        "skipped_for_timing": 0,
+    }
+
+
+def apply_fit_selection(note_intervals, fit_selection):
+    """Pitch changes decided before scheduling for the chosen fit mode.
+
+    Transpose mode returns the intervals unchanged because its octave folding
+    happens during scheduling; its stats are filled in afterwards.
+    """
+    fit_intervals = note_intervals
+    transpose_semitones = 0
+    transpose_strategy = "per_note_octave_fold"
+    transpose_stats = None
+    if fit_selection["mode"] == "strict":
+        transpose_stats = {
+            "remapped_note_events": 0,
+            "shift_counts": {},
+            "shift_summary": "no octave remapping was applied",
+            "skipped_for_timing": 0,
+        }
+    elif fit_selection["mode"] == "best-shift":
+        transpose_semitones = int(fit_selection["best_shift_semitones"])
+        transpose_strategy = "global_semitone_shift"
+        fit_intervals = shift_note_intervals(note_intervals, transpose_semitones)
+        shifted_count = len(fit_intervals) if transpose_semitones else 0
+        transpose_stats = {
+            "remapped_note_events": shifted_count,
+            "shift_counts": {transpose_semitones: shifted_count} if shifted_count else {},
+            "shift_summary": describe_semitone_shift(transpose_semitones),
+            "skipped_for_timing": 0,
+        }
+    elif fit_selection["mode"] == "phrase-octave":
+        transpose_strategy = "phrase_window_octave_dp"
+        fit_intervals, transpose_stats = apply_phrase_octave_offsets(note_intervals, fit_selection["phrase_plan"])
+    return fit_intervals, transpose_semitones, transpose_strategy, transpose_stats
+
+
+def prompt_for_fit_mode(note_intervals, mapping_config, preset=None, phrase_fit_options=None):
     range_info = analyze_note_range(note_intervals)
     total_note_count = len(note_intervals)
-    strict_playable_count = count_playable_intervals(note_intervals, mapping_config, 0)
-    transposed_playable_count = count_octave_transposed_playable_intervals(note_intervals, mapping_config)
+    histogram = build_pitch_histogram(note_intervals)
+    playable_note_mask = build_playable_note_mask(mapping_config)
+    strict_playable_count = count_histogram_coverage(histogram, playable_note_mask)
+    transposed_playable_count = count_histogram_coverage(histogram, build_octave_transpose_note_mask(mapping_config))
+    shift_scores = score_semitone_shifts(histogram, playable_note_mask)
+    best_shift = choose_best_semitone_shift(shift_scores)
+    best_shift_playable_count = shift_scores[best_shift]
+    if phrase_fit_options is None:
+        phrase_fit_options = build_phrase_fit_options({}, 60000000 / DEFAULT_TEMPO_US_PER_BEAT)
+    phrase_plan = plan_phrase_octave_offsets(note_intervals, mapping_config, phrase_fit_options)
+    phrase_playable_count = phrase_plan["playable_count"]
     layout_summary = summarize_playable_layout(mapping_config)
     strict_recognizability = describe_recognizability(strict_playable_count, total_note_count)
     transpose_recognizability = describe_recognizability(transposed_playable_count, total_note_count)
-    interactive = preset not in {"strict", "transpose", "cancel"}
+    best_shift_recognizability = describe_recognizability(best_shift_playable_count, total_note_count)
+    phrase_recognizability = describe_recognizability(phrase_playable_count, total_note_count)
+    interactive = preset not in FIT_MODE_CHOICES
 
     if interactive:
         print("\nMIDI pitch scan:")
@@ -1653,24 +2178,42 @@ def prompt_for_fit_mode(note_intervals, mapping_config, preset=None):
             "  Keeps already-playable notes where they are, and folds each out-of-range note into the nearest playable octave when that note exists in your layout. "
             f"Result: {transpose_recognizability}. Notes that do not fit cleanly without disturbing timing may still be skipped during scheduling."
         )
+        print(
+            f"Best shift ({best_shift:+d} semitones): {format_playable_count(best_shift_playable_count, total_note_count)}"
+        )
+        print(
+            "  Transposes the whole song by the one semitone shift between -24 and +24 that fits the most notes, "
+            f"so melodies keep their shape. Result: {best_shift_recognizability}."
+        )
+        print(f"Phrase octave fit: {format_playable_count(phrase_playable_count, total_note_count)}")
+        print(
+            f"  Picks one octave offset per {phrase_fit_options['window_beats']:g}-beat window, changing register "
+            f"{phrase_plan['register_changes']} time(s) only where it buys real coverage. Result: {phrase_recognizability}."
+        )
         print("Cancel: stop here without converting or sending anything.")
 
     recommended_mode = "transpose" if transposed_playable_count > strict_playable_count else "strict"
-    if preset in {"strict", "transpose", "cancel"}:
+    if preset in FIT_MODE_CHOICES:
         choice = preset
         if choice == "strict" and strict_playable_count == 0:
             raise ValueError("Strict playback would result in 0 playable notes with the current layout.")
         if choice == "transpose" and transposed_playable_count == 0:
             raise ValueError("Transpose playback would still result in 0 playable notes with the current layout.")
+        if choice == "best-shift" and best_shift_playable_count == 0:
+            raise ValueError("No semitone shift between -24 and +24 fits any notes into the current layout.")
+        if choice == "phrase-octave" and phrase_playable_count == 0:
+            raise ValueError("Phrase octave fitting would still result in 0 playable notes with the current layout.")
     else:
         choice = None
     while True:
         if choice is None:
-            choice = input(f"Choose strict, transpose, or cancel [{recommended_mode}]: ").strip().lower()
+            choice = input(
+                f"Choose strict, transpose, best-shift, phrase-octave, or cancel [{recommended_mode}]: "
+            ).strip().lower()
         if not choice:
             choice = recommended_mode
-        if choice not in {"strict", "transpose", "cancel"}:
-            print("Enter strict, transpose, or cancel.")
+        if choice not in FIT_MODE_CHOICES:
+            print("Enter strict, transpose, best-shift, phrase-octave, or cancel.")
             choice = None
             continue
         if choice == "strict" and strict_playable_count == 0:
@@ -1681,6 +2224,14 @@ def prompt_for_fit_mode(note_intervals, mapping_config, preset=None):
             print("Transpose would still play 0 notes with the current layout. Choose another range or cancel.")
             choice = None
             continue
+        if choice == "best-shift" and best_shift_playable_count == 0:
+            print("No semitone shift fits any notes into the current layout. Choose another range or cancel.")
+            choice = None
+            continue
+        if choice == "phrase-octave" and phrase_playable_count == 0:
+            print("Phrase octave fitting would still play 0 notes with the current layout. Choose another range or cancel.")
+            choice = None
+            continue
         break
 
     return {
@@ -1693,6 +2244,15 @@ def prompt_for_fit_mode(note_intervals, mapping_config, preset=None):
         "transpose_playable_count": transposed_playable_count,
         "transpose_summary": format_playable_count(transposed_playable_count, total_note_count),
         "transpose_recognizability": transpose_recognizability,
+        "best_shift_semitones": best_shift,
+        "best_shift_playable_count": best_shift_playable_count,
+        "best_shift_summary": format_playable_count(best_shift_playable_count, total_note_count),
+        "best_shift_recognizability": best_shift_recognizability,
+        "phrase_plan": phrase_plan,
+        "phrase_window_beats": phrase_fit_options["window_beats"],
+        "phrase_playable_count": phrase_playable_count,
+        "phrase_summary": format_playable_count(phrase_playable_count, total_note_count),
+        "phrase_recognizability": phrase_recognizability,
     }
 
 
@@ -1791,6 +2351,22 @@ def pedal_motion_ms(pedal_config, key, reaction_key=None):
     return max(0, int(round(float(raw_value))))
 
 
+def get_pedal_latency_ms(pedal_config, direction):
+    """Lead time for the pedal servo's `down` or `up` travel.
+
+    `down_latency_ms` / `up_latency_ms` win; otherwise, with
+    `use_reaction_latency`, the measured travel medians from
+    `reaction_characterization` are used; otherwise the shared `lead_ms`.
+    """
+    raw_value = pedal_config.get(f"{direction}_latency_ms")
+    if raw_value is None and pedal_config.get("use_reaction_latency", False):
+        reaction = pedal_config.get("reaction_characterization") or {}
+        raw_value = reaction.get(f"{direction}_travel_median_ms")
+    if raw_value is None:
+        return int(pedal_config.get("lead_ms", 0))
+    return max(0, int(round(float(raw_value))))
+
+
 def normalize_pedal_retrigger_events(pedal_events, retrigger_release_ms=0):
     if retrigger_release_ms <= 0:
         return list(pedal_events)
@@ -1911,7 +2487,8 @@ def build_pedal_timeline_events(pedal_events, config):
     hold_pwm = int(pedal_config.get("hold_pwm", down_pwm))
     hold_refresh_ms = max(0, int(pedal_config.get("hold_refresh_ms", 0)))
     up_pwm = int(pedal_config.get("up_pwm", 0))
-    lead_ms = int(pedal_config.get("lead_ms", 0))
+    down_latency_ms = get_pedal_latency_ms(pedal_config, "down")
+    up_latency_ms = get_pedal_latency_ms(pedal_config, "up")
     minimum_down_ms = pedal_motion_ms(
         pedal_config,
         "minimum_down_ms",
@@ -1922,6 +2499,7 @@ def build_pedal_timeline_events(pedal_events, config):
     failsafe_release_ms = int(pedal_config.get("failsafe_release_ms", 1000))
     timeline = []
     metadata = []
+    previous_up_time_ms = 0
 
     for interval in build_pedal_intervals(
         pedal_events,
@@ -1934,8 +2512,16 @@ def build_pedal_timeline_events(pedal_events, config):
         up_event = interval.get("up_event")
         down_source_time_ms = int(down_event["time_ms"])
         up_source_time_ms = int(up_event["time_ms"]) if up_event is not None else interval["release_time_ms"]
-        down_scheduled_time_ms = max(0, int(interval["down_time_ms"]) - lead_ms)
-        up_scheduled_time_ms = max(0, int(interval["release_time_ms"]) - lead_ms)
+        # Different down/up leads must not let a press overtake the previous lift.
+        down_scheduled_time_ms = max(0, previous_up_time_ms, int(interval["down_time_ms"]) - down_latency_ms)
+        up_scheduled_time_ms = max(down_scheduled_time_ms, int(interval["release_time_ms"]) - up_latency_ms)
+        previous_up_time_ms = up_scheduled_time_ms
+        down_offset_us = 0
+        if down_scheduled_time_ms == int(down_event["time_ms"]) - down_latency_ms:
+            down_offset_us = int(down_event.get("time_offset_us", 0))
+        up_offset_us = 0
+        if up_event is not None and up_scheduled_time_ms == int(up_event["time_ms"]) - up_latency_ms:
+            up_offset_us = int(up_event.get("time_offset_us", 0))
         hold_scheduled_time_ms = min(up_scheduled_time_ms, down_scheduled_time_ms + max(0, down_strike_ms))
 
         timeline.append((down_scheduled_time_ms, channel, down_pwm))
@@ -1949,6 +2535,9 @@ def build_pedal_timeline_events(pedal_events, config):
                 "channel": channel,
                 "pwm": down_pwm,
                 "source_channel": down_event.get("source_channel"),
+                "latency_ms": down_latency_ms,
+                "latency_shift_ms": int(interval["down_time_ms"]) - down_scheduled_time_ms,
+                "offset_us": down_offset_us,
             }
         )
         if hold_scheduled_time_ms < up_scheduled_time_ms and hold_pwm != down_pwm:
@@ -2005,12 +2594,96 @@ def build_pedal_timeline_events(pedal_events, config):
                 "minimum_hold_extended": bool(interval.get("minimum_hold_extended")),
                 "merged_short_gap": bool(interval.get("merged_short_gap")),
                 "failsafe_release": up_event is None,
+                "latency_ms": up_latency_ms,
+                "latency_shift_ms": int(interval["release_time_ms"]) - up_scheduled_time_ms,
+                "offset_us": up_offset_us,
             }
         )
 
     return timeline, metadata
 
 
+def get_channel_timing_limits(channel, config):
+    channel_actuation = resolve_channel_actuation(channel, config)
+    return (
+        int(channel_actuation["release_delay_ms"]),
+        int(channel_actuation["minimum_rearm_gap_ms"]),
+        int(channel_actuation["retrigger_gap_ms"]),
+        max(0, int(channel_actuation.get("minimum_repeat_period_ms", 0))),
+    )
+
+
+def schedule_channel_timing(channel_intervals, timing_limits):
+    """Core of schedule_notes for one solenoid, on plain (start_ms, end_ms) pairs.
+
+    `channel_intervals` must already be in playing order. Returns one
+    `[start_ms, end_ms]` per input interval plus the forced-retrigger and
+    delayed-note counts. A note still held when the next one arrives is cut
+    short and the next note waits out the retrigger gap; otherwise it waits
+    out the release delay and rearm gap, and never repeats faster than the
+    channel's minimum repeat period.
+    """
+    release_delay_ms, minimum_rearm_gap_ms, retrigger_gap_ms, minimum_repeat_period_ms = timing_limits
+    timings = []
+    forced_retriggers = 0
+    delayed_notes = 0
+    active = None
+    last_off_ms = -1_000_000
+    last_start_ms = -1_000_000
+
+    for requested_start_ms, requested_end_ms in channel_intervals:
+        gap_ms = minimum_rearm_gap_ms
+        if active is not None:
+            if requested_start_ms < active[1]:
+                active[1] = max(active[0] + 1, requested_start_ms)
+                gap_ms = retrigger_gap_ms
+                forced_retriggers += 1
+            last_off_ms = active[1] + release_delay_ms
+            active = None
+
+        start_ms = max(requested_start_ms, last_off_ms + gap_ms)
+        if minimum_repeat_period_ms > 0:
+            start_ms = max(start_ms, last_start_ms + minimum_repeat_period_ms)
+        if start_ms > requested_start_ms:
+            delayed_notes += 1
+
+        active = [start_ms, max(start_ms + 1, start_ms + max(1, requested_end_ms - requested_start_ms))]
+        timings.append(active)
+        last_start_ms = start_ms
+
+    return timings, forced_retriggers, delayed_notes
+
+
+def schedule_channel_notes(channel, channel_intervals, config):
+    channel_intervals = sorted(channel_intervals, key=lambda item: (item["start_ms"], item["note"], item["end_ms"]))
+    timings, forced_retriggers, delayed_notes = schedule_channel_timing(
+        [(interval["start_ms"], interval["end_ms"]) for interval in channel_intervals],
+        get_channel_timing_limits(channel, config),
+    )
+    scheduled_notes = [
+        {
+            **interval,
+            "channel": channel,
+            "original_start_ms": interval["start_ms"],
+            "original_end_ms": interval["end_ms"],
+            "original_duration_ms": max(1, interval["end_ms"] - interval["start_ms"]),
+            "start_ms": start_ms,
+            "end_ms": end_ms,
+        }
+        for interval, (start_ms, end_ms) in zip(channel_intervals, timings)
+    ]
+    return scheduled_notes, forced_retriggers, delayed_notes
+
+
+def group_intervals_by_channel(note_intervals, mapping_config):
+    intervals_by_channel = defaultdict(list)
+    for interval in note_intervals:
+        channel = map_note_to_channel(interval["note"], mapping_config)
+        if channel is not None:
+            intervals_by_channel[int(channel)].append({**interval, "channel": channel})
+    return intervals_by_channel
+
+
 def schedule_notes(note_intervals, config):
     """Map notes to channels and prevent impossible overlap on each solenoid.
 
@@ -2037,57 +2710,18 @@ def schedule_notes(note_intervals, config):
     scheduled_notes = []
     forced_retriggers = 0
     delayed_notes = 0
+    channel_timing = {}
 
     for channel in sorted(notes_by_channel):
-        channel_actuation = resolve_channel_actuation(channel, config)
-        release_delay_ms = int(channel_actuation["release_delay_ms"])
-        minimum_rearm_gap_ms = int(channel_actuation["minimum_rearm_gap_ms"])
-        retrigger_gap_ms = int(channel_actuation["retrigger_gap_ms"])
-        minimum_repeat_period_ms = max(0, int(channel_actuation.get("minimum_repeat_period_ms", 0)))
-        active_note = None
-        last_off_ms = -1_000_000
-        last_start_ms = -1_000_000
-
-        for interval in sorted(
+        channel_notes, channel_retriggers, channel_delays = schedule_channel_notes(
+            channel,
             notes_by_channel[channel],
-            key=lambda item: (item["start_ms"], item["note"], item["end_ms"]),
-        ):
-            if active_note and interval["start_ms"] >= active_note["end_ms"]:
-                scheduled_notes.append(active_note)
-                last_off_ms = active_note["end_ms"] + release_delay_ms
-                active_note = None
-
-            gap_ms = minimum_rearm_gap_ms
-            if active_note and interval["start_ms"] < active_note["end_ms"]:
-                active_note["end_ms"] = max(active_note["start_ms"] + 1, interval["start_ms"])
-                scheduled_notes.append(active_note)
-                last_off_ms = active_note["end_ms"] + release_delay_ms
-                active_note = None
-                gap_ms = retrigger_gap_ms
-                forced_retriggers += 1
-
-            start_ms = max(interval["start_ms"], last_off_ms + gap_ms)
-            if minimum_repeat_period_ms > 0:
-                start_ms = max(start_ms, last_start_ms + minimum_repeat_period_ms)
-            if start_ms > interval["start_ms"]:
-                delayed_notes += 1
-
-            original_duration_ms = max(1, interval["end_ms"] - interval["start_ms"])
-            end_ms = max(start_ms + 1, start_ms + original_duration_ms)
-            last_start_ms = start_ms
-
-            active_note = {
-                **interval,
-                "channel": channel,
-                "original_start_ms": interval["start_ms"],
-                "original_end_ms": interval["end_ms"],
-                "original_duration_ms": original_duration_ms,
-                "start_ms": start_ms,
-                "end_ms": end_ms,
-            }
-
-        if active_note:
-            scheduled_notes.append(active_note)
+            config,
+        )
+        scheduled_notes.extend(channel_notes)
+        forced_retriggers += channel_retriggers
+        delayed_notes += channel_delays
+        channel_timing[channel] = {"forced_retriggers": channel_retriggers, "delayed_notes": channel_delays}
 
     scheduled_notes.sort(key=lambda item: (item["start_ms"], item["channel"], item["note"]))
     return scheduled_notes, {
@@ -2096,6 +2730,153 @@ def schedule_notes(note_intervals, config):
         "unmapped_notes": unmapped_notes,
         "unmapped_note_counts": {str(note): count for note, count in sorted(unmapped_note_counts.items())},
         "channels_used": sorted(notes_by_channel),
+        "channel_timing": channel_timing,
+    }
+
+
+def assign_octave_transpose_candidates(remapped_intervals, notes_by_channel, config, beam_width, expansion_budget):
+    """Pick an octave target for each folded note so the most of them fit on time.
+
+    Taking the closest fitting octave for each note in turn can block a channel
+    that a later note needed. This walks the notes in time order and keeps the
+    best `beam_width` partial assignments, scored by notes kept and then by
+    total octave distance. Once `expansion_budget` candidate checks are spent,
+    the rest of the song falls back to a single greedy path, so the result is
+    deterministic and bounded. The greedy answer is always computed too, and
+    the beam result is used only when it keeps at least as many notes.
+
+    Returns one `(target_note, channel)` or None per interval, plus stats.
+    """
+    mapping_config = config["mapping"]
+    exact_notes_by_channel = {
+        channel: [(int(note["start_ms"]), int(note["end_ms"]), int(note["note"])) for note in channel_notes]
+        for channel, channel_notes in notes_by_channel.items()
+    }
+    exact_starts_by_channel = {
+        channel: [note[0] for note in channel_notes] for channel, channel_notes in exact_notes_by_channel.items()
+    }
+    channel_timing = {}
+    candidate_lists = []
+    for interval in remapped_intervals:
+        source_note = int(interval["source_note"])
+        start_ms = int(interval["start_ms"])
+        end_ms = max(start_ms + 1, int(interval["end_ms"]))
+        candidates = []
+        for target_note in get_octave_transpose_candidate_notes(source_note, mapping_config):
+            channel = map_note_to_channel(target_note, mapping_config)
+            if channel is None:
+                continue
+            channel = int(channel)
+            if channel not in channel_timing:
+                channel_actuation = resolve_channel_actuation(channel, config)
+                channel_timing[channel] = (
+                    int(channel_actuation["release_delay_ms"]) + int(channel_actuation["minimum_rearm_gap_ms"]),
+                    max(0, int(channel_actuation.get("minimum_repeat_period_ms", 0))),
+                )
+            candidates.append((abs(int(target_note) - source_note), int(target_note), channel))
+        candidates.sort()
+        candidate_lists.append((start_ms, end_ms, candidates))
+
+    def fits(channel, start_ms, end_ms, last_inserted):
+        # Same neighbour rules as schedule_notes: the immediately previous and
+        # next notes on the channel, ordered by (start, end, note).
+        recovery_ms, minimum_repeat_period_ms = channel_timing[channel]
+        exact_notes = exact_notes_by_channel.get(channel, [])
+        split_index = bisect.bisect_left(exact_starts_by_channel.get(channel, []), start_ms)
+        previous_note = exact_notes[split_index - 1] if split_index > 0 else None
+        next_note = exact_notes[split_index] if split_index < len(exact_notes) else None
+        if last_inserted is not None:
+            if last_inserted[0] < start_ms:
+                if previous_note is None or last_inserted > previous_note:
+                    previous_note = last_inserted
+            elif next_note is None or last_inserted < next_note:
+                next_note = last_inserted
+
+        if previous_note is not None:
+            earliest_start_ms = previous_note[1] + recovery_ms
+            if minimum_repeat_period_ms > 0:
+                earliest_start_ms = max(earliest_start_ms, previous_note[0] + minimum_repeat_period_ms)
+            if start_ms < earliest_start_ms:
+                return False
+        if next_note is not None:
+            if end_ms > next_note[0] - recovery_ms:
+                return False
+            if minimum_repeat_period_ms > 0 and start_ms + minimum_repeat_period_ms > next_note[0]:
+                return False
+        return True
+
+    def search(width, budget):
+        # Each state: (kept, distance, last inserted note per channel, choices),
+        # where choices is a (choice, parent) chain so branching stays cheap.
+        states = [(0, 0, {}, None)]
+        expansions = 0
+        budget_exhausted = False
+        for start_ms, end_ms, candidates in candidate_lists:
+            if not budget_exhausted and expansions + len(states) * len(candidates) > budget:
+                budget_exhausted = True
+                width = 1
+                states = states[:1]
+            next_states = []
+            for kept, distance, last_by_channel, choices in states:
+                for candidate_distance, target_note, channel in candidates:
+                    expansions += 1
+                    if fits(channel, start_ms, end_ms, last_by_channel.get(channel)):
+                        next_states.append(
+                            (
+                                kept + 1,
+                                distance + candidate_distance,
+                                {**last_by_channel, channel: (start_ms, end_ms, target_note)},
+                                ((target_note, channel), choices),
+                            )
+                        )
+                        if width == 1:
+                            break
+                else:
+                    # Greedy stops at the first fit; the beam also keeps the skip.
+                    next_states.append((kept, distance, last_by_channel, (None, choices)))
+            next_states.sort(key=lambda state: (-state[0], state[1]))
+            if width == 1:
+                states = next_states[:1]
+                continue
+            # Drop states whose future looks identical to a better one.
+            unique_states = []
+            seen_channel_states = set()
+            for state in next_states:
+                channel_state = frozenset(state[2].items())
+                if channel_state in seen_channel_states:
+                    continue
+                seen_channel_states.add(channel_state)
+                unique_states.append(state)
+                if len(unique_states) >= width:
+                    break
+            states = unique_states
+        best_kept, best_distance, _, choices = states[0]
+        best_choices = []
+        while choices is not None:
+            best_choices.append(choices[0])
+            choices = choices[1]
+        best_choices.reverse()
+        return best_choices, best_kept, best_distance, expansions, budget_exhausted
+
+    greedy_choices, greedy_kept, _, _, _ = search(1, float("inf"))
+    assignments = greedy_choices
+    beam_kept = greedy_kept
+    expansions = 0
+    budget_exhausted = False
+    if beam_width > 1 and candidate_lists:
+        beam_choices, beam_kept, _, expansions, budget_exhausted = search(beam_width, max(0, expansion_budget))
+        if beam_kept >= greedy_kept:
+            assignments = beam_choices
+        else:
+            beam_kept = greedy_kept
+
+    return assignments, {
+        "beam_width": beam_width,
+        "expansions": expansions,
+        "budget_exhausted": budget_exhausted,
+        "greedy_kept": greedy_kept,
+        "kept": beam_kept,
+        "recovered_notes": beam_kept - greedy_kept,
     }
 
 
@@ -2130,86 +2911,40 @@ def schedule_notes_with_octave_transpose(note_intervals, config):
     channels_used = set(int(channel) for channel in exact_stats["channels_used"])
     skipped_transposed_notes_for_timing = 0
 
-    def can_insert_on_time(channel, start_ms, end_ms):
-        channel_actuation = resolve_channel_actuation(channel, config)
-        release_delay_ms = int(channel_actuation["release_delay_ms"])
-        minimum_rearm_gap_ms = int(channel_actuation["minimum_rearm_gap_ms"])
-        minimum_repeat_period_ms = max(0, int(channel_actuation.get("minimum_repeat_period_ms", 0)))
-
-        previous_note = None
-        next_note = None
-        for scheduled_note in notes_by_channel[channel]:
-            if scheduled_note["start_ms"] >= start_ms:
-                next_note = scheduled_note
-                break
-            previous_note = scheduled_note
-
-        if previous_note is not None:
-            earliest_start_ms = previous_note["end_ms"] + release_delay_ms + minimum_rearm_gap_ms
-            if minimum_repeat_period_ms > 0:
-                earliest_start_ms = max(earliest_start_ms, previous_note["start_ms"] + minimum_repeat_period_ms)
-            if start_ms < earliest_start_ms:
-                return False
-
-        if next_note is not None:
-            latest_end_ms = next_note["start_ms"] - release_delay_ms - minimum_rearm_gap_ms
-            if end_ms > latest_end_ms:
-                return False
-            if minimum_repeat_period_ms > 0 and start_ms + minimum_repeat_period_ms > next_note["start_ms"]:
-                return False
-
-        return True
-
-    def insert_scheduled_note(note_event):
-        channel = int(note_event["channel"])
-        notes_by_channel[channel].append(note_event)
-        notes_by_channel[channel].sort(key=lambda item: (item["start_ms"], item["end_ms"], item["note"]))
-        channels_used.add(channel)
+    remapped_source_intervals.sort(key=lambda item: (item["start_ms"], item["note"], item["end_ms"]))
+    assignment_config = get_fit_config(config)["octave_assignment"]
+    assignments, assignment_stats = assign_octave_transpose_candidates(
+        remapped_source_intervals,
+        notes_by_channel,
+        config,
+        beam_width=int(assignment_config["beam_width"]),
+        expansion_budget=int(assignment_config["expansion_budget"]),
+    )
 
-    for interval in sorted(remapped_source_intervals, key=lambda item: (item["start_ms"], item["note"], item["end_ms"])):
+    for interval, assignment in zip(remapped_source_intervals, assignments):
         source_note = int(interval["source_note"])
-        candidate_notes = get_octave_transpose_candidate_notes(source_note, mapping_config)
-        if not candidate_notes:
+        if assignment is None:
             skipped_transposed_notes_for_timing += 1
             unmapped_notes += 1
             unmapped_note_counts[source_note] += 1
             continue
 
+        target_note, channel = assignment
         original_duration_ms = max(1, interval["end_ms"] - interval["start_ms"])
-        target_end_ms = max(interval["start_ms"] + 1, interval["start_ms"] + original_duration_ms)
-        fitting_candidates = []
-
-        for target_note in candidate_notes:
-            channel = map_note_to_channel(target_note, mapping_config)
-            if channel is None:
-                continue
-            if can_insert_on_time(int(channel), interval["start_ms"], target_end_ms):
-                fitting_candidates.append((abs(int(target_note) - source_note), int(target_note), int(channel)))
-
-        if not fitting_candidates:
-            skipped_transposed_notes_for_timing += 1
-            unmapped_notes += 1
-            unmapped_note_counts[source_note] += 1
-            continue
-
-        _, target_note, channel = min(
-            fitting_candidates,
-            key=lambda item: (item[0], item[1], item[2]),
+        scheduled_notes.append(
+            {
+                **interval,
+                "source_note": source_note,
+                "note": target_note,
+                "channel": channel,
+                "original_start_ms": interval["start_ms"],
+                "original_end_ms": interval["end_ms"],
+                "original_duration_ms": original_duration_ms,
+                "start_ms": interval["start_ms"],
+                "end_ms": max(interval["start_ms"] + 1, interval["start_ms"] + original_duration_ms),
+            }
         )
-
-        scheduled_note = {
-            **interval,
-            "source_note": source_note,
-            "note": target_note,
-            "channel": channel,
-            "original_start_ms": interval["start_ms"],
-            "original_end_ms": interval["end_ms"],
-            "original_duration_ms": original_duration_ms,
-            "start_ms": interval["start_ms"],
-            "end_ms": target_end_ms,
-        }
-        insert_scheduled_note(scheduled_note)
-        scheduled_notes.append(scheduled_note)
+        channels_used.add(channel)
 
     scheduled_notes.sort(key=lambda item: (item["start_ms"], item["channel"], item["note"]))
     return scheduled_notes, {
@@ -2219,7 +2954,260 @@ def schedule_notes_with_octave_transpose(note_intervals, config):
         "unmapped_note_counts": {str(note): count for note, count in sorted(unmapped_note_counts.items())},
         "channels_used": sorted(channels_used),
         "skipped_transposed_notes_for_timing": skipped_transposed_notes_for_timing,
+        "octave_assignment": assignment_stats,
+    }
+
+
+def get_note_reduction_config(config):
+    defaults = {
+        "enabled": False,
+        "max_events_per_second": 150,
+        "window_ms": 1000,
+        "chord_window_ms": 30,
+        "ornament_ms": 90,
+        "min_repeat_ms": 120,
+        "max_reported_removals": 20,
+    }
+    merged = copy.deepcopy(defaults)
+    merged.update(copy.deepcopy(config.get("note_reduction", {})))
+    return merged
+
+
+def reduce_notes_to_event_budget(scheduled_notes, config):
+    """Thin an over-dense arrangement down to an events-per-second budget.
+
+    Notes are grouped into chords by onset (`chord_window_ms`). The top and
+    bottom note of each chord are the melody and bass and are never removed.
+    Other notes are ranked by velocity, with rapid ornaments (shorter than
+    `ornament_ms`) and inner chord voices ranked lower. A fast repeat on one
+    channel (closer than `min_repeat_ms` or the channel's
+    `minimum_repeat_period_ms`) is merged into the previous note on that
+    channel. Then, in every `window_ms` window that still needs more strike,
+    hold and release events than `max_events_per_second` allows, the
+    lowest-ranked notes are dropped until it fits.
+    """
+    reduction = get_note_reduction_config(config)
+    stats = {"enabled": bool(reduction["enabled"]), "removed_count": 0, "reason_counts": {}, "removed": []}
+    if not reduction["enabled"] or not scheduled_notes:
+        return scheduled_notes, stats
+
+    window_ms = max(1, int(reduction["window_ms"]))
+    window_budget = max(1, int(float(reduction["max_events_per_second"]) * window_ms / 1000))
+    chord_window_ms = max(0, int(reduction["chord_window_ms"]))
+    ornament_ms = max(0, int(reduction["ornament_ms"]))
+
+    notes = sorted((dict(note) for note in scheduled_notes), key=lambda item: (item["start_ms"], item["note"]))
+    protected = set()
+    inner_voice = set()
+    chord_start = 0
+    while chord_start < len(notes):
+        chord_end = chord_start + 1
+        while (
+            chord_end < len(notes)
+            and notes[chord_end]["start_ms"] - notes[chord_start]["start_ms"] <= chord_window_ms
+        ):
+            chord_end += 1
+        chord_indexes = sorted(range(chord_start, chord_end), key=lambda index: notes[index]["note"])
+        protected.update((chord_indexes[0], chord_indexes[-1]))
+        inner_voice.update(chord_indexes[1:-1])
+        chord_start = chord_end
+
+    removed = {}
+
+    def removal_reason(index):
+        note = notes[index]
+        if note["end_ms"] - note["start_ms"] < ornament_ms:
+            return "rapid ornament"
+        if index in inner_voice:
+            return "inner voice"
+        return "low velocity"
+
+    previous_by_channel = {}
+    for index, note in enumerate(notes):
+        channel = int(note["channel"])
+        repeat_limit_ms = max(
+            int(reduction["min_repeat_ms"]),
+            int(resolve_channel_actuation(channel, config).get("minimum_repeat_period_ms", 0)),
+        )
+        previous_index = previous_by_channel.get(channel)
+        if (
+            previous_index is not None
+            and index not in protected
+            and note["start_ms"] - notes[previous_index]["start_ms"] < repeat_limit_ms
+        ):
+            notes[previous_index]["end_ms"] = max(notes[previous_index]["end_ms"], note["end_ms"])
+            removed[index] = "merged fast repeat"
+            continue
+        previous_by_channel[channel] = index
+
+    def importance(index):
+        note = notes[index]
+        score = int(note["velocity"]) / 127
+        if note["end_ms"] - note["start_ms"] < ornament_ms:
+            score -= 0.5
+        if index in inner_voice:
+            score -= 0.25
+        return score
+
+    def event_windows(index):
+        note = notes[index]
+        actuation = resolve_note_actuation(note["note"], note["channel"], config)
+        strike_ms = int(actuation["strike_ms"])
+        end_ms = max(int(note["end_ms"]), int(note["start_ms"]) + strike_ms)
+        times = [int(note["start_ms"]), end_ms + int(actuation["release_delay_ms"])]
+        if int(note["start_ms"]) + strike_ms < end_ms:
+            times.append(int(note["start_ms"]) + strike_ms)
+        return [time_ms // window_ms for time_ms in times]
+
+    window_events = defaultdict(int)
+    window_candidates = defaultdict(list)
+    note_windows = {}
+    for index in range(len(notes)):
+        if index in removed:
+            continue
+        note_windows[index] = event_windows(index)
+        for window in note_windows[index]:
+            window_events[window] += 1
+        if index not in protected:
+            window_candidates[note_windows[index][0]].append(index)
+
+    for window in sorted(window_candidates):
+        if window_events[window] <= window_budget:
+            continue
+        for index in sorted(window_candidates[window], key=lambda item: (importance(item), -item)):
+            if window_events[window] <= window_budget:
+                break
+            removed[index] = removal_reason(index)
+            for note_window in note_windows[index]:
+                window_events[note_window] -= 1
+
+    reason_counts = defaultdict(int)
+    for index in sorted(removed, key=lambda item: (notes[item]["start_ms"], notes[item]["note"])):
+        note = notes[index]
+        reason_counts[removed[index]] += 1
+        stats["removed"].append(
+            {
+                "time_ms": int(note["start_ms"]),
+                "note": int(note["note"]),
+                "note_label": midi_note_name(note["note"]),
+                "channel": int(note["channel"]),
+                "velocity": int(note["velocity"]),
+                "reason": removed[index],
+            }
+        )
+    stats["removed_count"] = len(removed)
+    stats["reason_counts"] = dict(sorted(reason_counts.items()))
+    kept_notes = [note for index, note in enumerate(notes) if index not in removed]
+    kept_notes.sort(key=lambda item: (item["start_ms"], item["channel"], item["note"]))
+    return kept_notes, stats
+
+
+def apply_thermal_duty_limit(scheduled_notes, config):
+    """Keep each solenoid inside a sliding-window thermal budget.
+
+    Heat is modelled as energised time multiplied by PWM duty (strike PWM for
+    `strike_ms`, then hold PWM until the release). Over any
+    `thermal_window_ms`, a channel may spend at most `thermal_max_duty` of the
+    window at full duty. Both come from the actuation settings, so calibrated
+    `channel_overrides` can tighten or relax them per solenoid. A note that
+    would exceed the budget first has its hold PWM lowered toward
+    `hold_min_pwm`, then its hold shortened toward the strike. If it is still
+    over and it repeats the previous note on that channel within
+    `thermal_repeat_thin_ms`, it is dropped.
+    """
+    notes_by_channel = defaultdict(list)
+    for note_event in scheduled_notes:
+        notes_by_channel[int(note_event["channel"])].append(note_event)
+
+    kept_notes = []
+    stats = {
+        "lowered_hold_notes": 0,
+        "shortened_hold_notes": 0,
+        "thinned_repeats": 0,
+        "over_budget_notes": 0,
+        "limited_channels": [],
     }
+    limited_channels = set()
+
+    for channel in sorted(notes_by_channel):
+        channel_actuation = resolve_channel_actuation(channel, config)
+        window_ms = int(channel_actuation.get("thermal_window_ms", 0) or 0)
+        max_duty = float(channel_actuation.get("thermal_max_duty", 0) or 0)
+        if window_ms <= 0 or max_duty <= 0:
+            kept_notes.extend(notes_by_channel[channel])
+            continue
+        budget = window_ms * max_duty
+        repeat_thin_ms = int(channel_actuation.get("thermal_repeat_thin_ms", 0) or 0)
+        # Energised segments already kept on this channel: (start, end, duty).
+        segments = []
+
+        def used_energy(window_start_ms, window_end_ms):
+            return sum(
+                (min(end_ms, window_end_ms) - max(start_ms, window_start_ms)) * duty
+                for start_ms, end_ms, duty in segments
+                if start_ms < window_end_ms and end_ms > window_start_ms
+            )
+
+        previous_start_ms = None
+        for note_event in sorted(notes_by_channel[channel], key=lambda item: item["start_ms"]):
+            note_actuation = resolve_note_actuation(note_event["note"], channel, config)
+            strike_ms = int(note_actuation["strike_ms"])
+            release_delay_ms = int(note_actuation["release_delay_ms"])
+            output_velocity, _override = resolve_playback_velocity(note_event["velocity"], note_actuation)
+            strike_pwm = velocity_to_strike_pwm(output_velocity, note_actuation)
+            hold_pwm = strike_to_hold_pwm(strike_pwm, note_actuation)
+            hold_min_pwm = min(hold_pwm, int(note_actuation["hold_min_pwm"]))
+            minimum_duration_ms = max(0, int(note_actuation.get("minimum_note_duration_ms", 0)), strike_ms)
+            start_ms = int(note_event["start_ms"])
+            end_ms = max(int(note_event["end_ms"]), start_ms + minimum_duration_ms)
+            hold_start_ms = start_ms + strike_ms
+            strike_energy = strike_ms * strike_pwm / 4095
+
+            segments = [segment for segment in segments if segment[1] > start_ms - window_ms]
+            release_ms = end_ms + release_delay_ms
+            # The window that ends at this note's release is the tightest one it joins.
+            available = budget - used_energy(release_ms - window_ms, release_ms) - strike_energy
+            hold_ms = max(0, release_ms - hold_start_ms)
+
+            limited_note = dict(note_event)
+            if hold_ms > 0 and hold_ms * hold_pwm / 4095 > available:
+                lowered_pwm = max(hold_min_pwm, int(available * 4095 / hold_ms)) if available > 0 else hold_min_pwm
+                if lowered_pwm < hold_pwm:
+                    hold_pwm = lowered_pwm
+                    limited_note["hold_pwm_limit"] = hold_pwm
+                    stats["lowered_hold_notes"] += 1
+                if hold_ms * hold_pwm / 4095 > available:
+                    allowed_hold_ms = max(0, int(available * 4095 / hold_pwm)) if hold_pwm > 0 else hold_ms
+                    shortened_end_ms = max(
+                        start_ms + minimum_duration_ms,
+                        hold_start_ms + allowed_hold_ms - release_delay_ms,
+                    )
+                    if shortened_end_ms < end_ms:
+                        limited_note["end_ms"] = shortened_end_ms
+                        end_ms = shortened_end_ms
+                        release_ms = end_ms + release_delay_ms
+                        hold_ms = max(0, release_ms - hold_start_ms)
+                        stats["shortened_hold_notes"] += 1
+
+            if hold_ms * hold_pwm / 4095 > available:
+                is_repeat = previous_start_ms is not None and start_ms - previous_start_ms <= repeat_thin_ms
+                limited_channels.add(channel)
+                if is_repeat:
+                    stats["thinned_repeats"] += 1
+                    continue
+                stats["over_budget_notes"] += 1
+            elif limited_note.get("end_ms") != note_event["end_ms"] or "hold_pwm_limit" in limited_note:
+                limited_channels.add(channel)
+
+            segments.append((start_ms, hold_start_ms, strike_pwm / 4095))
+            if hold_ms > 0:
+                segments.append((hold_start_ms, release_ms, hold_pwm / 4095))
+            previous_start_ms = start_ms
+            kept_notes.append(limited_note)
+
+    kept_notes.sort(key=lambda item: (item["start_ms"], item["channel"], item["note"]))
+    stats["limited_channels"] = sorted(limited_channels)
+    return kept_notes, stats
 
 
 def velocity_to_strike_pwm(velocity, actuation_config):
@@ -2255,6 +3243,11 @@ def build_playback_events(scheduled_notes, config, pedal_events=None):
 
     Each playable note becomes a strong strike, an optional lower-power hold,
     and a release event that sets the PCA9685 channel back to zero.
+
+    Strikes are sent `strike_latency_ms` early and releases
+    `release_latency_ms` early (both actuation settings, so they can differ per
+    channel or key colour) so the hammer and damper land on the beat. Sends
+    never move before time zero or past the next strike on the same channel.
     """
     timeline = []
     scheduled_note_metadata = []
@@ -2262,8 +3255,24 @@ def build_playback_events(scheduled_notes, config, pedal_events=None):
     hold_event_count = 0
     strike_only_note_count = 0
 
-    for note_event in scheduled_notes:
+    resolved_notes = []
+    strikes_by_channel = defaultdict(list)
+    for index, note_event in enumerate(scheduled_notes):
         channel_actuation = resolve_note_actuation(note_event["note"], note_event["channel"], config)
+        strike_latency_ms = max(0, int(channel_actuation.get("strike_latency_ms", 0) or 0))
+        strike_time_ms = max(0, note_event["start_ms"] - strike_latency_ms)
+        resolved_notes.append((note_event, channel_actuation, strike_latency_ms, strike_time_ms))
+        strikes_by_channel[int(note_event["channel"])].append((note_event["start_ms"], strike_time_ms, index))
+    next_strike_by_index = {}
+    for channel_strikes in strikes_by_channel.values():
+        channel_strikes.sort()
+        for (_start_ms, _strike_time_ms, index), (next_start_ms, next_strike_time_ms, _next_index) in zip(
+            channel_strikes,
+            channel_strikes[1:],
+        ):
+            next_strike_by_index[index] = (next_start_ms, next_strike_time_ms)
+
+    for index, (note_event, channel_actuation, strike_latency_ms, strike_time_ms) in enumerate(resolved_notes):
         strike_ms = int(channel_actuation["strike_ms"])
         release_delay_ms = int(channel_actuation["release_delay_ms"])
         output_velocity, velocity_override_applied = resolve_playback_velocity(
@@ -2272,6 +3281,8 @@ def build_playback_events(scheduled_notes, config, pedal_events=None):
         )
         strike_pwm = velocity_to_strike_pwm(output_velocity, channel_actuation)
         hold_pwm = strike_to_hold_pwm(strike_pwm, channel_actuation)
+        if note_event.get("hold_pwm_limit") is not None:
+            hold_pwm = min(hold_pwm, int(note_event["hold_pwm_limit"]))
         requested_duration_ms = max(1, note_event["end_ms"] - note_event["start_ms"])
         minimum_duration_ms = max(
             0,
@@ -2281,12 +3292,29 @@ def build_playback_events(scheduled_notes, config, pedal_events=None):
         effective_end_ms = max(note_event["end_ms"], note_event["start_ms"] + minimum_duration_ms)
         note_duration_ms = max(1, effective_end_ms - note_event["start_ms"])
         hold_start_ms = note_event["start_ms"] + strike_ms
-        release_ms = effective_end_ms + release_delay_ms
+        target_release_ms = effective_end_ms + release_delay_ms
+        release_latency_ms = max(0, int(channel_actuation.get("release_latency_ms", 0) or 0))
+        hold_time_ms = strike_time_ms + strike_ms
+        release_ms = max(hold_time_ms, target_release_ms - release_latency_ms)
+        if index in next_strike_by_index:
+            next_start_ms, next_strike_time_ms = next_strike_by_index[index]
+            if target_release_ms <= next_start_ms:
+                release_ms = max(strike_time_ms + 1, min(release_ms, next_strike_time_ms))
+        # Sub-millisecond remainders from a microsecond timeline. A release
+        # that scheduling moved keeps its whole-millisecond time.
+        strike_offset_us = int(note_event.get("start_offset_us", 0))
+        release_offset_us = 0
+        if (
+            note_event["end_ms"] == note_event.get("original_end_ms", note_event["end_ms"])
+            and effective_end_ms == note_event["end_ms"]
+            and release_ms == target_release_ms - release_latency_ms
+        ):
+            release_offset_us = int(note_event.get("end_offset_us", 0))
 
-        timeline.append((note_event["start_ms"], note_event["channel"], strike_pwm))
+        timeline.append((strike_time_ms, note_event["channel"], strike_pwm))
 
-        if hold_start_ms < effective_end_ms:
-            timeline.append((hold_start_ms, note_event["channel"], hold_pwm))
+        if hold_start_ms < effective_end_ms and hold_time_ms < release_ms:
+            timeline.append((hold_time_ms, note_event["channel"], hold_pwm))
             hold_event_count += 1
         else:
             strike_only_note_count += 1
@@ -2306,7 +3334,8 @@ def build_playback_events(scheduled_notes, config, pedal_events=None):
                 "source_channel": note_event.get("source_channel"),
                 "original_start_ms": note_event["original_start_ms"],
                 "original_end_ms": note_event["original_end_ms"],
-                "scheduled_start_ms": note_event["start_ms"],
+                "target_start_ms": note_event["start_ms"],
+                "scheduled_start_ms": strike_time_ms,
                 "scheduled_end_ms": effective_end_ms,
                 "requested_end_ms": note_event["end_ms"],
                 "minimum_duration_applied": effective_end_ms > note_event["end_ms"],
@@ -2314,6 +3343,13 @@ def build_playback_events(scheduled_notes, config, pedal_events=None):
                 "requested_duration_ms": requested_duration_ms,
                 "strike_pwm": strike_pwm,
                 "hold_pwm": hold_pwm,
+                "thermal_hold_pwm_limit": note_event.get("hold_pwm_limit"),
+                "strike_latency_ms": strike_latency_ms,
+                "release_latency_ms": release_latency_ms,
+                "latency_shift_ms": note_event["start_ms"] - strike_time_ms,
+                "release_latency_shift_ms": target_release_ms - release_ms,
+                "strike_offset_us": strike_offset_us,
+                "release_offset_us": release_offset_us,
                 "release_ms": release_ms,
                 "actuation": channel_actuation,
             }
@@ -2330,6 +3366,700 @@ def build_playback_events(scheduled_notes, config, pedal_events=None):
     }
 
 
+def get_power_budget_config(config):
+    defaults = {
+        "enabled": True,
+        "inrush_window_ms": 5,
+        "max_strikes_per_board": 6,
+        "max_strikes": 10,
+        "max_duty_load_per_board": None,
+        "max_duty_load": None,
+        "stagger_step_ms": 2,
+        "max_stagger_ms": 12,
+    }
+    merged = copy.deepcopy(defaults)
+    merged.update(copy.deepcopy(config.get("power_budget", {})))
+    return merged
+
+
+def order_chord_by_power_priority(chord_notes):
+    """Melody (top note) first, then bass, then inner voices from the top down."""
+    by_pitch = sorted(chord_notes, key=lambda item: (-int(item["input_note"]), -int(item["velocity"]), item["channel"]))
+    if len(by_pitch) <= 2:
+        return by_pitch
+    return [by_pitch[0], by_pitch[-1], *by_pitch[1:-1]]
+
+
+def apply_power_budget(timeline, scheduled_note_metadata, config):
+    """Stagger chord strikes so the solenoid supply is not hit all at once.
+
+    Strikes whose onsets fall within `inrush_window_ms` of each other share the
+    coil inrush current. A strike that would push its PCA9685 board or the whole
+    rig past the configured number of such simultaneous strikes, or past the
+    configured duty load (sum of PWM duty across energised channels over the
+    strike, 1.0 = one channel fully on), is moved later in `stagger_step_ms`
+    steps up to `max_stagger_ms`. Chords are placed melody
+    first, so the top note keeps its time and inner voices roll in behind it.
+    A shifted note moves whole (strike, hold and release) and never closer than
+    `retrigger_gap_ms` to the next note on its channel. The sustain pedal is
+    not counted.
+    """
+    budget = get_power_budget_config(config)
+    stats = {
+        "enabled": bool(budget["enabled"]),
+        "staggered_notes": 0,
+        "max_shift_ms": 0,
+        "total_shift_ms": 0,
+        "unresolved_overloads": 0,
+        "shift_counts": {},
+    }
+    if not budget["enabled"] or not scheduled_note_metadata:
+        return timeline, stats
+
+    strike_caps = (int(budget["max_strikes_per_board"] or 0), int(budget["max_strikes"] or 0))
+    load_caps = (
+        float(budget["max_duty_load_per_board"] or 0.0),
+        float(budget["max_duty_load"] or 0.0),
+    )
+    inrush_ms = max(1, int(budget["inrush_window_ms"]))
+    step_ms = max(1, int(budget["stagger_step_ms"]))
+    max_stagger_ms = max(0, int(budget["max_stagger_ms"]))
+
+    next_start_by_note = {}
+    notes_by_channel = defaultdict(list)
+    for note in scheduled_note_metadata:
+        notes_by_channel[int(note["channel"])].append(note)
+    for channel_notes in notes_by_channel.values():
+        channel_notes.sort(key=lambda item: item["scheduled_start_ms"])
+        for current, following in zip(channel_notes, channel_notes[1:]):
+            next_start_by_note[id(current)] = int(following["scheduled_start_ms"])
+
+    chords = defaultdict(list)
+    for note in scheduled_note_metadata:
+        chords[int(note["scheduled_start_ms"])].append(note)
+
+    # Placed intervals: (start, end, board, duty, is_inrush). Each strike adds a
+    # short inrush interval for counting plus strike and hold duty intervals.
+    active = []
+    shifts = {}
+    shift_counts = defaultdict(int)
+
+    def overload_at(start_ms, strike_ms, board, duty):
+        end_ms = start_ms + strike_ms
+        overlapping = [item for item in active if item[0] < end_ms and item[1] > start_ms]
+        worst = 0.0
+        for point in [start_ms] + [item[0] for item in overlapping if item[0] > start_ms]:
+            own_strike = 1 if point < start_ms + inrush_ms else 0
+            board_strikes = global_strikes = own_strike
+            board_load = global_load = duty
+            for item_start, item_end, item_board, item_duty, is_strike in overlapping:
+                if not item_start <= point < item_end:
+                    continue
+                global_strikes += is_strike
+                global_load += item_duty
+                if item_board == board:
+                    board_strikes += is_strike
+                    board_load += item_duty
+            for value, cap in (
+                (board_strikes if own_strike else 0, strike_caps[0]),
+                (global_strikes if own_strike else 0, strike_caps[1]),
+                (board_load, load_caps[0]),
+                (global_load, load_caps[1]),
+            ):
+                if cap > 0 and value > cap:
+                    worst = max(worst, (value - cap) / cap)
+        return worst
+
+    for chord_start_ms in sorted(chords):
+        active = [item for item in active if item[1] > chord_start_ms]
+        for note in order_chord_by_power_priority(chords[chord_start_ms]):
+            channel = int(note["channel"])
+            board = channel // PCA9685_CHANNELS_PER_BOARD
+            actuation = note["actuation"]
+            strike_ms = max(1, int(actuation["strike_ms"]))
+            strike_duty = int(note["strike_pwm"]) / 4095
+            hold_duty = int(note["hold_pwm"]) / 4095
+            limit_ms = max_stagger_ms
+            if id(note) in next_start_by_note:
+                limit_ms = min(
+                    limit_ms,
+                    next_start_by_note[id(note)] - int(note["release_ms"]) - int(actuation["retrigger_gap_ms"]),
+                )
+
+            best_shift_ms = 0
+            best_overload = None
+            shift_ms = 0
+            while shift_ms <= max(0, limit_ms):
+                overload = overload_at(chord_start_ms + shift_ms, strike_ms, board, strike_duty)
+                if best_overload is None or overload < best_overload:
+                    best_shift_ms, best_overload = shift_ms, overload
+                if overload == 0:
+                    break
+                shift_ms += step_ms
+            if best_overload:
+                stats["unresolved_overloads"] += 1
+
+            start_ms = chord_start_ms + best_shift_ms
+            hold_start_ms = start_ms + strike_ms
+            release_ms = int(note["release_ms"]) + best_shift_ms
+            active.append((start_ms, start_ms + inrush_ms, board, 0.0, 1))
+            active.append((start_ms, hold_start_ms, board, strike_duty, 0))
+            if hold_start_ms < release_ms:
+                active.append((hold_start_ms, release_ms, board, hold_duty, 0))
+            if best_shift_ms == 0:
+                continue
+
+            shifts[(chord_start_ms, channel)] = best_shift_ms
+            shift_counts[best_shift_ms] += 1
+            note["power_budget_shift_ms"] = best_shift_ms
+            note["scheduled_start_ms"] = start_ms
+            note["scheduled_end_ms"] = int(note["scheduled_end_ms"]) + best_shift_ms
+            note["release_ms"] = release_ms
+
+    if not shifts:
+        return timeline, stats
+
+    # Move each shifted note's strike, hold and release together.
+    event_shifts = {}
+    for note in scheduled_note_metadata:
+        shift_ms = note.get("power_budget_shift_ms", 0)
+        if shift_ms:
+            channel = int(note["channel"])
+            original_start_ms = int(note["scheduled_start_ms"]) - shift_ms
+            for event_time_ms in (
+                original_start_ms,
+                original_start_ms + int(note["actuation"]["strike_ms"]),
+                int(note["release_ms"]) - shift_ms,
+            ):
+                event_shifts[(event_time_ms, channel)] = shift_ms
+    shifted_timeline = [
+        (time_ms + event_shifts.get((time_ms, channel), 0), channel, pwm_value)
+        for time_ms, channel, pwm_value in timeline
+    ]
+    shifted_timeline.sort(key=lambda item: (item[0], 0 if item[2] == 0 else 1, item[1]))
+
+    stats["staggered_notes"] = len(shifts)
+    stats["max_shift_ms"] = max(shifts.values())
+    stats["total_shift_ms"] = sum(shifts.values())
+    stats["shift_counts"] = {str(shift_ms): count for shift_ms, count in sorted(shift_counts.items())}
+    return shifted_timeline, stats
+
+
+def get_timing_config(config):
+    defaults = {"resolution": "ms"}
+    merged = copy.deepcopy(defaults)
+    merged.update(copy.deepcopy(config.get("timing", {})))
+    if merged["resolution"] not in TIMING_RESOLUTIONS:
+        raise ValueError(
+            f"timing.resolution must be one of {', '.join(TIMING_RESOLUTIONS)}, not {merged['resolution']!r}."
+        )
+    return merged
+
+
+def get_i2c_bus_config(config):
+    defaults = {
+        "clock_hz": 100000,
+        "bytes_per_set_pwm": 6,
+        "transaction_overhead_us": 40,
+        "board_switch_overhead_us": 20,
+        "late_tolerance_ms": 2,
+        "max_reported_overruns": 10,
+    }
+    merged = copy.deepcopy(defaults)
+    merged.update(copy.deepcopy(config.get("i2c_bus", {})))
+    return merged
+
+
+def estimate_set_pwm_us(bus_config):
+    # Address, register and four data bytes, each 8 bits plus ACK, plus start/stop.
+    bit_count = int(bus_config["bytes_per_set_pwm"]) * 9 + 2
+    return bit_count * 1_000_000 / max(1, int(bus_config["clock_hz"])) + float(bus_config["transaction_overhead_us"])
+
+
+def apply_i2c_bus_model(timeline, scheduled_note_metadata, scheduled_pedal_metadata, config):
+    """Order same-time events for the I2C bus and predict where it falls behind.
+
+    Every PWM change is one setPWM transaction on the shared bus. Events that
+    share a timestamp are sent strikes first (they carry the rhythm), then holds
+    and other level changes, then releases, and within each group the events for
+    one PCA9685 board are kept together. The bus is then simulated event by
+    event: a burst whose transactions outlast the gap to the next timestamp
+    pushes later events back, and those spots are reported.
+    """
+    bus_config = get_i2c_bus_config(config)
+    set_pwm_us = estimate_set_pwm_us(bus_config)
+    board_switch_us = float(bus_config["board_switch_overhead_us"])
+    late_tolerance_us = float(bus_config["late_tolerance_ms"]) * 1000
+
+    strike_keys = {(int(note["scheduled_start_ms"]), int(note["channel"])) for note in scheduled_note_metadata}
+    strike_keys.update(
+        (int(event["scheduled_time_ms"]), int(event["channel"]))
+        for event in scheduled_pedal_metadata
+        if event.get("phase") == "down"
+    )
+
+    # A release that shares a timestamp with a new level on the same channel
+    # must still go first, or the channel would end up off.
+    set_keys = {(time_ms, channel) for time_ms, channel, pwm_value in timeline if pwm_value != 0}
+
+    def event_rank(item):
+        time_ms, channel, pwm_value = item
+        if pwm_value == 0:
+            event_class = -1 if (time_ms, channel) in set_keys else 2
+        elif (time_ms, channel) in strike_keys:
+            event_class = 0
+        else:
+            event_class = 1
+        return (time_ms, event_class, channel // PCA9685_CHANNELS_PER_BOARD, channel)
+
+    ordered_timeline = sorted(timeline, key=event_rank)
+
+    bursts = []
+    bus_free_us = 0.0
+    last_board = None
+    late_events = 0
+    max_late_us = 0.0
+    busy_us = 0.0
+    index = 0
+    while index < len(ordered_timeline):
+        time_ms = ordered_timeline[index][0]
+        burst_end = index
+        while burst_end < len(ordered_timeline) and ordered_timeline[burst_end][0] == time_ms:
+            burst_end += 1
+        burst_start_us = max(time_ms * 1000.0, bus_free_us)
+        burst_bus_us = 0.0
+        for _time_ms, channel, _pwm_value in ordered_timeline[index:burst_end]:
+            board = channel // PCA9685_CHANNELS_PER_BOARD
+            cost_us = set_pwm_us + (board_switch_us if last_board is not None and board != last_board else 0.0)
+            last_board = board
+            burst_bus_us += cost_us
+            late_us = burst_start_us + burst_bus_us - cost_us - time_ms * 1000.0
+            if late_us > late_tolerance_us:
+                late_events += 1
+            max_late_us = max(max_late_us, late_us)
+        bus_free_us = burst_start_us + burst_bus_us
+        busy_us += burst_bus_us
+        next_time_ms = ordered_timeline[burst_end][0] if burst_end < len(ordered_timeline) else None
+        available_us = (next_time_ms - time_ms) * 1000.0 if next_time_ms is not None else None
+        required_us = bus_free_us - time_ms * 1000.0
+        if available_us is not None and required_us > available_us:
+            bursts.append(
+                {
+                    "time_ms": time_ms,
+                    "events": burst_end - index,
+                    "required_ms": round(required_us / 1000, 2),
+                    "available_ms": round(available_us / 1000, 2),
+                }
+            )
+        index = burst_end
+
+    worst_bursts = sorted(bursts, key=lambda item: item["available_ms"] - item["required_ms"])
+    song_ms = ordered_timeline[-1][0] if ordered_timeline else 0
+    return ordered_timeline, {
+        "set_pwm_us": round(set_pwm_us, 1),
+        "clock_hz": int(bus_config["clock_hz"]),
+        "bus_busy_ms": round(busy_us / 1000, 1),
+        "bus_utilisation": round(busy_us / (song_ms * 1000), 4) if song_ms > 0 else 0.0,
+        "overrun_count": len(bursts),
+        "late_events": late_events,
+        "max_late_ms": round(max_late_us / 1000, 2),
+        "worst_overruns": worst_bursts[: max(0, int(bus_config["max_reported_overruns"]))],
+    }
+
+
+def render_channel_notes(scheduled_notes, config):
+    """Run the per-solenoid stages (thermal limit, PWM events) for one channel."""
+    limited_notes, thermal_stats = apply_thermal_duty_limit(scheduled_notes, config)
+    timeline, scheduled_note_metadata, playback_stats = build_playback_events(limited_notes, config)
+    return {
+        "scheduled_notes": scheduled_notes,
+        "note_count": len(limited_notes),
+        "thermal_limit": thermal_stats,
+        "timeline": timeline,
+        "scheduled_note_metadata": scheduled_note_metadata,
+        "hold_events": playback_stats["hold_events"],
+        "strike_only_notes": playback_stats["strike_only_notes"],
+    }
+
+
+def build_channel_render_state(scheduled_notes, config, pedal_events=None, channel_inputs=None, channel_timing=None):
+    """Render every channel separately and keep the pieces for later re-renders.
+
+    `channel_inputs` holds the unscheduled note intervals per channel and
+    `channel_timing` the retrigger/delay counts `schedule_notes` reported for
+    them. With both, a channel whose timing limits change can be rescheduled on
+    its own; without them (transpose mode, where channels compete for notes)
+    only the stages after scheduling can be redone per channel.
+    """
+    notes_by_channel = defaultdict(list)
+    for note_event in scheduled_notes:
+        notes_by_channel[int(note_event["channel"])].append(note_event)
+
+    channels = {}
+    for channel in sorted(notes_by_channel):
+        channel_state = render_channel_notes(notes_by_channel[channel], config)
+        channel_state["inputs"] = None
+        channel_state["timing"] = None
+        if channel_inputs is not None and channel_timing is not None:
+            channel_state["inputs"] = sorted(
+                channel_inputs.get(channel, []),
+                key=lambda item: (item["start_ms"], item["note"], item["end_ms"]),
+            )
+            channel_state["timing"] = channel_timing.get(channel, {"forced_retriggers": 0, "delayed_notes": 0})
+        channels[str(channel)] = channel_state
+
+    pedal_timeline, scheduled_pedal_metadata = build_pedal_timeline_events(pedal_events or [], config)
+    return {
+        "channels": channels,
+        "pedal_timeline": pedal_timeline,
+        "scheduled_pedal_metadata": scheduled_pedal_metadata,
+    }
+
+
+def assemble_channel_render(render_state, config):
+    """Merge per-channel renders, then run the stages that span channels.
+
+    The power budget and I2C bus model look at every channel at once, so they
+    always run on the merged timeline.
+    """
+    timeline = [tuple(event) for event in render_state["pedal_timeline"]]
+    scheduled_note_metadata = []
+    thermal_stats = {
+        "lowered_hold_notes": 0,
+        "shortened_hold_notes": 0,
+        "thinned_repeats": 0,
+        "over_budget_notes": 0,
+        "limited_channels": [],
+    }
+    hold_events = 0
+    strike_only_notes = 0
+    scheduled_note_count = 0
+    for channel_key in sorted(render_state["channels"], key=int):
+        channel_state = render_state["channels"][channel_key]
+        timeline.extend(tuple(event) for event in channel_state["timeline"])
+        # The power budget moves notes in place; copy each record so the stored
+        # per-channel render stays untouched.
+        scheduled_note_metadata.extend(dict(note) for note in channel_state["scheduled_note_metadata"])
+        for key in ("lowered_hold_notes", "shortened_hold_notes", "thinned_repeats", "over_budget_notes"):
+            thermal_stats[key] += channel_state["thermal_limit"][key]
+        thermal_stats["limited_channels"].extend(channel_state["thermal_limit"]["limited_channels"])
+        hold_events += channel_state["hold_events"]
+        strike_only_notes += channel_state["strike_only_notes"]
+        scheduled_note_count += channel_state["note_count"]
+
+    timeline.sort(key=lambda item: (item[0], 0 if item[2] == 0 else 1, item[1]))
+    scheduled_note_metadata.sort(key=lambda item: (item["target_start_ms"], item["channel"], item["input_note"]))
+    scheduled_pedal_metadata = [dict(event) for event in render_state["scheduled_pedal_metadata"]]
+    latency_stats = summarize_latency_compensation(scheduled_note_metadata, scheduled_pedal_metadata)
+    timeline, power_budget_stats = apply_power_budget(timeline, scheduled_note_metadata, config)
+    timeline, i2c_bus_stats = apply_i2c_bus_model(timeline, scheduled_note_metadata, scheduled_pedal_metadata, config)
+    return timeline, scheduled_note_metadata, {
+        "scheduled_note_count": scheduled_note_count,
+        "hold_events": hold_events,
+        "strike_only_notes": strike_only_notes,
+        "pedal_events": len(scheduled_pedal_metadata),
+        "scheduled_pedal_events": scheduled_pedal_metadata,
+        "thermal_limit": thermal_stats,
+        "latency_compensation": latency_stats,
+        "power_budget": power_budget_stats,
+        "i2c_bus": i2c_bus_stats,
+    }
+
+
+def summarize_latency_compensation(scheduled_note_metadata, scheduled_pedal_metadata):
+    strike_shifts = [int(note["latency_shift_ms"]) for note in scheduled_note_metadata]
+    release_shifts = [int(note["release_latency_shift_ms"]) for note in scheduled_note_metadata]
+    pedal_shifts = defaultdict(int)
+    for event in scheduled_pedal_metadata:
+        if event.get("phase") in ("down", "up"):
+            pedal_shifts[event["phase"]] = max(pedal_shifts[event["phase"]], int(event.get("latency_shift_ms", 0)))
+    return {
+        "shifted_strikes": sum(1 for shift_ms in strike_shifts if shift_ms > 0),
+        "shifted_releases": sum(1 for shift_ms in release_shifts if shift_ms > 0),
+        "max_strike_shift_ms": max(strike_shifts, default=0),
+        "max_release_shift_ms": max(release_shifts, default=0),
+        # Strikes that could not be sent their full latency early (song start
+        # or the channel's previous note was in the way).
+        "clamped_strikes": sum(
+            1 for note in scheduled_note_metadata if int(note["latency_shift_ms"]) < int(note["strike_latency_ms"])
+        ),
+        "pedal_down_shift_ms": pedal_shifts["down"],
+        "pedal_up_shift_ms": pedal_shifts["up"],
+    }
+
+
+def find_changed_override_channels(old_actuation, new_actuation):
+    """Channels whose calibration override differs between two actuation sections."""
+    old_overrides = old_actuation.get("channel_overrides", {})
+    new_overrides = new_actuation.get("channel_overrides", {})
+    shared_old = {key: value for key, value in old_actuation.items() if key != "channel_overrides"}
+    shared_new = {key: value for key, value in new_actuation.items() if key != "channel_overrides"}
+    if shared_old != shared_new:
+        return None
+    return sorted(
+        int(channel)
+        for channel in set(old_overrides) | set(new_overrides)
+        if old_overrides.get(channel) != new_overrides.get(channel)
+    )
+
+
+def rerender_changed_channels(conversion, config, changed_channels):
+    """Redo a cached conversion for new channel overrides, touching only those channels.
+
+    Scheduling, the thermal limit and PWM events are per solenoid, so only the
+    changed channels run them again; the power budget and I2C bus model then run
+    over the merged timeline as usual. Returns None when the cached entry cannot
+    be patched (no per-channel state, note reduction enabled, or a timing change
+    in transpose mode where channels compete for notes) and a full conversion is
+    needed instead.
+    """
+    render_state = conversion.get("channel_render_state")
+    if not render_state:
+        return None
+
+    conversion = dict(conversion)
+    render_state = {**render_state, "channels": dict(render_state["channels"])}
+    conversion["channel_render_state"] = render_state
+    previous_config = conversion["effective_config"]
+    effective_config = copy.deepcopy(previous_config)
+    effective_config["actuation"] = copy.deepcopy(config["actuation"])
+    metadata = dict(conversion["metadata"])
+    conversion["metadata"] = metadata
+
+    rerendered_channels = []
+    for channel in changed_channels:
+        channel_state = render_state["channels"].get(str(channel))
+        if channel_state is None:
+            # The song never uses this channel, so nothing it plays changes.
+            continue
+        scheduled_notes = channel_state["scheduled_notes"]
+        channel_timing = channel_state["timing"]
+        if get_channel_timing_limits(channel, previous_config) != get_channel_timing_limits(channel, effective_config):
+            if channel_state["inputs"] is None:
+                return None
+            scheduled_notes, forced_retriggers, delayed_notes = schedule_channel_notes(
+                channel,
+                channel_state["inputs"],
+                effective_config,
+            )
+            channel_timing = {"forced_retriggers": forced_retriggers, "delayed_notes": delayed_notes}
+        render_state["channels"][str(channel)] = {
+            **render_channel_notes(scheduled_notes, effective_config),
+            "inputs": channel_state["inputs"],
+            "timing": channel_timing,
+        }
+        rerendered_channels.append(channel)
+
+    timeline, scheduled_note_metadata, playback_stats = assemble_channel_render(render_state, effective_config)
+    if playback_stats["scheduled_note_count"] == 0:
+        return None
+    delta_events = convert_to_delta_events(timeline)
+    if conversion.get("delta_events_us") is not None:
+        conversion["delta_events_us"] = convert_to_delta_events_us(
+            timeline,
+            scheduled_note_metadata,
+            playback_stats["scheduled_pedal_events"],
+        )
+
+    channel_timings = [channel_state["timing"] for channel_state in render_state["channels"].values()]
+    if all(channel_timing is not None for channel_timing in channel_timings):
+        metadata["forced_retriggers"] = sum(channel_timing["forced_retriggers"] for channel_timing in channel_timings)
+        metadata["delayed_notes"] = sum(channel_timing["delayed_notes"] for channel_timing in channel_timings)
+    metadata["scheduled_note_count"] = playback_stats["scheduled_note_count"]
+    metadata["recognizability_summary"] = describe_recognizability(
+        playback_stats["scheduled_note_count"],
+        metadata["source_note_count"],
+    )
+    metadata["event_count"] = len(delta_events)
+    metadata["hold_events"] = playback_stats["hold_events"]
+    metadata["strike_only_notes"] = playback_stats["strike_only_notes"]
+    metadata["thermal_limit"] = playback_stats["thermal_limit"]
+    metadata["latency_compensation"] = playback_stats["latency_compensation"]
+    metadata["power_budget"] = playback_stats["power_budget"]
+    metadata["i2c_bus"] = playback_stats["i2c_bus"]
+    metadata["actuation_lines"] = build_actuation_lines(metadata["channels_used"], effective_config)
+    metadata["rerendered_channels"] = rerendered_channels
+
+    conversion["delta_events"] = delta_events
+    conversion["scheduled_note_metadata"] = scheduled_note_metadata
+    conversion["effective_config"] = effective_config
+    return conversion
+
+
+def convert_to_delta_events_us(timeline, scheduled_note_metadata, scheduled_pedal_metadata):
+    """Microsecond delta events: the millisecond timeline plus each event's remainder.
+
+    Remainders are looked up by exact (time, channel, is_release) keys, as the
+    power budget does for its shifts. Events never move before an earlier event
+    on the same channel, and same-microsecond events keep their bus order.
+    """
+    offsets_us = {}
+    for note in scheduled_note_metadata:
+        channel = int(note["channel"])
+        start_ms = int(note["scheduled_start_ms"])
+        offsets_us[(start_ms, channel, False)] = int(note.get("strike_offset_us", 0))
+        offsets_us[(start_ms + int(note["actuation"]["strike_ms"]), channel, False)] = int(
+            note.get("strike_offset_us", 0)
+        )
+        offsets_us[(int(note["release_ms"]), channel, True)] = int(note.get("release_offset_us", 0))
+    for event in scheduled_pedal_metadata:
+        offsets_us[(int(event["scheduled_time_ms"]), int(event["channel"]), int(event["pwm"]) == 0)] = int(
+            event.get("offset_us", 0)
+        )
+
+    timed_events = []
+    last_time_us_by_channel = {}
+    for index, (time_ms, channel, pwm_value) in enumerate(timeline):
+        time_us = time_ms * 1000 + offsets_us.get((time_ms, channel, pwm_value == 0), 0)
+        time_us = max(time_us, last_time_us_by_channel.get(channel, 0))
+        last_time_us_by_channel[channel] = time_us
+        timed_events.append((time_us, index, channel, pwm_value))
+    timed_events.sort()
+
+    delta_events = []
+    previous_time_us = 0
+    for time_us, _index, channel, pwm_value in timed_events:
+        delta_events.append((time_us - previous_time_us, channel, pwm_value))
+        previous_time_us = time_us
+    return delta_events
+
+
+def build_stream_events(delta_events, delta_events_us=None):
+    """Event dicts for the serial stream and the metadata payload.
+
+    A microsecond stream keeps `dt_ms` too (the running time rounded to whole
+    milliseconds) for runtimes that predate `BEGIN <count> US`.
+    """
+    if delta_events_us is None:
+        return [{"dt_ms": dt_ms, "channel": channel, "pwm": pwm_value} for dt_ms, channel, pwm_value in delta_events]
+
+    events = []
+    time_us = 0
+    previous_time_ms = 0
+    for dt_us, channel, pwm_value in delta_events_us:
+        time_us += dt_us
+        time_ms = (time_us + 500) // 1000
+        events.append({"dt_ms": time_ms - previous_time_ms, "dt_us": dt_us, "channel": channel, "pwm": pwm_value})
+        previous_time_ms = time_ms
+    return events
+
+
+def drop_runtime_refresh_events(events, channel):
+    """Remove hold refreshes on `channel` for a runtime that refreshes it itself.
+
+    A refresh is a nonzero write that repeats the channel's current PWM. Its
+    delay moves onto the next kept event so every other event keeps its time.
+    Returns the remaining events and how many were dropped.
+    """
+    time_keys = [key for key in ("dt_ms", "dt_us") if events and key in events[0]]
+    kept_events = []
+    carried_time = {key: 0 for key in time_keys}
+    current_pwm = 0
+    for event in events:
+        if event["channel"] == channel:
+            if event["pwm"] > 0 and event["pwm"] == current_pwm:
+                for key in time_keys:
+                    carried_time[key] += event[key]
+                continue
+            current_pwm = event["pwm"]
+        if any(carried_time.values()):
+            event = dict(event)
+            for key in time_keys:
+                event[key] += carried_time[key]
+            carried_time = {key: 0 for key in time_keys}
+        kept_events.append(event)
+    return kept_events, len(events) - len(kept_events)
+
+
+def build_note_envelope_events(events, time_key, timer_capacity, timer_margin_ms=0, skip_channels=()):
+    """Fold strike/hold/release runs into NOTE items the runtime expands itself.
+
+    A channel's strike, optional hold, and release become one NOTE when nothing
+    else lands on that channel in between, the hold and release offsets are
+    whole milliseconds that fit the runtime's 16-bit fields, and one of its
+    `timer_capacity` envelope timers is free for the whole note (plus
+    `timer_margin_ms` for a release that runs late). Everything else stays a
+    plain EVENT. Returns the stream items and the number of envelopes.
+    """
+    if not events or timer_capacity <= 0:
+        return events, 0
+
+    units_per_ms = 1000 if time_key == "dt_us" else 1
+    time_keys = [key for key in ("dt_ms", "dt_us") if key in events[0]]
+    absolute_times = {}
+    for key in time_keys:
+        running_time = 0
+        key_times = []
+        for event in events:
+            running_time += event[key]
+            key_times.append(running_time)
+        absolute_times[key] = key_times
+    song_times = absolute_times[time_key]
+
+    indices_by_channel = defaultdict(list)
+    for index, event in enumerate(events):
+        if event["channel"] not in skip_channels:
+            indices_by_channel[event["channel"]].append(index)
+
+    candidates = []
+    for indices in indices_by_channel.values():
+        position = 0
+        while position < len(indices):
+            run = [indices[position]]
+            following = [events[index]["pwm"] for index in indices[position + 1:position + 3]]
+            if events[run[0]]["pwm"] > 0 and following[:1] == [0]:
+                run.append(indices[position + 1])
+            elif events[run[0]]["pwm"] > 0 and len(following) == 2 and following[0] > 0 and following[1] == 0:
+                run.extend(indices[position + 1:position + 3])
+            else:
+                position += 1
+                continue
+
+            strike_time = song_times[run[0]]
+            strike_span = song_times[run[1]] - strike_time
+            duration = song_times[run[-1]] - strike_time
+            if (
+                duration <= 0
+                or strike_span % units_per_ms
+                or duration % units_per_ms
+                or duration // units_per_ms > NOTE_ENVELOPE_MAX_MS
+            ):
+                position += 1
+                continue
+            candidates.append((strike_time, run[0], run, strike_span // units_per_ms, duration // units_per_ms))
+            position += len(run)
+
+    candidates.sort()
+    busy_until = []
+    envelopes = {}
+    folded_indices = set()
+    for strike_time, strike_index, run, strike_ms, duration_ms in candidates:
+        while busy_until and busy_until[0] <= strike_time:
+            heapq.heappop(busy_until)
+        if len(busy_until) >= timer_capacity:
+            continue
+        heapq.heappush(busy_until, strike_time + (duration_ms + timer_margin_ms) * units_per_ms)
+        envelopes[strike_index] = {
+            "hold_pwm": events[run[1]]["pwm"] if len(run) == 3 else 0,
+            "strike_ms": strike_ms,
+            "duration_ms": duration_ms,
+        }
+        folded_indices.update(run[1:])
+
+    stream_items = []
+    previous_times = {key: 0 for key in time_keys}
+    for index, event in enumerate(events):
+        if index in folded_indices:
+            continue
+        item = {key: absolute_times[key][index] - previous_times[key] for key in time_keys}
+        item["channel"] = event["channel"]
+        item["pwm"] = event["pwm"]
+        item.update(envelopes.get(index, {}))
+        stream_items.append(item)
+        previous_times = {key: absolute_times[key][index] for key in time_keys}
+    return stream_items, len(envelopes)
+
+
 def convert_to_delta_events(timeline):
     delta_events = []
     previous_time = 0
@@ -2604,12 +4334,16 @@ def list_serial_ports():
 
 
 def parse_ready_response(response):
-    match = re.match(r"^READY\s+(?P<version>\d+)\s+BUFFER\s+(?P<capacity>\d+)$", response.strip())
+    match = re.match(
+        r"^READY\s+(?P<version>\d+)\s+BUFFER\s+(?P<capacity>\d+)(?:\s+NOTES\s+(?P<note_timers>\d+))?$",
+        response.strip(),
+    )
     if not match:
         raise RuntimeError(f"Unexpected Arduino handshake: {response}")
     return {
         "protocol_version": int(match.group("version")),
         "buffer_capacity": int(match.group("capacity")),
+        "note_timers": int(match.group("note_timers") or 0),
     }
 
 
@@ -2696,7 +4430,7 @@ def parse_status_response(response):
 
     fields = parse_runtime_key_values(response)
     fields["state"] = parts[1]
-    for key in ("recv", "played", "buffered", "free", "total"):
+    for key in ("recv", "played", "buffered", "free", "total", "dropped", "softened"):
         if key in fields:
             fields[key] = int(fields[key])
     return fields
@@ -2714,6 +4448,82 @@ def read_serial_response(connection, deadline):
     raise TimeoutError("Timed out waiting for a response from the Arduino runtime.")
 
 
+def parse_perf_response(response):
+    """Parse `PERF win=.. loops=.. loop=avg/max ... pwm=n/avg/max late=n/avg/max` into numbers."""
+    fields = parse_runtime_key_values(response)
+    if not response.startswith("PERF ") or "loop" not in fields:
+        raise RuntimeError(f"Unexpected PERF response: {response}")
+
+    def split_values(key, count):
+        values = [int(value) for value in fields.get(key, "").split("/") if value]
+        return values + [0] * (count - len(values))
+
+    loop_avg, loop_max = split_values("loop", 2)
+    poll_avg, poll_max = split_values("poll", 2)
+    playback_avg, playback_max = split_values("play", 2)
+    failsafe_avg, failsafe_max = split_values("fs", 2)
+    pwm_writes, pwm_avg, pwm_max = split_values("pwm", 3)
+    if "/" in fields.get("late", ""):
+        dispatches, late_avg, late_max = split_values("late", 3)
+    else:
+        # Protocol 9 reported only the worst lateness.
+        dispatches, late_avg, late_max = 0, 0, int(fields.get("late", 0))
+    return {
+        "window_ms": int(fields.get("win", 0)),
+        "loops": int(fields.get("loops", 0)),
+        "loop_avg_us": loop_avg,
+        "loop_max_us": loop_max,
+        "poll_avg_us": poll_avg,
+        "poll_max_us": poll_max,
+        "playback_avg_us": playback_avg,
+        "playback_max_us": playback_max,
+        "failsafe_avg_us": failsafe_avg,
+        "failsafe_max_us": failsafe_max,
+        "pwm_writes": pwm_writes,
+        "pwm_avg_us": pwm_avg,
+        "pwm_max_us": pwm_max,
+        "dispatches": dispatches,
+        "late_avg_us": late_avg,
+        "late_max_us": late_max,
+    }
+
+
+def record_perf_sample(perf_samples, response, started_at):
+    sample = {"elapsed_ms": int(round((time.time() - started_at) * 1000.0))}
+    sample.update(parse_perf_response(response))
+    perf_samples.append(sample)
+
+
+def write_perf_samples(perf_samples, path=None):
+    with Path(path or STREAM_PERF_PATH).open("w", newline="", encoding="utf-8") as handle:
+        writer = csv.DictWriter(handle, fieldnames=PERF_SAMPLE_FIELDS)
+        writer.writeheader()
+        writer.writerows(perf_samples)
+
+
+def summarize_perf_samples(perf_samples):
+    if not perf_samples:
+        return None
+    total_loops = sum(sample["loops"] for sample in perf_samples)
+    total_writes = sum(sample["pwm_writes"] for sample in perf_samples)
+    total_dispatches = sum(sample["dispatches"] for sample in perf_samples)
+    return {
+        "samples": len(perf_samples),
+        "loop_avg_us": round(
+            sum(sample["loop_avg_us"] * sample["loops"] for sample in perf_samples) / max(1, total_loops), 1
+        ),
+        "loop_max_us": max(sample["loop_max_us"] for sample in perf_samples),
+        "pwm_avg_us": round(
+            sum(sample["pwm_avg_us"] * sample["pwm_writes"] for sample in perf_samples) / max(1, total_writes), 1
+        ),
+        "pwm_max_us": max(sample["pwm_max_us"] for sample in perf_samples),
+        "late_avg_us": round(
+            sum(sample["late_avg_us"] * sample["dispatches"] for sample in perf_samples) / max(1, total_dispatches), 1
+        ),
+        "late_max_us": max(sample["late_max_us"] for sample in perf_samples),
+    }
+
+
 def send_serial_command(connection, command, expected_prefixes, timeout_seconds=3.0):
     connection.write((command + "\n").encode("ascii"))
     connection.flush()
@@ -2732,15 +4542,97 @@ def send_serial_command(connection, command, expected_prefixes, timeout_seconds=
             return response
 
 
-def send_event_chunk(connection, events, start_index, chunk_size):
+def format_stream_command(event, time_key="dt_ms"):
+    if "duration_ms" in event:
+        return (
+            f"NOTE {event[time_key]} {event['channel']} {event['pwm']} "
+            f"{event['hold_pwm']} {event['strike_ms']} {event['duration_ms']}"
+        )
+    return f"EVENT {event[time_key]} {event['channel']} {event['pwm']}"
+
+
+def send_event_chunk(connection, events, start_index, chunk_size, time_key="dt_ms"):
     end_index = min(len(events), start_index + chunk_size)
-    for event in events[start_index:end_index]:
-        command = f"EVENT {event['dt_ms']} {event['channel']} {event['pwm']}"
-        connection.write((command + "\n").encode("ascii"))
+    lines = [format_stream_command(event, time_key) + "\n" for event in events[start_index:end_index]]
+    connection.write("".join(lines).encode("ascii"))
     connection.flush()
     return end_index
 
 
+def write_paced(connection, data, window_bytes=RUNTIME_RX_BUFFER_BYTES):
+    """Write newline-terminated lines with at most `window_bytes` unread on the runtime.
+
+    The runtime has no serial flow control and its loop may not read for a
+    while during a song, so each line-aligned slice ends with a PING and the
+    next slice waits for its PONG. The runtime answers a PING only after
+    reading every byte before it, so the receive buffer never overflows.
+    """
+    data = bytes(data)
+    slice_limit = window_bytes - len(b"PING\n")
+    start = 0
+    while start < len(data):
+        end = len(data)
+        if end - start > slice_limit:
+            end = data.rfind(b"\n", start, start + slice_limit) + 1
+            if end <= start:
+                raise ValueError(f"A runtime line is longer than the {window_bytes}-byte serial window.")
+        connection.write(data[start:end])
+        send_serial_command(connection, "PING", ("PONG",), timeout_seconds=2.0)
+        start = end
+
+
+class EncodedEventStream:
+    """A song's EVENT/NOTE lines, encoded once into one bytes buffer.
+
+    `offsets[i]` is where line `i` starts and `offsets[len(events)]` is the end,
+    so any run of lines is a memoryview slice of the buffer. A refill is built
+    from runs (see `StreamQos.next_chunk()`) and goes out in one write, or in
+    PING-paced slices above the base baud rate; only a line whose delay changed
+    because QoS dropped the item before it is re-encoded.
+    """
+
+    def __init__(self, events, time_key):
+        self.events = events
+        self.time_key = time_key
+        encoded = bytearray()
+        self.offsets = array.array("I", [0])
+        for event in events:
+            encoded += format_stream_command(event, time_key).encode("ascii")
+            encoded += b"\n"
+            self.offsets.append(len(encoded))
+        self.buffer = memoryview(bytes(encoded))
+
+    def __len__(self):
+        return len(self.events)
+
+    def lines(self, start_index, end_index):
+        return self.buffer[self.offsets[start_index] : self.offsets[end_index]]
+
+    def encode_runs(self, runs):
+        pieces = []
+        for start_index, end_index, carried_time in runs:
+            if carried_time:
+                event = dict(self.events[start_index])
+                for key, value in carried_time.items():
+                    event[key] += value
+                pieces.append((format_stream_command(event, self.time_key) + "\n").encode("ascii"))
+                start_index += 1
+            if start_index < end_index:
+                pieces.append(self.lines(start_index, end_index))
+        if len(pieces) == 1:
+            return pieces[0]
+        return b"".join(pieces)
+
+    def write_runs(self, connection, runs, paced=False):
+        if not runs:
+            return
+        if paced:
+            write_paced(connection, self.encode_runs(runs))
+            return
+        connection.write(self.encode_runs(runs))
+        connection.flush()
+
+
 def playback_control_pause_requested(playback_control):
     if playback_control is None:
         return False
@@ -2790,8 +4682,17 @@ def handle_playback_control(connection, playback_control, paused):
     return None, paused
 
 
-def wait_for_playback_done(connection, timeout_seconds, playback_control=None, paused=False):
+def wait_for_playback_done(
+    connection,
+    timeout_seconds,
+    playback_control=None,
+    paused=False,
+    perf_poll_ms=0,
+    perf_samples=None,
+    perf_started_at=None,
+):
     deadline = time.time() + timeout_seconds
+    next_perf_at = time.time() + perf_poll_ms / 1000.0
     while True:
         control_action, paused = handle_playback_control(connection, playback_control, paused)
         if control_action is not None:
@@ -2800,6 +4701,11 @@ def wait_for_playback_done(connection, timeout_seconds, playback_control=None, p
             time.sleep(0.05)
             deadline += 0.05
             continue
+        if perf_poll_ms > 0 and time.time() >= next_perf_at:
+            # The reply is picked up below so PLAYBACK_DONE is never swallowed.
+            connection.write(b"PERF RESET\n")
+            connection.flush()
+            next_perf_at = time.time() + perf_poll_ms / 1000.0
 
         try:
             response = read_serial_response(connection, min(deadline, time.time() + 0.2))
@@ -2809,31 +4715,501 @@ def wait_for_playback_done(connection, timeout_seconds, playback_control=None, p
             continue
         if response.startswith("ERROR "):
             raise RuntimeError(f"Arduino runtime returned an error while waiting for playback completion: {response}")
+        if response.startswith("PERF ") and perf_samples is not None:
+            record_perf_sample(perf_samples, response, perf_started_at)
+            continue
         if response.startswith("OK PLAYBACK_DONE"):
             return response, None, paused
 
 
-def stream_song_to_arduino(payload, deployment_config, playback_control=None):
-    """Stream generated events to the fixed Arduino runtime over serial.
+class StreamQos:
+    """Thin not-yet-sent stream items while the runtime's buffer runs low.
 
-    The Uno cannot store a large song in RAM, so Python fills the Arduino's small
-    event buffer, starts playback, then keeps topping up the buffer while the
-    sketch plays earlier events.
+    The streamer times each refill (STATUS, chunk, COMMIT) with
+    `record_refill_cycle()` and passes the runtime's played count to `update()`
+    after every STATUS. The song time still queued ahead of the runtime is
+    compared with how long a refill takes: below `STREAM_QOS_LOW_WATER_CYCLES` cycles (or
+    `low_water_ms`, whichever is longer) the level steps up, first dropping hold
+    refreshes and then inner-voice notes. After `STREAM_QOS_CALM_CYCLES` cycles
+    above twice that mark it steps back down. `next_chunk()` applies the current
+    level; a dropped item's delay moves onto the next item that is sent. At full
+    fidelity a chunk is one run of events and the per-channel state is only
+    caught up when thinning starts.
     """
-    serial_config = deployment_config.get("serial_runtime", {})
-    if not serial_config.get("enabled", True):
+
+    def __init__(self, events, note_for_channel, low_water_ms, refresh_max_gap_ms, enabled=True):
+        self.events = events
+        self.note_for_channel = note_for_channel
+        self.low_water_ms = max(0, int(low_water_ms))
+        self.refresh_max_gap_ms = max(0, int(refresh_max_gap_ms))
+        self.enabled = enabled
+        self.time_keys = [key for key in ("dt_ms", "dt_us") if events and key in events[0]]
+
+        self.event_times_ms = []
+        time_ms = 0
+        for event in events:
+            time_ms += event["dt_ms"]
+            self.event_times_ms.append(time_ms)
+        self.next_write_ms = [None] * len(events)
+        next_write_by_channel = {}
+        for index in range(len(events) - 1, -1, -1):
+            channel = events[index]["channel"]
+            self.next_write_ms[index] = next_write_by_channel.get(channel)
+            next_write_by_channel[channel] = self.event_times_ms[index]
+        self.strike_notes_at = {}
+        for index, event in enumerate(events):
+            note = note_for_channel.get(event["channel"])
+            if event["pwm"] > 0 and note is not None:
+                self.strike_notes_at.setdefault(self.event_times_ms[index], []).append(note)
+
+        self.level = 0
+        self.calm_cycles = 0
+        self.cycle_ms = None
+        self.sent_indices = array.array("I")
+        self.state_synced_to = 0
+        self.carried_time = {key: 0 for key in self.time_keys}
+        # Kept stream state: when each channel's output ends, its last PWM and
+        # last write time, and channels whose dropped note is still running.
+        self.channel_release_ms = {}
+        self.channel_pwm = {}
+        self.channel_written_ms = {}
+        self.muted_channels = set()
+        self.dropped_counts = {"refresh": 0, "inner_voice": 0}
+        self.interventions = []
+
+    def dropped_count(self):
+        return sum(self.dropped_counts.values())
+
+    def record_refill_cycle(self, cycle_ms):
+        self.cycle_ms = cycle_ms if self.cycle_ms is None else 0.7 * self.cycle_ms + 0.3 * cycle_ms
+
+    def low_water_mark_ms(self):
+        return max(self.low_water_ms, STREAM_QOS_LOW_WATER_CYCLES * (self.cycle_ms or 0.0))
+
+    def song_position_ms(self, played_count):
+        played_count = min(played_count, len(self.sent_indices))
+        return self.event_times_ms[self.sent_indices[played_count - 1]] if played_count > 0 else 0
+
+    def buffered_ms(self, played_count):
+        """Song time queued on the runtime after `played_count` items have played."""
+        if not self.sent_indices:
+            return 0
+        return self.event_times_ms[self.sent_indices[-1]] - self.song_position_ms(played_count)
+
+    def upcoming_span_ms(self, start_index, count):
+        """Song time covered by the next `count` unsent events from `start_index`."""
+        if start_index >= len(self.events):
+            return None
+        end_index = min(len(self.events), start_index + count) - 1
+        previous_ms = self.event_times_ms[start_index - 1] if start_index > 0 else 0
+        return self.event_times_ms[end_index] - previous_ms
+
+    def update(self, played_count):
+        """Re-plan the QoS level from the runtime's played count after a STATUS."""
+        if not self.enabled or self.cycle_ms is None or not self.sent_indices:
+            return self.level
+
+        position_ms = self.song_position_ms(played_count)
+        horizon_ms = self.buffered_ms(played_count)
+        low_water_ms = self.low_water_mark_ms()
+        level = self.level
+        if horizon_ms < low_water_ms:
+            self.calm_cycles = 0
+            level = min(self.level + 1, len(STREAM_QOS_LEVELS) - 1)
+        elif horizon_ms >= 2 * low_water_ms and self.level > 0:
+            self.calm_cycles += 1
+            if self.calm_cycles >= STREAM_QOS_CALM_CYCLES:
+                self.calm_cycles = 0
+                level = self.level - 1
+        else:
+            self.calm_cycles = 0
+
+        if level != self.level:
+            self.interventions.append(
+                {
+                    "song_ms": position_ms,
+                    "level": STREAM_QOS_LEVELS[level],
+                    "previous_level": STREAM_QOS_LEVELS[self.level],
+                    "horizon_ms": horizon_ms,
+                    "refill_cycle_ms": round(self.cycle_ms, 1),
+                }
+            )
+            self.level = level
+        return self.level
+
+    def is_sounding(self, channel, time_ms):
+        if channel not in self.channel_release_ms:
+            return False
+        release_ms = self.channel_release_ms[channel]
+        return release_ms is None or release_ms > time_ms
+
+    def is_refresh(self, index, event):
+        # A repeat of the channel's PWM that the stream can skip without the
+        # channel going quiet for longer than refresh_max_gap_ms.
+        channel = event["channel"]
+        if event["pwm"] == 0 or "duration_ms" in event or self.channel_pwm.get(channel) != event["pwm"]:
+            return False
+        if not self.is_sounding(channel, self.event_times_ms[index]):
+            return False
+        next_write_ms = self.next_write_ms[index]
+        return next_write_ms is not None and next_write_ms - self.channel_written_ms[channel] <= self.refresh_max_gap_ms
+
+    def is_inner_voice(self, index, event):
+        # A strike with a lower and a higher note sounding or struck at the same time.
+        note = self.note_for_channel.get(event["channel"])
+        time_ms = self.event_times_ms[index]
+        if note is None or event["pwm"] == 0 or self.is_sounding(event["channel"], time_ms):
+            return False
+        other_notes = list(self.strike_notes_at.get(time_ms, ()))
+        for channel in self.channel_release_ms:
+            if self.is_sounding(channel, time_ms):
+                other_notes.append(self.note_for_channel.get(channel))
+        return any(other is not None and other < note for other in other_notes) and any(
+            other is not None and other > note for other in other_notes
+        )
+
+    def drop_reason(self, index, event):
+        channel = event["channel"]
+        if channel in self.muted_channels:
+            if event["pwm"] == 0:
+                self.muted_channels.discard(channel)
+            return "inner_voice"
+        if self.level >= 1 and self.is_refresh(index, event):
+            return "refresh"
+        if self.level >= 2 and self.is_inner_voice(index, event):
+            if "duration_ms" not in event:
+                self.muted_channels.add(channel)
+            return "inner_voice"
         return None
 
-    port = choose_serial_port(serial_config)
-    baud_rate = int(serial_config.get("baud_rate", 115200))
-    startup_wait_ms = int(serial_config.get("startup_wait_ms", 2500))
-    wait_for_finish = bool(serial_config.get("wait_for_finish", True))
-    status_poll_ms = int(serial_config.get("status_poll_ms", 25))
-    events = payload["events"]
+    def track_kept_event(self, index, event):
+        channel = event["channel"]
+        time_ms = self.event_times_ms[index]
+        self.channel_pwm[channel] = event["pwm"]
+        self.channel_written_ms[channel] = time_ms
+        if event["pwm"] == 0:
+            self.channel_release_ms.pop(channel, None)
+        else:
+            self.channel_release_ms[channel] = time_ms + event["duration_ms"] if "duration_ms" in event else None
+
+    def next_chunk(self, start_index, slot_count):
+        """Pick up to `slot_count` items to send from `start_index`.
+
+        Returns `(runs, item_count, next_index)`. Each run is
+        `(start, end, carried_time)`: events `start` to `end - 1` are sent as
+        they are, except that the first one also takes on `carried_time`
+        (a dict of delays from dropped items, or None).
+        """
+        end_limit = len(self.events)
+        if self.level == 0 and not self.muted_channels and not any(self.carried_time.values()):
+            end_index = min(end_limit, start_index + slot_count)
+            self.sent_indices.extend(range(start_index, end_index))
+            return ([(start_index, end_index, None)] if end_index > start_index else []), end_index - start_index, end_index
+
+        # Every event a full-fidelity chunk skipped over was sent, so catch the
+        # channel state up on those before judging what to drop.
+        for index in range(self.state_synced_to, start_index):
+            self.track_kept_event(index, self.events[index])
+
+        runs = []
+        item_count = 0
+        index = start_index
+        while index < end_limit and item_count < slot_count:
+            event = self.events[index]
+            reason = self.drop_reason(index, event)
+            if reason is not None:
+                self.dropped_counts[reason] += 1
+                for key in self.time_keys:
+                    self.carried_time[key] += event[key]
+                index += 1
+                continue
 
-    playback_done_response = None
-    control_action = None
-    paused = False
+            if any(self.carried_time.values()):
+                runs.append([index, index + 1, self.carried_time])
+                self.carried_time = {key: 0 for key in self.time_keys}
+            elif runs and runs[-1][1] == index:
+                runs[-1][1] = index + 1
+            else:
+                runs.append([index, index + 1, None])
+            self.track_kept_event(index, event)
+            self.sent_indices.append(index)
+            item_count += 1
+            index += 1
+        self.state_synced_to = index
+        return [tuple(run) for run in runs], item_count, index
+
+
+def link_ms_per_byte(baud_rate, round_trip_ms=None):
+    """Serial time per payload byte at `baud_rate` (10 bits per byte).
+
+    With `round_trip_ms`, writes are paced as in write_paced(): every slice of
+    up to RUNTIME_RX_BUFFER_BYTES minus its PING also waits one round trip.
+    """
+    ms_per_byte = 10000.0 / baud_rate
+    if round_trip_ms is None:
+        return ms_per_byte
+    slice_payload = RUNTIME_RX_BUFFER_BYTES - len(b"PING\n")
+    return (RUNTIME_RX_BUFFER_BYTES * ms_per_byte + round_trip_ms) / slice_payload
+
+
+def find_refill_shortfalls(encoded_stream, buffer_capacity, baud_rate, round_trip_ms=None):
+    """Find bursts that run the runtime's buffer dry even when it starts full.
+
+    While a burst plays, every event past the first `buffer_capacity` has to
+    cross the serial link before its due time. A burst falls short when those
+    lines take longer to send at `baud_rate` (10 bits per byte, plus a PING
+    round trip per slice when `round_trip_ms` is given for paced writes) than
+    the burst lasts. This ignores STATUS/COMMIT round trips, so every burst it
+    reports will underrun. Returns one dict per burst, worst shortfall first.
+    """
+    events = encoded_stream.events
+    if len(events) <= buffer_capacity:
+        return []
+    ms_per_byte = link_ms_per_byte(baud_rate, round_trip_ms)
+    event_times_ms = []
+    send_cost_ms = []
+    time_ms = 0
+    for index, event in enumerate(events):
+        time_ms += event["dt_ms"]
+        event_times_ms.append(time_ms)
+        send_cost_ms.append(encoded_stream.offsets[index + 1] * ms_per_byte)
+
+    # For a burst from event a to event b the shortfall is
+    # (cost[b] - cost[a + capacity - 1]) - (time[b] - time[a]); keep the best a so far.
+    shortfalls = []
+    best_start = None
+    best_value = None
+    for end_index in range(buffer_capacity, len(events)):
+        start_index = end_index - buffer_capacity
+        start_value = event_times_ms[start_index] - send_cost_ms[start_index + buffer_capacity - 1]
+        if best_value is None or start_value > best_value:
+            best_start, best_value = start_index, start_value
+        shortfall_ms = send_cost_ms[end_index] - event_times_ms[end_index] + best_value
+        if shortfall_ms <= 0:
+            continue
+        # Overlapping short windows are one burst.
+        if shortfalls and best_start <= shortfalls[-1]["end_index"]:
+            burst = shortfalls[-1]
+            burst["start_index"] = min(burst["start_index"], best_start)
+            burst["end_index"] = end_index
+            burst["shortfall_ms"] = max(burst["shortfall_ms"], shortfall_ms)
+        else:
+            shortfalls.append({"start_index": best_start, "end_index": end_index, "shortfall_ms": shortfall_ms})
+    return [
+        {
+            "start_ms": event_times_ms[burst["start_index"]],
+            "end_ms": event_times_ms[burst["end_index"]],
+            "event_count": burst["end_index"] - burst["start_index"] + 1,
+            "shortfall_ms": round(burst["shortfall_ms"], 1),
+        }
+        for burst in sorted(shortfalls, key=lambda burst: -burst["shortfall_ms"])
+    ]
+
+
+def report_refill_shortfalls(reporter, refill_shortfalls, buffer_capacity, baud_rate):
+    for burst in refill_shortfalls[:REFILL_SHORTFALL_REPORT_LIMIT]:
+        report_line(
+            reporter,
+            f"Warning: the {buffer_capacity}-slot runtime buffer cannot cover the "
+            f"{burst['event_count']}-event burst at {burst['start_ms'] / 1000.0:.2f}-"
+            f"{burst['end_ms'] / 1000.0:.2f} s even when full; it runs {burst['shortfall_ms']} ms short "
+            f"at {baud_rate} baud.",
+        )
+    if len(refill_shortfalls) > REFILL_SHORTFALL_REPORT_LIMIT:
+        report_line(
+            reporter,
+            f"... and {len(refill_shortfalls) - REFILL_SHORTFALL_REPORT_LIMIT} more short bursts "
+            "(see refill_shortfalls in the stream manifest).",
+        )
+
+
+def plan_refill_wait_ms(stream_qos, played_count, next_index, free_slots, buffer_capacity, status_poll_ms):
+    """How long the streamer can wait before refilling; 0 means refill now.
+
+    The planner works in song time rather than slots. It refills at once when
+    less than twice the QoS low-water mark is queued, when half the buffer is
+    free, or when the next full buffer of events would cover less than that mark
+    (a dense burst is coming). Otherwise it sleeps until the queued time nears
+    the mark, so sparse passages go out in fewer, larger chunks.
+    """
+    if free_slots <= 0:
+        return status_poll_ms
+    lead_ms = 2 * stream_qos.low_water_mark_ms()
+    buffered_ms = stream_qos.buffered_ms(played_count)
+    if buffered_ms <= lead_ms or free_slots * 2 >= buffer_capacity:
+        return 0
+    upcoming_span_ms = stream_qos.upcoming_span_ms(next_index, buffer_capacity)
+    if upcoming_span_ms is not None and upcoming_span_ms < lead_ms:
+        return 0
+    return max(status_poll_ms, min(buffered_ms - lead_ms, REFILL_MAX_IDLE_MS))
+
+
+def load_serial_baud_cache():
+    try:
+        with SERIAL_BAUD_CACHE_PATH.open("r", encoding="utf-8") as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return {}
+
+
+def remember_serial_baud(port, proposed_baud, baud_rate):
+    ports = load_serial_baud_cache()
+    ports[port] = {"proposed_baud": proposed_baud, "baud_rate": baud_rate}
+    SERIAL_BAUD_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    SERIAL_BAUD_CACHE_PATH.write_text(json.dumps(ports, indent=2), encoding="utf-8")
+
+
+def probe_serial_link(connection):
+    """Check the link at its current rate while the runtime is busy playing.
+
+    A short song of releases (no solenoid moves) keeps the runtime's loop
+    dispatching while Python sends back-to-back bursts of PINGs that fill its
+    receive buffer. Returns True only if every PING gets a clean PONG. Leaves
+    the runtime stopped and cleared.
+    """
+    probe_lines = []
+    for _ in range(BAUD_PROBE_CHORDS):
+        for channel in range(BAUD_PROBE_CHORD_SIZE):
+            probe_lines.append(f"EVENT {BAUD_PROBE_CHORD_GAP_MS if channel == 0 else 0} {channel} 0\n")
+    burst = b"PING\n" * (RUNTIME_RX_BUFFER_BYTES // len(b"PING\n"))
+    try:
+        send_serial_command(connection, "PING", ("PONG",), timeout_seconds=0.3)
+        send_serial_command(connection, f"BEGIN {len(probe_lines)}", ("OK BEGIN",), timeout_seconds=0.5)
+        write_paced(connection, "".join(probe_lines).encode("ascii"))
+        send_serial_command(connection, "COMMIT", ("OK ACCEPTED",), timeout_seconds=0.5)
+        send_serial_command(connection, "PLAY", ("OK PLAYING",), timeout_seconds=0.5)
+        for _ in range(BAUD_PROBE_BURSTS):
+            connection.write(burst)
+            connection.flush()
+            deadline = time.time() + 0.5
+            pongs = 0
+            while pongs < burst.count(b"\n"):
+                response = read_serial_response(connection, deadline)
+                if response == "PONG":
+                    pongs += 1
+                elif not response.startswith("OK "):
+                    return False
+        send_serial_command(connection, "STOP", ("OK STOPPED",), timeout_seconds=0.5)
+        send_serial_command(connection, "CLEAR", ("OK CLEARED",), timeout_seconds=0.5)
+    except (TimeoutError, RuntimeError):
+        return False
+    return True
+
+
+def measure_ping_round_trip_ms(connection, samples=PACED_ROUND_TRIP_SAMPLES):
+    """Median PING/PONG round trip on the open connection, in milliseconds."""
+    round_trips_ms = []
+    for _ in range(samples):
+        started_at = time.perf_counter()
+        send_serial_command(connection, "PING", ("PONG",), timeout_seconds=0.5)
+        round_trips_ms.append((time.perf_counter() - started_at) * 1000.0)
+    return statistics.median(round_trips_ms)
+
+
+def negotiate_serial_baud(connection, port, base_baud, fast_baud):
+    """Move an open runtime connection from `base_baud` to `fast_baud` if the link carries it.
+
+    After `OK BAUD` both sides switch and Python runs probe_serial_link() at
+    the new rate. Writes at the new rate are paced by PING round trips, so it
+    is kept only if the measured round trip still moves more bytes per second
+    than unpaced `base_baud`. Otherwise Python sends `BAUD <base_baud>` at the
+    new rate, because the runtime may hear Python even when its replies come
+    back garbled, and checks the base rate with PING. If that fails too, it
+    waits out the runtime's own fallback and checks the link with HELLO. The
+    outcome is remembered per port, so a rate that failed on a port is not
+    proposed there again until `fast_baud` changes. Returns the baud rate now
+    in use.
+    """
+    remembered = load_serial_baud_cache().get(port, {})
+    if remembered.get("proposed_baud") == fast_baud and remembered.get("baud_rate") != fast_baud:
+        return base_baud
+
+    try:
+        send_serial_command(connection, f"BAUD {fast_baud}", ("OK BAUD",), timeout_seconds=2.0)
+    except RuntimeError:
+        # ERROR BAD_BAUD: this runtime does not offer the rate.
+        remember_serial_baud(port, fast_baud, base_baud)
+        return base_baud
+
+    switched_at = time.time()
+    connection.baudrate = fast_baud
+    for _ in range(BAUD_VERIFY_ATTEMPTS):
+        connection.reset_input_buffer()
+        if probe_serial_link(connection):
+            try:
+                round_trip_ms = measure_ping_round_trip_ms(connection)
+            except (TimeoutError, RuntimeError):
+                continue
+            if link_ms_per_byte(fast_baud, round_trip_ms) < link_ms_per_byte(base_baud):
+                remember_serial_baud(port, fast_baud, fast_baud)
+                return fast_baud
+            break
+
+    remember_serial_baud(port, fast_baud, base_baud)
+    for _ in range(BAUD_VERIFY_ATTEMPTS):
+        connection.baudrate = fast_baud
+        connection.write(f"STOP\nBAUD {base_baud}\n".encode("ascii"))
+        connection.flush()
+        # The runtime sends its OK BAUD at the fast rate before it switches.
+        time.sleep(0.05)
+        connection.baudrate = base_baud
+        connection.reset_input_buffer()
+        try:
+            send_serial_command(connection, "PING", ("PONG",), timeout_seconds=0.3)
+        except TimeoutError:
+            continue
+        return base_baud
+
+    time.sleep(max(0.0, switched_at + RUNTIME_BAUD_CONFIRM_SECONDS + 0.1 - time.time()))
+    connection.reset_input_buffer()
+    send_serial_command(connection, "HELLO", ("READY",), timeout_seconds=2.0)
+    return base_baud
+
+
+def build_late_strike_command(serial_config):
+    """Return the runtime's LATE command for the configured late-strike policy, or None when it is off."""
+    limit_ms = max(0, int(serial_config.get("late_strike_limit_ms", 0)))
+    if limit_ms == 0:
+        return None
+    action = str(serial_config.get("late_strike_action", "drop")).strip().lower()
+    if action not in LATE_STRIKE_ACTIONS:
+        raise ValueError(
+            f"serial_runtime.late_strike_action must be one of {', '.join(LATE_STRIKE_ACTIONS)}, not {action!r}."
+        )
+    if action == "drop":
+        return f"LATE {limit_ms} DROP"
+    soften_percent = int(serial_config.get("late_strike_soften_percent", 60))
+    if not 0 <= soften_percent <= 100:
+        raise ValueError("serial_runtime.late_strike_soften_percent must be between 0 and 100.")
+    return f"LATE {limit_ms} SOFT {soften_percent}"
+
+
+def stream_song_to_arduino(payload, deployment_config, playback_control=None, reporter=None):
+    """Stream generated events to the fixed Arduino runtime over serial.
+
+    The Uno cannot store a large song in RAM, so Python fills the Arduino's small
+    event buffer, starts playback, then keeps topping up the buffer while the
+    sketch plays earlier events.
+    """
+    serial_config = deployment_config.get("serial_runtime", {})
+    if not serial_config.get("enabled", True):
+        return None
+
+    port = choose_serial_port(serial_config)
+    baud_rate = int(serial_config.get("baud_rate", 115200))
+    fast_baud_rate = int(serial_config.get("fast_baud_rate", 0))
+    startup_wait_ms = int(serial_config.get("startup_wait_ms", 2500))
+    wait_for_finish = bool(serial_config.get("wait_for_finish", True))
+    status_poll_ms = int(serial_config.get("status_poll_ms", 25))
+    perf_poll_ms = max(0, int(serial_config.get("perf_poll_ms", 0)))
+    late_strike_command = build_late_strike_command(serial_config)
+    events = payload["events"]
+
+    playback_done_response = None
+    status_fields = {}
+    perf_samples = []
+    control_action = None
+    paused = False
     with serial.Serial(port=port, baudrate=baud_rate, timeout=0.5) as connection:
         try:
             time.sleep(startup_wait_ms / 1000.0)
@@ -2842,17 +5218,86 @@ def stream_song_to_arduino(payload, deployment_config, playback_control=None):
 
             ready_response = send_serial_command(connection, "HELLO", ("READY",), timeout_seconds=4.0)
             ready_info = parse_ready_response(ready_response)
+            link_baud_rate = baud_rate
+            if fast_baud_rate > baud_rate and ready_info["protocol_version"] >= BAUD_NEGOTIATION_PROTOCOL_VERSION:
+                link_baud_rate = negotiate_serial_baud(connection, port, baud_rate, fast_baud_rate)
+            # Microsecond songs fall back to their millisecond deltas on older runtimes.
+            time_key = "dt_ms"
+            if events and "dt_us" in events[0] and ready_info["protocol_version"] >= MICROSECOND_PROTOCOL_VERSION:
+                time_key = "dt_us"
+            pedal_channel = get_configured_pedal_channel(payload.get("config", {}).get("mapping", {}))
+            # Newer runtimes keep the pedal's hold alive themselves, so its refresh writes stay home.
+            pedal_refresh_ms = 0
+            dropped_refresh_count = 0
+            if pedal_channel is not None and ready_info["protocol_version"] >= RUNTIME_REFRESH_PROTOCOL_VERSION:
+                pedal_refresh_ms = max(0, int(get_pedal_config(payload.get("config", {})).get("hold_refresh_ms", 0)))
+                if pedal_refresh_ms > 0:
+                    events, dropped_refresh_count = drop_runtime_refresh_events(events, pedal_channel)
+            # Runtimes that advertise NOTES timers expand strike/hold/release envelopes themselves.
+            note_envelope_count = 0
+            if serial_config.get("note_envelopes", True) and ready_info["note_timers"] > 0:
+                events, note_envelope_count = build_note_envelope_events(
+                    events,
+                    time_key,
+                    ready_info["note_timers"],
+                    timer_margin_ms=int(serial_config.get("note_timer_margin_ms", 10)),
+                    skip_channels=() if pedal_channel is None else (pedal_channel,),
+                )
+            begin_command = f"BEGIN {len(events)}" + (" US" if time_key == "dt_us" else "")
             send_serial_command(connection, "STOP", ("OK STOPPED",), timeout_seconds=2.0)
             send_serial_command(connection, "CLEAR", ("OK CLEARED",), timeout_seconds=2.0)
-            begin_response = send_serial_command(connection, f"BEGIN {len(events)}", ("OK BEGIN",), timeout_seconds=2.0)
+            begin_response = send_serial_command(connection, begin_command, ("OK BEGIN",), timeout_seconds=2.0)
             begin_fields = parse_runtime_key_values(begin_response)
             buffer_capacity = int(begin_fields.get("capacity", ready_info["buffer_capacity"]))
-
+            if time_key == "dt_us" and begin_fields.get("unit") != "us":
+                raise RuntimeError(f"Arduino runtime did not accept microsecond timing: {begin_response}")
+            if pedal_refresh_ms > 0:
+                send_serial_command(
+                    connection,
+                    f"REFRESH {pedal_channel} {pedal_refresh_ms}",
+                    ("OK REFRESH",),
+                    timeout_seconds=2.0,
+                )
+            if ready_info["protocol_version"] < LATE_STRIKE_PROTOCOL_VERSION:
+                late_strike_command = None
+            if late_strike_command is not None:
+                send_serial_command(connection, late_strike_command, ("OK LATE",), timeout_seconds=2.0)
+
+            note_for_channel = {}
+            for note, channel in payload.get("config", {}).get("mapping", {}).get("note_to_channel", {}).items():
+                note_for_channel[int(channel)] = min(int(note), note_for_channel.get(int(channel), int(note)))
+            stream_qos = StreamQos(
+                events,
+                note_for_channel,
+                low_water_ms=int(serial_config.get("qos_low_water_ms", 150)),
+                refresh_max_gap_ms=int(serial_config.get("qos_refresh_max_gap_ms", 1000)),
+                enabled=bool(serial_config.get("stream_qos", True))
+                and ready_info["protocol_version"] >= STREAM_QOS_PROTOCOL_VERSION,
+            )
+            encoded_stream = EncodedEventStream(events, time_key)
+            # Above the base rate the runtime's receive buffer fills faster than a busy loop reads it.
+            paced_writes = link_baud_rate > baud_rate
+            paced_round_trip_ms = measure_ping_round_trip_ms(connection) if paced_writes else None
+            refill_shortfalls = find_refill_shortfalls(
+                encoded_stream,
+                buffer_capacity,
+                link_baud_rate,
+                round_trip_ms=paced_round_trip_ms,
+            )
+            # Warn before PLAY, while the song can still be stopped and re-planned.
+            report_refill_shortfalls(reporter, refill_shortfalls, buffer_capacity, link_baud_rate)
             sent_event_count = 0
             if events:
-                sent_event_count = send_event_chunk(connection, events, sent_event_count, buffer_capacity)
+                runs, _, sent_event_count = stream_qos.next_chunk(sent_event_count, buffer_capacity)
+                encoded_stream.write_runs(connection, runs, paced=paced_writes)
                 send_serial_command(connection, "COMMIT", ("OK ACCEPTED",), timeout_seconds=2.0)
 
+            if ready_info["protocol_version"] < PERF_PROTOCOL_VERSION:
+                perf_poll_ms = 0
+            if perf_poll_ms > 0:
+                send_serial_command(connection, "PERF RESET", ("PERF",), timeout_seconds=2.0)
+            perf_started_at = time.time()
+            next_perf_at = perf_started_at + perf_poll_ms / 1000.0
             play_response = send_serial_command(connection, "PLAY", ("OK PLAYING",), timeout_seconds=2.0)
             playback_started = getattr(playback_control, "playback_started", None)
             if callable(playback_started):
@@ -2865,16 +5310,32 @@ def stream_song_to_arduino(payload, deployment_config, playback_control=None):
                 control_action, paused = handle_playback_control(connection, playback_control, paused)
                 if control_action is not None:
                     break
+                if perf_poll_ms > 0 and time.time() >= next_perf_at:
+                    perf_response = send_serial_command(connection, "PERF RESET", ("PERF",), timeout_seconds=2.0)
+                    record_perf_sample(perf_samples, perf_response, perf_started_at)
+                    next_perf_at = time.time() + perf_poll_ms / 1000.0
 
+                refill_started_at = time.time()
                 status_response = send_serial_command(connection, "STATUS", ("STATUS",), timeout_seconds=2.0)
                 status_fields = parse_status_response(status_response)
+                played_count = status_fields.get("played", 0)
+                stream_qos.update(played_count)
                 free_slots = int(status_fields.get("free", 0))
-                if free_slots <= 0:
-                    time.sleep(status_poll_ms / 1000.0)
+                wait_ms = plan_refill_wait_ms(
+                    stream_qos, played_count, sent_event_count, free_slots, buffer_capacity, status_poll_ms
+                )
+                if wait_ms > 0:
+                    time.sleep(wait_ms / 1000.0)
                     continue
 
-                sent_event_count = send_event_chunk(connection, events, sent_event_count, free_slots)
+                runs, _, sent_event_count = stream_qos.next_chunk(sent_event_count, free_slots)
+                encoded_stream.write_runs(connection, runs, paced=paced_writes)
                 send_serial_command(connection, "COMMIT", ("OK ACCEPTED",), timeout_seconds=2.0)
+                stream_qos.record_refill_cycle((time.time() - refill_started_at) * 1000.0)
+
+            if control_action is None and stream_qos.dropped_count() > 0:
+                # BEGIN announced every event; tell the runtime the thinned stream is complete.
+                send_serial_command(connection, "END", ("OK END",), timeout_seconds=2.0)
 
             if control_action is None and wait_for_finish:
                 total_runtime_seconds = sum(event["dt_ms"] for event in events) / 1000.0
@@ -2883,6 +5344,13 @@ def stream_song_to_arduino(payload, deployment_config, playback_control=None):
                     timeout_seconds=max(10.0, total_runtime_seconds + 15.0),
                     playback_control=playback_control,
                     paused=paused,
+                    perf_poll_ms=perf_poll_ms,
+                    perf_samples=perf_samples,
+                    perf_started_at=perf_started_at,
+                )
+            if late_strike_command is not None and control_action is None:
+                status_fields = parse_status_response(
+                    send_serial_command(connection, "STATUS", ("STATUS",), timeout_seconds=2.0)
                 )
         except Exception:
             # If Python loses the serial connection mid-song, make a best-effort
@@ -2896,16 +5364,34 @@ def stream_song_to_arduino(payload, deployment_config, playback_control=None):
 
     manifest_payload = {
         "port": port,
-        "baud_rate": baud_rate,
+        "baud_rate": link_baud_rate,
+        "base_baud_rate": baud_rate,
+        "paced_round_trip_ms": None if paced_round_trip_ms is None else round(paced_round_trip_ms, 3),
         "source_midi": payload["source_midi"],
         "output_header": payload["output_header"],
         "protocol_version": ready_info["protocol_version"],
         "buffer_capacity": buffer_capacity,
-        "sent_event_count": sent_event_count,
+        "time_unit": "us" if time_key == "dt_us" else "ms",
+        "note_envelope_count": note_envelope_count,
+        "runtime_refresh_ms": pedal_refresh_ms,
+        "dropped_refresh_count": dropped_refresh_count,
+        "late_strike_policy": late_strike_command,
+        "late_dropped_count": status_fields.get("dropped", 0) if late_strike_command else 0,
+        "late_softened_count": status_fields.get("softened", 0) if late_strike_command else 0,
+        "perf_summary": summarize_perf_samples(perf_samples),
+        "perf_samples_path": str(STREAM_PERF_PATH.relative_to(REPO_ROOT)) if perf_samples else None,
+        "expanded_event_count": len(payload["events"]),
+        "sent_event_count": sent_event_count - stream_qos.dropped_count(),
+        "qos_dropped_refresh_count": stream_qos.dropped_counts["refresh"],
+        "qos_dropped_inner_voice_count": stream_qos.dropped_counts["inner_voice"],
+        "qos_interventions": stream_qos.interventions,
+        "refill_shortfalls": refill_shortfalls,
         "stream_response": play_response,
         "playback_done_response": playback_done_response,
         "control_action": control_action,
     }
+    if perf_samples:
+        write_perf_samples(perf_samples)
     STREAM_MANIFEST_PATH.write_text(json.dumps(manifest_payload, indent=2), encoding="utf-8")
 
     return manifest_payload
@@ -2956,7 +5442,17 @@ def sync_arduino_ide_runtime(header_text, deployment_config):
     }
 
 
-def write_outputs(selected_midi, header_path, delta_events, metadata, config, scheduled_notes, deployment_config):
+def write_outputs(
+    selected_midi,
+    header_path,
+    delta_events,
+    metadata,
+    config,
+    scheduled_notes,
+    deployment_config,
+    update_active_outputs=True,
+    delta_events_us=None,
+):
     HEADER_ARCHIVE_DIR.mkdir(parents=True, exist_ok=True)
     ACTIVE_HEADER_DIR.mkdir(parents=True, exist_ok=True)
     METADATA_DIR.mkdir(parents=True, exist_ok=True)
@@ -2964,21 +5460,26 @@ def write_outputs(selected_midi, header_path, delta_events, metadata, config, sc
     header_text = render_header_text(selected_midi, delta_events, metadata, config)
     header_path.write_text(header_text, encoding="utf-8")
 
+    # Batch exports leave the active header alone; many worker processes
+    # would otherwise race to overwrite the song the Arduino IDE points at.
     active_header_path = ACTIVE_HEADER_DIR / ACTIVE_HEADER_NAME
-    active_header_path.write_text(header_text, encoding="utf-8")
+    if update_active_outputs:
+        active_header_path.write_text(header_text, encoding="utf-8")
+
+    if is_within_path(selected_midi, REPO_ROOT):
+        source_midi_path = str(selected_midi.relative_to(REPO_ROOT))
+    else:
+        source_midi_path = str(selected_midi)
 
     payload = {
         "source_midi": selected_midi.name,
-        "source_midi_path": str(selected_midi.relative_to(REPO_ROOT)),
+        "source_midi_path": source_midi_path,
         "output_header": header_path.name,
         "output_header_path": str(header_path.relative_to(REPO_ROOT)),
         "active_header": ACTIVE_HEADER_NAME,
         "active_header_path": str(active_header_path.relative_to(REPO_ROOT)),
         "config_path": str(CONFIG_PATH.relative_to(REPO_ROOT)),
-        "events": [
-            {"dt_ms": dt_ms, "channel": channel, "pwm": pwm_value}
-            for dt_ms, channel, pwm_value in delta_events
-        ],
+        "events": build_stream_events(delta_events, delta_events_us),
         "scheduled_notes": scheduled_notes,
         "metadata": metadata,
         "config": config,
@@ -2987,6 +5488,9 @@ def write_outputs(selected_midi, header_path, delta_events, metadata, config, sc
     json_path = METADATA_DIR / f"{header_path.stem}.json"
     json_path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
 
+    if not update_active_outputs:
+        return json_path, None, None, None, payload
+
     active_json_path = METADATA_DIR / ACTIVE_METADATA_NAME
     active_json_path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
 
@@ -2995,6 +5499,377 @@ def write_outputs(selected_midi, header_path, delta_events, metadata, config, sc
     return json_path, active_header_path, active_json_path, deployment_paths, payload
 
 
+def hash_file_contents(path):
+    digest = hashlib.sha256()
+    with Path(path).open("rb") as handle:
+        for block in iter(lambda: handle.read(1 << 16), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def hash_config(config):
+    encoded = json.dumps(config, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def build_conversion_cache_key(midi_hash, config, run_options):
+    """Key a conversion by MIDI content, effective config, and run options."""
+    key_payload = {
+        "format_version": CONVERSION_CACHE_FORMAT_VERSION,
+        "midi_sha256": midi_hash,
+        "config_sha256": hash_config(config),
+        "run_options": run_options,
+    }
+    encoded = json.dumps(key_payload, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def build_conversion_family_key(midi_hash, config, run_options):
+    """Key conversions that differ only in per-channel calibration overrides."""
+    family_config = copy.deepcopy(config)
+    family_config.get("actuation", {}).pop("channel_overrides", None)
+    return build_conversion_cache_key(midi_hash, family_config, run_options)
+
+
+class ConversionCache:
+    """Bounded in-memory LRU of finished conversions backed by JSON files.
+
+    Replays and repeat plays of the same song with the same settings reuse the
+    stored delta events and metadata instead of re-running the whole pipeline.
+    Entries can also be filed under a family key so the latest conversion of a
+    song can be patched after a calibration edit instead of being redone.
+    """
+
+    def __init__(self, cache_dir, memory_entries, disk_entries):
+        self.cache_dir = Path(cache_dir)
+        self.memory_entries = max(1, int(memory_entries))
+        self.disk_entries = max(0, int(disk_entries))
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.families = {}
+
+    def entry_path(self, key):
+        return self.cache_dir / f"{key}.json"
+
+    def family_path(self, family_key):
+        return self.cache_dir / f"{family_key}.family"
+
+    def latest_in_family(self, family_key):
+        with self.lock:
+            key = self.families.get(family_key)
+        if key is None and self.disk_entries > 0:
+            try:
+                key = self.family_path(family_key).read_text(encoding="utf-8").strip()
+            except OSError:
+                return None
+        if not key:
+            return None
+        return self.get(key)
+
+    @staticmethod
+    def decode_entry(encoded_entry):
+        entry = json.loads(encoded_entry)
+        entry["delta_events"] = [tuple(event) for event in entry["delta_events"]]
+        if entry.get("delta_events_us") is not None:
+            entry["delta_events_us"] = [tuple(event) for event in entry["delta_events_us"]]
+        return entry
+
+    def get(self, key):
+        # Entries are kept as their JSON text: decoding it hands every caller a
+        # private copy and is much faster than deep-copying the decoded entry.
+        with self.lock:
+            encoded_entry = self.entries.get(key)
+            if encoded_entry is not None:
+                self.entries.move_to_end(key)
+        if encoded_entry is not None:
+            return self.decode_entry(encoded_entry)
+
+        if self.disk_entries <= 0:
+            return None
+        path = self.entry_path(key)
+        try:
+            encoded_entry = path.read_text(encoding="utf-8")
+            entry = self.decode_entry(encoded_entry)
+        except (OSError, ValueError):
+            return None
+        if entry.get("format_version") != CONVERSION_CACHE_FORMAT_VERSION:
+            return None
+        try:
+            # Touch the file so disk pruning keeps recently replayed songs.
+            os.utime(path)
+        except OSError:
+            pass
+
+        with self.lock:
+            self.remember(key, encoded_entry)
+        return entry
+
+    def put(self, key, entry, family_key=None):
+        encoded_entry = json.dumps({**entry, "format_version": CONVERSION_CACHE_FORMAT_VERSION})
+        with self.lock:
+            self.remember(key, encoded_entry)
+            if family_key is not None:
+                self.families[family_key] = key
+
+        if self.disk_entries <= 0:
+            return
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            temp_path = self.entry_path(key).with_suffix(".tmp")
+            temp_path.write_text(encoded_entry, encoding="utf-8")
+            temp_path.replace(self.entry_path(key))
+            if family_key is not None:
+                self.family_path(family_key).write_text(key, encoding="utf-8")
+            self.prune_disk()
+        except OSError:
+            # The disk store is only an accelerator; a read-only checkout
+            # still gets the in-memory cache.
+            pass
+
+    def remember(self, key, encoded_entry):
+        self.entries[key] = encoded_entry
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.memory_entries:
+            self.entries.popitem(last=False)
+
+    def prune_disk(self):
+        # Batch workers share this directory, so files can vanish mid-scan.
+        for pattern in ("*.json", "*.family"):
+            cached_files = []
+            for cached_path in self.cache_dir.glob(pattern):
+                try:
+                    cached_files.append((cached_path.stat().st_mtime, cached_path))
+                except OSError:
+                    continue
+            cached_files.sort(reverse=True)
+            for _mtime, stale_path in cached_files[self.disk_entries:]:
+                try:
+                    stale_path.unlink()
+                except OSError:
+                    pass
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.families.clear()
+        for pattern in ("*.json", "*.family"):
+            for cached_path in self.cache_dir.glob(pattern):
+                try:
+                    cached_path.unlink()
+                except OSError:
+                    pass
+
+
+CONVERSION_CACHE = ConversionCache(
+    CONVERSION_CACHE_DIR,
+    CONVERSION_CACHE_MEMORY_ENTRIES,
+    CONVERSION_CACHE_DISK_ENTRIES,
+)
+
+
+def conversion_cancelled(cancel_check):
+    return cancel_check is not None and bool(cancel_check())
+
+
+def warm_conversion_cache(selected_midi_source, cancel_check=None, **run_options):
+    """Convert a song ahead of time so a later identical run is a cache hit.
+
+    Nothing is imported, written, or streamed; the only side effect is the
+    cache entry. Returns False when the job was cancelled or could not be
+    cached (for example because the options would need interactive prompts).
+    """
+    result = run_conversion_workflow(
+        selected_midi_source,
+        "prepared in the background",
+        dry_run=True,
+        export_only=True,
+        allow_prompts=False,
+        import_selection=False,
+        cancel_check=cancel_check,
+        reporter=None,
+        **run_options,
+    )
+    return not result.get("cancelled") and result.get("conversion_cache_key") is not None
+
+
+def finish_conversion_workflow(
+    selected_midi,
+    selected_midi_source,
+    selection_reason,
+    was_imported,
+    conversion,
+    deployment_config,
+    dry_run=False,
+    export_only=False,
+    playback_control=None,
+    cache_key=None,
+    cache_hit=False,
+    update_active_outputs=True,
+    reporter=print,
+):
+    """Write, stream, and summarize a finished (fresh or cached) conversion."""
+    delta_events = conversion["delta_events"]
+    metadata = conversion["metadata"]
+    effective_config = conversion["effective_config"]
+    scheduled_note_metadata = conversion["scheduled_note_metadata"]
+    performance_feel_stats = metadata.get("performance_feel", {})
+
+    header_path, output_version = next_header_path(HEADER_ARCHIVE_DIR, selected_midi)
+    output_version_label = "base" if output_version == 0 else f"v{output_version}"
+    metadata["output_version_label"] = output_version_label
+
+    json_path = None
+    active_header_path = None
+    active_json_path = None
+    deployment_paths = None
+    payload = None
+    if dry_run:
+        report_line(reporter, "")
+        report_line(reporter, "Dry run complete. No files were written and nothing was sent over USB.")
+    else:
+        json_path, active_header_path, active_json_path, deployment_paths, payload = write_outputs(
+            selected_midi,
+            header_path,
+            delta_events,
+            metadata,
+            effective_config,
+            scheduled_note_metadata,
+            deployment_config,
+            update_active_outputs=update_active_outputs,
+            delta_events_us=conversion.get("delta_events_us"),
+        )
+
+    stream_manifest = None
+    if payload is not None and not export_only:
+        report_line(
+            reporter,
+            f"Streaming {len(payload['events'])} generated events to the Arduino runtime over USB...",
+        )
+        stream_manifest = stream_song_to_arduino(
+            payload,
+            deployment_config,
+            playback_control=playback_control,
+            reporter=reporter,
+        )
+
+    if not dry_run:
+        report_line(reporter, "")
+        report_line(reporter, "Conversion complete.")
+        report_line(reporter, f"Versioned header: {header_path.relative_to(REPO_ROOT)}")
+        if active_header_path is not None:
+            report_line(reporter, f"Active Arduino header: {active_header_path.relative_to(REPO_ROOT)}")
+        report_line(reporter, f"Versioned metadata: {json_path.relative_to(REPO_ROOT)}")
+        if active_json_path is not None:
+            report_line(reporter, f"Active metadata: {active_json_path.relative_to(REPO_ROOT)}")
+        if deployment_paths is not None:
+            if "sketch_path" in deployment_paths:
+                report_line(reporter, f"Synced Arduino IDE sketch: {deployment_paths['sketch_path']}")
+            if "active_header_path" in deployment_paths:
+                report_line(reporter, f"Synced Arduino IDE active header: {deployment_paths['active_header_path']}")
+            if "sync_skipped" in deployment_paths:
+                report_line(reporter, f"Arduino IDE sync skipped: {deployment_paths['sync_skipped']}")
+            if "sync_error" in deployment_paths:
+                report_line(reporter, f"Arduino IDE sync warning: {deployment_paths['sync_error']}")
+        if stream_manifest is not None:
+            report_line(reporter, f"USB playback sent on port: {stream_manifest['port']}")
+            if stream_manifest["baud_rate"] != stream_manifest.get("base_baud_rate", stream_manifest["baud_rate"]):
+                report_line(
+                    reporter,
+                    f"Serial link switched from {stream_manifest['base_baud_rate']} to "
+                    f"{stream_manifest['baud_rate']} baud.",
+                )
+            if stream_manifest.get("control_action"):
+                report_line(reporter, f"Playback control action: {stream_manifest['control_action']}")
+            report_line(
+                reporter,
+                f"Streamed {stream_manifest['sent_event_count']} events with runtime protocol "
+                f"v{stream_manifest['protocol_version']} using a buffer capacity of {stream_manifest['buffer_capacity']}.",
+            )
+            perf_summary = stream_manifest.get("perf_summary")
+            if perf_summary:
+                report_line(
+                    reporter,
+                    f"Runtime loop: avg {perf_summary['loop_avg_us']} us, worst {perf_summary['loop_max_us']} us; "
+                    f"setPWM avg {perf_summary['pwm_avg_us']} us; dispatch lateness avg "
+                    f"{perf_summary['late_avg_us']} us, worst {perf_summary['late_max_us']} us "
+                    f"({perf_summary['samples']} PERF samples).",
+                )
+            for intervention in stream_manifest.get("qos_interventions", []):
+                report_line(
+                    reporter,
+                    f"Stream QoS at {intervention['song_ms'] / 1000.0:.2f} s: {intervention['previous_level']} -> "
+                    f"{intervention['level']} ({intervention['horizon_ms']} ms buffered, "
+                    f"refill cycle {intervention['refill_cycle_ms']} ms).",
+                )
+            if stream_manifest.get("qos_interventions"):
+                report_line(
+                    reporter,
+                    f"Stream QoS dropped {stream_manifest['qos_dropped_refresh_count']} hold refreshes and "
+                    f"{stream_manifest['qos_dropped_inner_voice_count']} inner-voice events.",
+                )
+            if stream_manifest.get("late_dropped_count") or stream_manifest.get("late_softened_count"):
+                report_line(
+                    reporter,
+                    f"Late strikes ({stream_manifest['late_strike_policy']}): "
+                    f"{stream_manifest['late_dropped_count']} dropped, {stream_manifest['late_softened_count']} softened.",
+                )
+        report_line(reporter, f"Output header version: {output_version_label}")
+        report_line(reporter, f"Base tempo: {metadata['original_bpm']:.2f} BPM")
+        report_line(reporter, f"Effective output tempo: {metadata['effective_bpm']:.2f} BPM")
+        report_line(reporter, f"Input note intervals: {metadata['source_note_count']}")
+        report_line(reporter, f"Scheduled notes: {metadata['scheduled_note_count']}")
+        report_line(reporter, f"Generated events: {metadata['event_count']}")
+        report_line(reporter, f"Sustain pedal events: {metadata['scheduled_pedal_event_count']}")
+        if metadata["generated_measure_pedal_event_count"]:
+            report_line(
+                reporter,
+                f"Auto measure sustain: generated {metadata['generated_measure_pedal_event_count']} pedal events "
+                "because the MIDI did not include sustain pedal data.",
+            )
+        if performance_feel_stats.get("enabled"):
+            report_line(
+                reporter,
+                "Performance feel: "
+                f"timing {performance_feel_stats['timing_adjusted_notes']}, "
+                f"articulation {performance_feel_stats['articulation_adjusted_notes']}, "
+                f"staccato {performance_feel_stats.get('staccato_adjusted_notes', 0)}, "
+                f"velocity {performance_feel_stats['velocity_adjusted_notes']}, "
+                f"pedal {performance_feel_stats['pedal_adjusted_events']}",
+            )
+        report_line(reporter, f"Forced retriggers: {metadata['forced_retriggers']}")
+        report_line(reporter, f"Delayed notes: {metadata['delayed_notes']}")
+        report_line(reporter, f"Hold events: {metadata['hold_events']}")
+        report_line(reporter, f"Strike-only notes: {metadata['strike_only_notes']}")
+        report_line(reporter, f"Unmapped notes skipped: {metadata['unmapped_notes']}")
+        report_line(reporter, f"Unmatched note_off events ignored: {metadata['unmatched_note_offs']}")
+        report_line(reporter, f"Dangling note_on events auto-closed: {metadata['dangling_note_ons_closed']}")
+        report_line(reporter, f"Percussion note events ignored: {metadata['percussion_events_skipped']}")
+
+    return {
+        "cancelled": False,
+        "workflow_kind": "conversion",
+        "selected_midi": selected_midi,
+        "selected_midi_source": selected_midi_source,
+        "selection_reason": selection_reason,
+        "active_channel_sequence": conversion["active_channel_sequence"],
+        "was_imported": was_imported,
+        "metadata": metadata,
+        "playable_layout_summary": conversion["playable_layout_summary"],
+        "tempo_override": conversion["tempo_override"],
+        "fit_selection": conversion["fit_selection"],
+        "output_version_label": output_version_label,
+        "header_path": header_path,
+        "json_path": json_path,
+        "active_header_path": active_header_path,
+        "active_json_path": active_json_path,
+        "deployment_paths": deployment_paths,
+        "payload": payload,
+        "stream_manifest": stream_manifest,
+        "conversion_cache_key": cache_key,
+        "conversion_cache_hit": cache_hit,
+    }
+
+
 def run_conversion_workflow(
     selected_midi_source,
     selection_reason,
@@ -3012,6 +5887,10 @@ def run_conversion_workflow(
     config=None,
     user_preferences=None,
     deployment_config=None,
+    use_conversion_cache=True,
+    import_selection=True,
+    update_active_outputs=True,
+    cancel_check=None,
     reporter=print,
 ):
     if config is None:
@@ -3028,8 +5907,116 @@ def run_conversion_workflow(
         deployment_config["serial_runtime"]["preferred_port"] = port
 
     selected_midi_source = Path(selected_midi_source).expanduser()
-    selected_midi, was_imported = import_midi_to_library(selected_midi_source)
+    if import_selection:
+        selected_midi, was_imported = import_midi_to_library(selected_midi_source)
+    else:
+        selected_midi, was_imported = selected_midi_source.resolve(), False
+
+    if preferred_range is None:
+        preferred_range = user_preferences["playback"].get("default_playable_range", "")
+    if preferred_fit_mode is None:
+        preferred_fit_mode = user_preferences["playback"].get("default_fit_mode", "prompt")
+        if preferred_fit_mode == "prompt":
+            preferred_fit_mode = None
+    if not allow_prompts and preferred_fit_mode in (None, ""):
+        preferred_fit_mode = "transpose"
+    if preferred_tempo is None:
+        preferred_tempo = user_preferences["playback"].get("default_tempo", "")
+
+    # Only runs whose options are fully decided up front can be cached;
+    # interactive prompts could pick different answers each time.
+    cache_key = None
+    family_key = None
+    options_resolved = preferred_fit_mode not in (None, "", "cancel") and (
+        not allow_prompts or (preferred_range not in (None, "") and preferred_tempo not in (None, ""))
+    )
+    if use_conversion_cache and options_resolved:
+        midi_hash = hash_file_contents(selected_midi)
+        run_options = {
+            "active_channel_count": active_channel_count,
+            "preferred_range": str(preferred_range).strip(),
+            "preferred_fit_mode": preferred_fit_mode,
+            "preferred_tempo": str(preferred_tempo).strip().lower(),
+            "performance_feel_enabled": performance_feel_enabled,
+            "auto_measure_pedal": bool(auto_measure_pedal),
+        }
+        cache_key = build_conversion_cache_key(midi_hash, config, run_options)
+        family_key = build_conversion_family_key(midi_hash, config, run_options)
+        cached_conversion = CONVERSION_CACHE.get(cache_key)
+        if cached_conversion is not None:
+            cached_conversion["metadata"]["selection_reason"] = selection_reason
+            report_line(reporter, "")
+            report_line(reporter, f"Selected file: {selected_midi.name}")
+            report_line(reporter, f"Chosen because: {selection_reason}")
+            report_line(
+                reporter,
+                "Reusing cached conversion (same MIDI, config, and run options); skipping analysis and scheduling.",
+            )
+            report_line(reporter, f"Fit mode used: {cached_conversion['metadata']['fit_mode_label']}")
+            report_line(reporter, f"Recognizability estimate: {cached_conversion['metadata']['recognizability_summary']}")
+            return finish_conversion_workflow(
+                selected_midi,
+                selected_midi_source,
+                selection_reason,
+                was_imported,
+                cached_conversion,
+                deployment_config,
+                dry_run=dry_run,
+                export_only=export_only,
+                playback_control=playback_control,
+                cache_key=cache_key,
+                cache_hit=True,
+                update_active_outputs=update_active_outputs,
+                reporter=reporter,
+            )
+
+        # Same song and settings apart from some channel overrides (a
+        # calibration edit): patch the latest conversion channel by channel.
+        family_conversion = CONVERSION_CACHE.latest_in_family(family_key)
+        rerendered_conversion = None
+        if family_conversion is not None:
+            changed_channels = find_changed_override_channels(
+                family_conversion["effective_config"]["actuation"],
+                config["actuation"],
+            )
+            if changed_channels is not None:
+                rerendered_conversion = rerender_changed_channels(family_conversion, config, changed_channels)
+        if rerendered_conversion is not None:
+            rerendered_conversion["metadata"]["selection_reason"] = selection_reason
+            rerendered_channels = rerendered_conversion["metadata"]["rerendered_channels"]
+            report_line(reporter, "")
+            report_line(reporter, f"Selected file: {selected_midi.name}")
+            report_line(reporter, f"Chosen because: {selection_reason}")
+            report_line(
+                reporter,
+                f"Re-rendered {len(rerendered_channels)} changed channel(s) from the cached conversion"
+                + (f" ({', '.join(str(channel) for channel in rerendered_channels)})" if rerendered_channels else "")
+                + "; all other channels reused.",
+            )
+            report_line(reporter, f"Fit mode used: {rerendered_conversion['metadata']['fit_mode_label']}")
+            report_line(
+                reporter,
+                f"Recognizability estimate: {rerendered_conversion['metadata']['recognizability_summary']}",
+            )
+            CONVERSION_CACHE.put(cache_key, rerendered_conversion, family_key=family_key)
+            return finish_conversion_workflow(
+                selected_midi,
+                selected_midi_source,
+                selection_reason,
+                was_imported,
+                rerendered_conversion,
+                deployment_config,
+                dry_run=dry_run,
+                export_only=export_only,
+                playback_control=playback_control,
+                cache_key=cache_key,
+                cache_hit=True,
+                update_active_outputs=update_active_outputs,
+                reporter=reporter,
+            )
 
+    if conversion_cancelled(cancel_check):
+        return {"cancelled": True}
     try:
         mid = MidiFile(str(selected_midi))
     except Exception as error:
@@ -3038,8 +6025,9 @@ def run_conversion_workflow(
         ) from error
 
     tempo_info = scan_tempo_info(mid)
-    note_intervals, interval_stats = extract_note_intervals(mid)
-    pedal_events = extract_sustain_pedal_events(mid)
+    time_resolution = get_timing_config(config)["resolution"]
+    note_intervals, interval_stats = extract_note_intervals(mid, time_resolution=time_resolution)
+    pedal_events = extract_sustain_pedal_events(mid, time_resolution=time_resolution)
     if not note_intervals:
         raise ValueError("No note_on events were found in the selected MIDI file.")
 
@@ -3050,8 +6038,6 @@ def run_conversion_workflow(
     )
     hardware_channel_summary = summarize_active_channel_sequence(active_channel_sequence, config["pca9685"])
 
-    if preferred_range is None:
-        preferred_range = user_preferences["playback"].get("default_playable_range", "")
     if allow_prompts or preferred_range not in (None, ""):
         effective_mapping, playable_layout_summary, mapping_overridden = prompt_for_playable_range(
             base_mapping,
@@ -3067,45 +6053,41 @@ def run_conversion_workflow(
         effective_config.setdefault("performance_feel", {})
         effective_config["performance_feel"]["enabled"] = bool(performance_feel_enabled)
 
-    if preferred_fit_mode is None:
-        preferred_fit_mode = user_preferences["playback"].get("default_fit_mode", "prompt")
-        if preferred_fit_mode == "prompt":
-            preferred_fit_mode = None
-    if not allow_prompts and preferred_fit_mode in (None, ""):
-        preferred_fit_mode = "transpose"
-    fit_selection = prompt_for_fit_mode(note_intervals, effective_mapping, preset=preferred_fit_mode)
+    fit_selection = prompt_for_fit_mode(
+        note_intervals,
+        effective_mapping,
+        preset=preferred_fit_mode,
+        phrase_fit_options=build_phrase_fit_options(effective_config, tempo_info["first_bpm"]),
+    )
     if fit_selection["mode"] == "cancel":
         report_line(reporter, "Cancelled before conversion.")
         return {"cancelled": True}
 
-    if fit_selection["mode"] == "strict":
-        transpose_stats = {
-            "remapped_note_events": 0,
-            "shift_counts": {},
-            "shift_summary": "no octave remapping was applied",
-            "skipped_for_timing": 0,
-        }
+    fit_intervals, transpose_semitones, transpose_strategy, transpose_stats = apply_fit_selection(
+        note_intervals,
+        fit_selection,
+    )
 
-    if preferred_tempo is None:
-        preferred_tempo = user_preferences["playback"].get("default_tempo", "")
     if allow_prompts or preferred_tempo not in (None, ""):
         tempo_override = prompt_for_tempo_override(tempo_info["first_bpm"], preset=preferred_tempo)
     else:
         tempo_override = parse_tempo_override_input("", tempo_info["first_bpm"])
-    scaled_intervals = scale_intervals(note_intervals, tempo_override["scale"])
+    scaled_intervals = scale_intervals(fit_intervals, tempo_override["scale"])
     scaled_pedal_events = scale_pedal_events(pedal_events, tempo_override["scale"])
     beat_ms = 60000.0 / max(1.0, float(tempo_override["target_bpm"]))
     generated_measure_pedal_events = []
     if auto_measure_pedal and not scaled_pedal_events:
         generated_measure_pedal_events = build_measure_sustain_events(scaled_intervals, beat_ms)
         scaled_pedal_events = generated_measure_pedal_events
+    if conversion_cancelled(cancel_check):
+        return {"cancelled": True}
     performance_intervals, performance_pedal_events, performance_feel_stats = apply_performance_feel(
         scaled_intervals,
         scaled_pedal_events,
         effective_config,
         beat_ms,
     )
-    if fit_selection["mode"] == "strict":
+    if fit_selection["mode"] in ("strict", "best-shift", "phrase-octave"):
         scheduled_notes, scheduling_stats = schedule_notes(performance_intervals, effective_config)
     else:
         scheduled_notes, scheduling_stats = schedule_notes_with_octave_transpose(performance_intervals, effective_config)
@@ -3113,14 +6095,26 @@ def run_conversion_workflow(
             scheduled_notes,
             skipped_for_timing=scheduling_stats.get("skipped_transposed_notes_for_timing", 0),
         )
-    if not scheduled_notes:
+    scheduled_notes, reduction_stats = reduce_notes_to_event_budget(scheduled_notes, effective_config)
+    channel_inputs = None
+    if fit_selection["mode"] != "transpose":
+        channel_inputs = group_intervals_by_channel(performance_intervals, effective_config["mapping"])
+    # Per-channel pieces let a later calibration edit re-render just the
+    # channels it touched (see rerender_changed_channels).
+    render_state = build_channel_render_state(
+        scheduled_notes,
+        effective_config,
+        performance_pedal_events,
+        channel_inputs,
+        scheduling_stats.get("channel_timing"),
+    )
+    if not any(channel_state["note_count"] for channel_state in render_state["channels"].values()):
         raise ValueError(
             "No playable notes remained after applying the selected fit mode. Try transpose, a different playable range, or another song."
         )
-    timeline, scheduled_note_metadata, playback_stats = build_playback_events(
-        scheduled_notes, effective_config, performance_pedal_events
-    )
-    if performance_pedal_events and playback_stats["pedal_events"] == 0:
+    if conversion_cancelled(cancel_check):
+        return {"cancelled": True}
+    if performance_pedal_events and not render_state["scheduled_pedal_metadata"]:
         pedal_channel = get_pedal_channel(effective_config["mapping"])
         if pedal_channel is None:
             configured_pedal_channel = get_configured_pedal_channel(effective_config["mapping"])
@@ -3137,15 +6131,24 @@ def run_conversion_workflow(
                 f"{pedal_channel} is outside the active hardware channels. Set Installed solenoids to include channel "
                 f"{pedal_channel}."
             )
+    timeline, scheduled_note_metadata, playback_stats = assemble_channel_render(render_state, effective_config)
+    thermal_stats = playback_stats["thermal_limit"]
+    power_budget_stats = playback_stats["power_budget"]
+    i2c_bus_stats = playback_stats["i2c_bus"]
     delta_events = convert_to_delta_events(timeline)
+    delta_events_us = None
+    if time_resolution == "us":
+        delta_events_us = convert_to_delta_events_us(
+            timeline,
+            scheduled_note_metadata,
+            playback_stats["scheduled_pedal_events"],
+        )
     unmapped_note_lines = build_unmapped_note_lines(
         {int(note): count for note, count in scheduling_stats["unmapped_note_counts"].items()}
     )
-    selected_playable_count = len(scheduled_notes)
+    selected_playable_count = playback_stats["scheduled_note_count"]
     recognizability_summary = describe_recognizability(selected_playable_count, len(note_intervals))
 
-    header_path, output_version = next_header_path(HEADER_ARCHIVE_DIR, selected_midi)
-    output_version_label = "base" if output_version == 0 else f"v{output_version}"
     mapping_lines = describe_mapping(effective_config["mapping"], effective_config["pca9685"])
     pedal_channel = get_pedal_channel(effective_config["mapping"])
     channels_used = set(scheduling_stats["channels_used"])
@@ -3161,6 +6164,14 @@ def run_conversion_workflow(
 
     if fit_selection["mode"] == "strict":
         fit_mode_label = "strict (original pitches, skip out-of-range notes)"
+    elif fit_selection["mode"] == "best-shift":
+        fit_mode_label = f"best global shift ({describe_semitone_shift(transpose_semitones)})"
+    elif fit_selection["mode"] == "phrase-octave":
+        fit_mode_label = (
+            f"phrase octave fit ({len(fit_selection['phrase_plan']['window_offsets'])} windows of "
+            f"{fit_selection['phrase_window_beats']:g} beats, {fit_selection['phrase_plan']['register_changes']} "
+            f"register change(s); {transpose_stats['shift_summary']})"
+        )
     else:
         if transpose_stats["remapped_note_events"] == 0:
             fit_mode_label = "transpose by octave (all playable notes were already inside the active layout)"
@@ -3172,7 +6183,7 @@ def run_conversion_workflow(
 
     metadata = {
         "project_mode": config["project_mode"],
-        "output_version_label": output_version_label,
+        "output_version_label": "",
         "original_bpm": tempo_info["first_bpm"],
         "tempo_label": tempo_override["label"],
         "effective_bpm": tempo_override["target_bpm"],
@@ -3183,22 +6194,29 @@ def run_conversion_workflow(
         "playable_layout_label": playable_layout_summary["label"],
         "fit_mode": fit_selection["mode"],
         "fit_mode_label": fit_mode_label,
-        "transpose_semitones": 0,
-        "transpose_strategy": "per_note_octave_fold",
+        "transpose_semitones": transpose_semitones,
+        "transpose_strategy": transpose_strategy,
         "transpose_remapped_note_events": transpose_stats["remapped_note_events"],
         "transpose_shift_counts": transpose_stats["shift_counts"],
         "transpose_shift_summary": transpose_stats["shift_summary"],
         "transpose_skipped_for_timing": transpose_stats["skipped_for_timing"],
+        "transpose_octave_assignment": scheduling_stats.get("octave_assignment"),
         "strict_playable_count": fit_selection["strict_playable_count"],
         "strict_playable_summary": fit_selection["strict_summary"],
         "transpose_playable_count": fit_selection["transpose_playable_count"],
         "transpose_playable_summary": fit_selection["transpose_summary"],
+        "best_shift_semitones": fit_selection["best_shift_semitones"],
+        "best_shift_playable_count": fit_selection["best_shift_playable_count"],
+        "best_shift_playable_summary": fit_selection["best_shift_summary"],
+        "phrase_playable_count": fit_selection["phrase_playable_count"],
+        "phrase_playable_summary": fit_selection["phrase_summary"],
+        "phrase_window_offsets": fit_selection["phrase_plan"]["window_offsets"],
         "mapping_override_used": mapping_overridden,
         "selection_reason": selection_reason,
         "recognizability_summary": recognizability_summary,
         "unmapped_note_lines": unmapped_note_lines,
         "source_note_count": len(note_intervals),
-        "scheduled_note_count": len(scheduled_notes),
+        "scheduled_note_count": selected_playable_count,
         "event_count": len(delta_events),
         "forced_retriggers": scheduling_stats["forced_retriggers"],
         "delayed_notes": scheduling_stats["delayed_notes"],
@@ -3209,6 +6227,12 @@ def run_conversion_workflow(
         "percussion_events_skipped": interval_stats["percussion_events_skipped"],
         "hold_events": playback_stats["hold_events"],
         "strike_only_notes": playback_stats["strike_only_notes"],
+        "power_budget": power_budget_stats,
+        "thermal_limit": thermal_stats,
+        "latency_compensation": playback_stats["latency_compensation"],
+        "note_reduction": reduction_stats,
+        "i2c_bus": i2c_bus_stats,
+        "timing_resolution": time_resolution,
         "source_pedal_event_count": len(pedal_events),
         "generated_measure_pedal_event_count": len(generated_measure_pedal_events),
         "auto_measure_pedal_enabled": bool(auto_measure_pedal),
@@ -3236,6 +6260,11 @@ def run_conversion_workflow(
     report_line(reporter, f"Playable layout: {playable_layout_summary['label']}")
     report_line(reporter, f"Strict coverage: {fit_selection['strict_summary']}")
     report_line(reporter, f"Transpose coverage: {fit_selection['transpose_summary']}")
+    report_line(
+        reporter,
+        f"Best shift coverage ({fit_selection['best_shift_semitones']:+d} semitones): {fit_selection['best_shift_summary']}",
+    )
+    report_line(reporter, f"Phrase octave coverage: {fit_selection['phrase_summary']}")
     report_line(reporter, f"Fit mode used: {fit_mode_label}")
     report_line(reporter, f"Transpose remap summary: {transpose_stats['shift_summary']}")
     if transpose_stats["skipped_for_timing"] > 0:
@@ -3243,6 +6272,84 @@ def run_conversion_workflow(
             reporter,
             f"Transpose timing guard skipped {transpose_stats['skipped_for_timing']} remapped note events to keep the beat on time.",
         )
+    octave_assignment = scheduling_stats.get("octave_assignment")
+    if octave_assignment and octave_assignment["recovered_notes"] > 0:
+        report_line(
+            reporter,
+            f"Octave assignment search kept {octave_assignment['recovered_notes']} more remapped note events "
+            f"than closest-octave-first placement.",
+        )
+    if reduction_stats["removed_count"] > 0:
+        reason_summary = ", ".join(f"{count} {reason}" for reason, count in reduction_stats["reason_counts"].items())
+        report_line(
+            reporter,
+            f"Note reduction removed {reduction_stats['removed_count']} note events to stay within "
+            f"{get_note_reduction_config(effective_config)['max_events_per_second']} events/s ({reason_summary}):",
+        )
+        max_reported = int(get_note_reduction_config(effective_config)["max_reported_removals"])
+        for removal in reduction_stats["removed"][:max_reported]:
+            report_line(
+                reporter,
+                f"  {removal['time_ms'] / 1000:.2f} s  {removal['note_label']} (channel {removal['channel']}, "
+                f"velocity {removal['velocity']}): {removal['reason']}",
+            )
+        if reduction_stats["removed_count"] > max_reported:
+            report_line(
+                reporter,
+                f"  ... and {reduction_stats['removed_count'] - max_reported} more (see note_reduction in the metadata).",
+            )
+    thermal_changes = (
+        thermal_stats["lowered_hold_notes"]
+        + thermal_stats["shortened_hold_notes"]
+        + thermal_stats["thinned_repeats"]
+        + thermal_stats["over_budget_notes"]
+    )
+    if thermal_changes > 0:
+        report_line(
+            reporter,
+            f"Thermal limit: lowered {thermal_stats['lowered_hold_notes']} holds, shortened "
+            f"{thermal_stats['shortened_hold_notes']}, thinned {thermal_stats['thinned_repeats']} repeats, "
+            f"{thermal_stats['over_budget_notes']} notes still over budget "
+            f"(channels {', '.join(str(channel) for channel in thermal_stats['limited_channels'])}).",
+        )
+    latency_stats = playback_stats["latency_compensation"]
+    if latency_stats["shifted_strikes"] or latency_stats["pedal_down_shift_ms"] or latency_stats["pedal_up_shift_ms"]:
+        report_line(
+            reporter,
+            f"Latency compensation: {latency_stats['shifted_strikes']} strikes sent up to "
+            f"{latency_stats['max_strike_shift_ms']} ms early, {latency_stats['shifted_releases']} releases up to "
+            f"{latency_stats['max_release_shift_ms']} ms early ({latency_stats['clamped_strikes']} clamped); pedal "
+            f"down/up {latency_stats['pedal_down_shift_ms']}/{latency_stats['pedal_up_shift_ms']} ms early.",
+        )
+    if power_budget_stats["staggered_notes"] > 0:
+        shift_summary = ", ".join(
+            f"+{shift_ms} ms: {count}" for shift_ms, count in power_budget_stats["shift_counts"].items()
+        )
+        report_line(
+            reporter,
+            f"Power budget staggered {power_budget_stats['staggered_notes']} strikes "
+            f"(max +{power_budget_stats['max_shift_ms']} ms; {shift_summary}).",
+        )
+    if power_budget_stats["unresolved_overloads"] > 0:
+        report_line(
+            reporter,
+            f"Power budget warning: {power_budget_stats['unresolved_overloads']} strikes still exceed the cap "
+            f"after the maximum stagger.",
+        )
+    report_line(
+        reporter,
+        f"I2C bus estimate: {i2c_bus_stats['set_pwm_us']:.0f} us per PWM change at "
+        f"{i2c_bus_stats['clock_hz'] // 1000} kHz, {i2c_bus_stats['bus_utilisation'] * 100:.1f}% busy overall.",
+    )
+    if i2c_bus_stats["overrun_count"] > 0:
+        worst = i2c_bus_stats["worst_overruns"][0]
+        report_line(
+            reporter,
+            f"I2C bus warning: {i2c_bus_stats['overrun_count']} bursts need more bus time than the gap to the next "
+            f"event; {i2c_bus_stats['late_events']} events run late (max {i2c_bus_stats['max_late_ms']:.1f} ms). "
+            f"Worst at {worst['time_ms'] / 1000:.2f} s: {worst['events']} events need "
+            f"{worst['required_ms']:.1f} ms in {worst['available_ms']:.1f} ms.",
+        )
     report_line(reporter, f"Recognizability estimate: {recognizability_summary}")
     report_line(reporter, f"Range override used: {'yes' if mapping_overridden else 'no'}")
     if interval_stats["percussion_events_skipped"] > len(note_intervals):
@@ -3264,111 +6371,39 @@ def run_conversion_workflow(
         for line in unmapped_note_lines:
             report_line(reporter, f"  {line}")
 
-    json_path = None
-    active_header_path = None
-    active_json_path = None
-    deployment_paths = None
-    payload = None
-    if dry_run:
-        report_line(reporter, "")
-        report_line(reporter, "Dry run complete. No files were written and nothing was sent over USB.")
-    else:
-        json_path, active_header_path, active_json_path, deployment_paths, payload = write_outputs(
-            selected_midi,
-            header_path,
-            delta_events,
-            metadata,
-            effective_config,
-            scheduled_note_metadata,
-            deployment_config,
-        )
-
-    stream_manifest = None
-    if payload is not None and not export_only:
-        report_line(
-            reporter,
-            f"Streaming {len(payload['events'])} generated events to the Arduino runtime over USB...",
-        )
-        stream_manifest = stream_song_to_arduino(payload, deployment_config, playback_control=playback_control)
-
-    if not dry_run:
-        report_line(reporter, "")
-        report_line(reporter, "Conversion complete.")
-        report_line(reporter, f"Versioned header: {header_path.relative_to(REPO_ROOT)}")
-        report_line(reporter, f"Active Arduino header: {active_header_path.relative_to(REPO_ROOT)}")
-        report_line(reporter, f"Versioned metadata: {json_path.relative_to(REPO_ROOT)}")
-        report_line(reporter, f"Active metadata: {active_json_path.relative_to(REPO_ROOT)}")
-        if deployment_paths is not None:
-            if "sketch_path" in deployment_paths:
-                report_line(reporter, f"Synced Arduino IDE sketch: {deployment_paths['sketch_path']}")
-            if "active_header_path" in deployment_paths:
-                report_line(reporter, f"Synced Arduino IDE active header: {deployment_paths['active_header_path']}")
-            if "sync_skipped" in deployment_paths:
-                report_line(reporter, f"Arduino IDE sync skipped: {deployment_paths['sync_skipped']}")
-            if "sync_error" in deployment_paths:
-                report_line(reporter, f"Arduino IDE sync warning: {deployment_paths['sync_error']}")
-        if stream_manifest is not None:
-            report_line(reporter, f"USB playback sent on port: {stream_manifest['port']}")
-            if stream_manifest.get("control_action"):
-                report_line(reporter, f"Playback control action: {stream_manifest['control_action']}")
-            report_line(
-                reporter,
-                f"Streamed {stream_manifest['sent_event_count']} events with runtime protocol "
-                f"v{stream_manifest['protocol_version']} using a buffer capacity of {stream_manifest['buffer_capacity']}.",
-            )
-        report_line(reporter, f"Output header version: {output_version_label}")
-        report_line(reporter, f"Base tempo: {tempo_info['first_bpm']:.2f} BPM")
-        report_line(reporter, f"Effective output tempo: {tempo_override['target_bpm']:.2f} BPM")
-        report_line(reporter, f"Input note intervals: {len(note_intervals)}")
-        report_line(reporter, f"Scheduled notes: {len(scheduled_notes)}")
-        report_line(reporter, f"Generated events: {len(delta_events)}")
-        report_line(reporter, f"Sustain pedal events: {playback_stats['pedal_events']}")
-        if generated_measure_pedal_events:
-            report_line(
-                reporter,
-                f"Auto measure sustain: generated {len(generated_measure_pedal_events)} pedal events "
-                "because the MIDI did not include sustain pedal data.",
-            )
-        if performance_feel_stats.get("enabled"):
-            report_line(
-                reporter,
-                "Performance feel: "
-                f"timing {performance_feel_stats['timing_adjusted_notes']}, "
-                f"articulation {performance_feel_stats['articulation_adjusted_notes']}, "
-                f"staccato {performance_feel_stats.get('staccato_adjusted_notes', 0)}, "
-                f"velocity {performance_feel_stats['velocity_adjusted_notes']}, "
-                f"pedal {performance_feel_stats['pedal_adjusted_events']}",
-            )
-        report_line(reporter, f"Forced retriggers: {scheduling_stats['forced_retriggers']}")
-        report_line(reporter, f"Delayed notes: {scheduling_stats['delayed_notes']}")
-        report_line(reporter, f"Hold events: {playback_stats['hold_events']}")
-        report_line(reporter, f"Strike-only notes: {playback_stats['strike_only_notes']}")
-        report_line(reporter, f"Unmapped notes skipped: {scheduling_stats['unmapped_notes']}")
-        report_line(reporter, f"Unmatched note_off events ignored: {interval_stats['unmatched_note_offs']}")
-        report_line(reporter, f"Dangling note_on events auto-closed: {interval_stats['dangling_note_ons_closed']}")
-        report_line(reporter, f"Percussion note events ignored: {interval_stats['percussion_events_skipped']}")
-
-    return {
-        "cancelled": False,
-        "workflow_kind": "conversion",
-        "selected_midi": selected_midi,
-        "selected_midi_source": selected_midi_source,
-        "selection_reason": selection_reason,
-        "active_channel_sequence": active_channel_sequence,
-        "was_imported": was_imported,
+    conversion = {
+        "delta_events": delta_events,
+        "delta_events_us": delta_events_us,
         "metadata": metadata,
+        "scheduled_note_metadata": scheduled_note_metadata,
+        "effective_config": effective_config,
+        "active_channel_sequence": active_channel_sequence,
         "playable_layout_summary": playable_layout_summary,
         "tempo_override": tempo_override,
         "fit_selection": fit_selection,
-        "output_version_label": output_version_label,
-        "header_path": header_path,
-        "json_path": json_path,
-        "active_header_path": active_header_path,
-        "active_json_path": active_json_path,
-        "deployment_paths": deployment_paths,
-        "payload": payload,
-        "stream_manifest": stream_manifest,
     }
+    if not reduction_stats["enabled"]:
+        # Note reduction weighs notes across channels, so a conversion that used
+        # it cannot be patched per channel later.
+        conversion["channel_render_state"] = render_state
+    if cache_key is not None:
+        CONVERSION_CACHE.put(cache_key, conversion, family_key=family_key)
+
+    return finish_conversion_workflow(
+        selected_midi,
+        selected_midi_source,
+        selection_reason,
+        was_imported,
+        conversion,
+        deployment_config,
+        dry_run=dry_run,
+        export_only=export_only,
+        playback_control=playback_control,
+        cache_key=cache_key,
+        cache_hit=False,
+        update_active_outputs=update_active_outputs,
+        reporter=reporter,
+    )
 
 
 def run_troubleshooting_workflow(
@@ -3576,7 +6611,12 @@ def run_troubleshooting_workflow(
         )
 
     if payload is not None and not export_only:
-        stream_manifest = stream_song_to_arduino(payload, deployment_config, playback_control=playback_control)
+        stream_manifest = stream_song_to_arduino(
+            payload,
+            deployment_config,
+            playback_control=playback_control,
+            reporter=reporter,
+        )
 
     if not dry_run:
         report_line(reporter, "")
@@ -3596,11 +6636,45 @@ def run_troubleshooting_workflow(
                 report_line(reporter, f"Arduino IDE sync warning: {deployment_paths['sync_error']}")
         if stream_manifest is not None:
             report_line(reporter, f"USB playback sent on port: {stream_manifest['port']}")
+            if stream_manifest["baud_rate"] != stream_manifest.get("base_baud_rate", stream_manifest["baud_rate"]):
+                report_line(
+                    reporter,
+                    f"Serial link switched from {stream_manifest['base_baud_rate']} to "
+                    f"{stream_manifest['baud_rate']} baud.",
+                )
             report_line(
                 reporter,
                 f"Streamed {stream_manifest['sent_event_count']} events with runtime protocol "
                 f"v{stream_manifest['protocol_version']} using a buffer capacity of {stream_manifest['buffer_capacity']}.",
             )
+            perf_summary = stream_manifest.get("perf_summary")
+            if perf_summary:
+                report_line(
+                    reporter,
+                    f"Runtime loop: avg {perf_summary['loop_avg_us']} us, worst {perf_summary['loop_max_us']} us; "
+                    f"setPWM avg {perf_summary['pwm_avg_us']} us; dispatch lateness avg "
+                    f"{perf_summary['late_avg_us']} us, worst {perf_summary['late_max_us']} us "
+                    f"({perf_summary['samples']} PERF samples).",
+                )
+            for intervention in stream_manifest.get("qos_interventions", []):
+                report_line(
+                    reporter,
+                    f"Stream QoS at {intervention['song_ms'] / 1000.0:.2f} s: {intervention['previous_level']} -> "
+                    f"{intervention['level']} ({intervention['horizon_ms']} ms buffered, "
+                    f"refill cycle {intervention['refill_cycle_ms']} ms).",
+                )
+            if stream_manifest.get("qos_interventions"):
+                report_line(
+                    reporter,
+                    f"Stream QoS dropped {stream_manifest['qos_dropped_refresh_count']} hold refreshes and "
+                    f"{stream_manifest['qos_dropped_inner_voice_count']} inner-voice events.",
+                )
+            if stream_manifest.get("late_dropped_count") or stream_manifest.get("late_softened_count"):
+                report_line(
+                    reporter,
+                    f"Late strikes ({stream_manifest['late_strike_policy']}): "
+                    f"{stream_manifest['late_dropped_count']} dropped, {stream_manifest['late_softened_count']} softened.",
+                )
         report_line(reporter, f"Output header version: {output_version_label}")
         report_line(reporter, f"Scheduled note events: {len(scheduled_notes)}")
         report_line(reporter, f"Generated events: {len(delta_events)}")
@@ -3632,6 +6706,368 @@ def run_troubleshooting_workflow(
     }
 
 
+BATCH_SUMMARY_COLUMNS = [
+    "midi",
+    "status",
+    "seconds",
+    "cache_hit",
+    "fit_mode",
+    "source_note_count",
+    "scheduled_note_count",
+    "event_count",
+    "strict_playable_count",
+    "transpose_playable_count",
+    "recognizability_summary",
+    "forced_retriggers",
+    "delayed_notes",
+    "unmapped_notes",
+    "output_header_path",
+    "error",
+]
+
+
+def get_tempo_search_config(config):
+    defaults = {
+        "min_multiplier": 0.25,
+        "max_multiplier": 3.0,
+        "precision": 0.01,
+        "delay_tolerance_ms": 10,
+        "max_delayed_ratio": 0.02,
+        "max_retrigger_ratio": 0.02,
+        "max_delay_ms": 30,
+        "max_events_per_second": 300,
+    }
+    merged = copy.deepcopy(defaults)
+    merged.update(copy.deepcopy(config.get("tempo_search", {})))
+    return merged
+
+
+def find_max_clean_tempo(fit_intervals, config, base_bpm, fit_mode="transpose"):
+    """Binary-search the fastest tempo multiplier that still schedules cleanly.
+
+    Each candidate scales the fitted notes and re-runs the scheduling core only
+    (no feel, no event building, no outputs). Overlapping repeats in the MIDI
+    are delayed and retriggered at any tempo, so delayed notes (beyond
+    `delay_tolerance_ms`), forced retriggers and the 95th-percentile delay are
+    measured as the increase over the slowest tempo in the range. A candidate
+    is clean when those increases and the peak events per second all stay
+    under the `tempo_search` thresholds. In transpose mode the octave targets
+    are chosen once at the original tempo and then held fixed. Channel mapping,
+    per-note actuation and channel timing limits are resolved once, each step
+    reruns only schedule_channel_timing on plain integer pairs, and evaluations
+    are memoised.
+    """
+    search = get_tempo_search_config(config)
+    started = time.perf_counter()
+    if fit_mode == "transpose":
+        folded_notes, _stats = schedule_notes_with_octave_transpose(fit_intervals, config)
+        fit_intervals = [
+            {**note, "start_ms": note["original_start_ms"], "end_ms": note["original_end_ms"]} for note in folded_notes
+        ]
+
+    # Channel mapping and actuation do not depend on tempo, so resolve them once.
+    mapping_config = config["mapping"]
+    notes_by_channel = defaultdict(list)
+    for interval in fit_intervals:
+        channel = map_note_to_channel(interval["note"], mapping_config)
+        if channel is not None:
+            notes_by_channel[channel].append(interval)
+    channel_plans = []
+    for channel in sorted(notes_by_channel):
+        channel_intervals = sorted(
+            notes_by_channel[channel],
+            key=lambda item: (item["start_ms"], item["note"], item["end_ms"]),
+        )
+        event_timing = []
+        for interval in channel_intervals:
+            actuation = resolve_note_actuation(interval["note"], channel, config)
+            event_timing.append((int(actuation["strike_ms"]), int(actuation["release_delay_ms"])))
+        channel_plans.append(
+            (
+                channel,
+                [(interval["start_ms"], interval["end_ms"]) for interval in channel_intervals],
+                event_timing,
+                get_channel_timing_limits(channel, config),
+            )
+        )
+    note_count = max(1, sum(len(plan[1]) for plan in channel_plans))
+    delay_tolerance_ms = max(0, int(search["delay_tolerance_ms"]))
+
+    evaluations = {}
+    baseline = {}
+
+    def evaluate(multiplier):
+        key = round(multiplier, 4)
+        if key in evaluations:
+            return evaluations[key]
+        scale = 1.0 / multiplier
+        delayed_notes = 0
+        forced_retriggers = 0
+        delayed_by_channel = defaultdict(int)
+        delays_ms = []
+        window_events = defaultdict(int)
+        for channel, pairs, event_timing, timing_limits in channel_plans:
+            # Same rounding as scale_intervals.
+            scaled_pairs = []
+            for start_ms, end_ms in pairs:
+                scaled_start_ms = max(0, int(round(start_ms * scale)))
+                scaled_pairs.append((scaled_start_ms, max(scaled_start_ms + 1, int(round(end_ms * scale)))))
+            timings, channel_retriggers, _channel_delays = schedule_channel_timing(scaled_pairs, timing_limits)
+            forced_retriggers += channel_retriggers
+            for (requested_start_ms, _end), (start_ms, end_ms), (strike_ms, release_delay_ms) in zip(
+                scaled_pairs, timings, event_timing
+            ):
+                delay_ms = start_ms - requested_start_ms
+                delays_ms.append(delay_ms)
+                if delay_ms > delay_tolerance_ms:
+                    delayed_notes += 1
+                    delayed_by_channel[channel] += 1
+                end_ms = max(end_ms, start_ms + strike_ms)
+                window_events[start_ms // 1000] += 1
+                window_events[(end_ms + release_delay_ms) // 1000] += 1
+                if start_ms + strike_ms < end_ms:
+                    window_events[(start_ms + strike_ms) // 1000] += 1
+        peak_window, peak_events = max(window_events.items(), key=lambda item: item[1], default=(0, 0))
+
+        delays_ms.sort()
+        # One pathological channel should not decide the tempo, so use the 95th percentile.
+        delay_p95_ms = delays_ms[int(0.95 * (len(delays_ms) - 1))] if delays_ms else 0
+        delayed_ratio = delayed_notes / note_count
+        retrigger_ratio = forced_retriggers / note_count
+        if not baseline:
+            baseline.update(delayed=delayed_ratio, retriggers=retrigger_ratio, delay_ms=delay_p95_ms)
+        checks = [
+            ("delayed notes", max(0.0, delayed_ratio - baseline["delayed"]), float(search["max_delayed_ratio"])),
+            (
+                "forced retriggers",
+                max(0.0, retrigger_ratio - baseline["retriggers"]),
+                float(search["max_retrigger_ratio"]),
+            ),
+            ("95th percentile delay", max(0, delay_p95_ms - baseline["delay_ms"]), float(search["max_delay_ms"])),
+            ("stream bandwidth", peak_events, float(search["max_events_per_second"])),
+        ]
+        metric, value, limit = max(checks, key=lambda item: item[1] / item[2] if item[2] > 0 else 0)
+        busiest_channel = max(delayed_by_channel.items(), key=lambda item: item[1], default=(None, 0))[0]
+        if metric == "stream bandwidth":
+            location = f"{peak_events} events in the second starting at {peak_window:.0f} s"
+        else:
+            location = f"most on channel {busiest_channel}" if busiest_channel is not None else "none"
+        evaluations[key] = {
+            "multiplier": multiplier,
+            "clean": all(item[1] <= item[2] for item in checks),
+            "bottleneck": {"metric": metric, "value": round(value, 4), "limit": limit, "location": location},
+            "delayed_notes": delayed_notes,
+            "forced_retriggers": forced_retriggers,
+            "delay_p95_ms": delay_p95_ms,
+            "peak_events_per_second": peak_events,
+        }
+        return evaluations[key]
+
+    low = float(search["min_multiplier"])
+    high = float(search["max_multiplier"])
+    precision = max(0.001, float(search["precision"]))
+    if not evaluate(low)["clean"]:
+        best, failing = None, evaluate(low)
+    elif evaluate(high)["clean"]:
+        best, failing = evaluate(high), None
+    else:
+        while high - low > precision:
+            middle = (low + high) / 2
+            if evaluate(middle)["clean"]:
+                low = middle
+            else:
+                high = middle
+        best, failing = evaluate(low), evaluate(high)
+
+    return {
+        "base_bpm": base_bpm,
+        "max_multiplier": round(best["multiplier"], 3) if best else None,
+        "max_bpm": round(base_bpm * best["multiplier"], 1) if best else None,
+        "clean_at_original": evaluate(1.0)["clean"],
+        "bottleneck": failing["bottleneck"] if failing else None,
+        "bottleneck_multiplier": round(failing["multiplier"], 3) if failing else None,
+        "evaluations": len(evaluations),
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
+
+
+def run_tempo_search_workflow(
+    selected_midi_source,
+    selection_reason,
+    active_channel_count=None,
+    preferred_range=None,
+    preferred_fit_mode=None,
+    config=None,
+    user_preferences=None,
+    reporter=print,
+):
+    if config is None:
+        config = load_config()
+    if user_preferences is None:
+        user_preferences = load_user_preferences()
+    if preferred_range is None:
+        preferred_range = user_preferences["playback"].get("default_playable_range", "")
+    if preferred_fit_mode in (None, "", "prompt"):
+        preferred_fit_mode = user_preferences["playback"].get("default_fit_mode", "transpose")
+        if preferred_fit_mode in (None, "", "prompt"):
+            preferred_fit_mode = "transpose"
+
+    selected_midi = Path(selected_midi_source).expanduser()
+    try:
+        mid = MidiFile(str(selected_midi))
+    except Exception as error:
+        raise RuntimeError(f"'{selected_midi.name}' could not be read as a MIDI file.") from error
+    tempo_info = scan_tempo_info(mid)
+    note_intervals, _interval_stats = extract_note_intervals(mid)
+    if not note_intervals:
+        raise ValueError("No note_on events were found in the selected MIDI file.")
+
+    effective_config = copy.deepcopy(config)
+    effective_config["mapping"] = build_effective_mapping(config, active_channel_count, preferred_range)
+    fit_selection = prompt_for_fit_mode(
+        note_intervals,
+        effective_config["mapping"],
+        preset=preferred_fit_mode,
+        phrase_fit_options=build_phrase_fit_options(effective_config, tempo_info["first_bpm"]),
+    )
+    if fit_selection["mode"] == "cancel":
+        report_line(reporter, "Cancelled before the tempo search.")
+        return {"cancelled": True}
+    fit_intervals, _semitones, _strategy, _stats = apply_fit_selection(note_intervals, fit_selection)
+
+    result = find_max_clean_tempo(fit_intervals, effective_config, tempo_info["first_bpm"], fit_selection["mode"])
+    report_line(reporter, "")
+    report_line(reporter, f"Selected file: {selected_midi.name}")
+    report_line(reporter, f"Chosen because: {selection_reason}")
+    report_line(reporter, f"Original/base tempo: {tempo_info['first_bpm']:.2f} BPM")
+    if result["max_multiplier"] is None:
+        report_line(reporter, "No tempo in the search range schedules cleanly.")
+    else:
+        report_line(
+            reporter,
+            f"Maximum clean tempo: {result['max_multiplier']:.3f}x ({result['max_bpm']:.1f} BPM); "
+            f"original tempo is {'clean' if result['clean_at_original'] else 'not clean'}.",
+        )
+    if result["bottleneck"]:
+        bottleneck = result["bottleneck"]
+        report_line(
+            reporter,
+            f"Bottleneck at {result['bottleneck_multiplier']:.3f}x: {bottleneck['metric']} "
+            f"({bottleneck['value']} against a limit of {bottleneck['limit']}; {bottleneck['location']}).",
+        )
+    report_line(reporter, f"Search took {result['evaluations']} schedules in {result['elapsed_ms']:.0f} ms.")
+    return result
+
+
+def run_batch_conversion_job(midi_path, run_options):
+    """Convert one library song in a worker process and summarize the result.
+
+    Every exception is captured in the returned row so one bad MIDI cannot
+    take down the rest of the batch.
+    """
+    started_at = time.perf_counter()
+    row = {"midi": str(midi_path), "status": "ok", "error": ""}
+    try:
+        result = run_conversion_workflow(
+            midi_path,
+            "batch conversion",
+            allow_prompts=False,
+            import_selection=False,
+            update_active_outputs=False,
+            reporter=None,
+            **run_options,
+        )
+        if result.get("cancelled"):
+            row["status"] = "cancelled"
+        else:
+            metadata = result["metadata"]
+            row["cache_hit"] = "yes" if result.get("conversion_cache_hit") else "no"
+            for column in BATCH_SUMMARY_COLUMNS:
+                if column in metadata:
+                    row[column] = metadata[column]
+            if result.get("header_path") is not None and result.get("json_path") is not None:
+                row["output_header_path"] = str(result["header_path"].relative_to(REPO_ROOT))
+    except Exception as error:
+        row["status"] = "error"
+        row["error"] = f"{type(error).__name__}: {error}"
+    row["seconds"] = round(time.perf_counter() - started_at, 3)
+    return row
+
+
+def run_batch_conversion(
+    batch_dir,
+    jobs=None,
+    summary_path=None,
+    dry_run=False,
+    config=None,
+    user_preferences=None,
+    deployment_config=None,
+    **run_options,
+):
+    """Convert every MIDI under batch_dir in a process pool.
+
+    Songs are exported without streaming (or only analyzed for dry runs) and
+    a one-row-per-song CSV summary is written for coverage review.
+    """
+    batch_dir = Path(batch_dir).expanduser().resolve()
+    midi_paths = collect_midis(batch_dir)
+    if not midi_paths:
+        raise FileNotFoundError(f"No .mid or .midi files found in {batch_dir}.")
+
+    if config is None:
+        config = load_config()
+    if user_preferences is None:
+        user_preferences = load_user_preferences()
+    if deployment_config is None:
+        deployment_config = load_deployment_config()
+    jobs = max(1, int(jobs or os.cpu_count() or 1))
+    summary_path = Path(summary_path) if summary_path else METADATA_DIR / "batch_conversion_summary.csv"
+    job_options = dict(run_options)
+    job_options.update(
+        {
+            "dry_run": bool(dry_run),
+            "export_only": True,
+            "config": config,
+            "user_preferences": user_preferences,
+            "deployment_config": deployment_config,
+        }
+    )
+
+    print(f"Batch converting {len(midi_paths)} MIDI file(s) from {batch_dir} with {jobs} worker(s)...")
+    rows = []
+    started_at = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = {
+            executor.submit(run_batch_conversion_job, midi_path, job_options): midi_path for midi_path in midi_paths
+        }
+        for completed_count, future in enumerate(as_completed(futures), start=1):
+            midi_path = futures[future]
+            try:
+                row = future.result()
+            except Exception as error:
+                # A worker crash (not a conversion error) still gets a row.
+                row = {"midi": str(midi_path), "status": "error", "error": f"{type(error).__name__}: {error}"}
+            rows.append(row)
+            detail = row["error"] if row["status"] == "error" else f"{row.get('event_count', 0)} events"
+            print(f"[{completed_count}/{len(midi_paths)}] {row['status']:<9} {midi_path.name} ({detail})")
+
+    rows.sort(key=lambda row: row["midi"].lower())
+    summary_path.parent.mkdir(parents=True, exist_ok=True)
+    with summary_path.open("w", newline="", encoding="utf-8") as handle:
+        writer = csv.DictWriter(handle, fieldnames=BATCH_SUMMARY_COLUMNS, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(rows)
+
+    failed_count = sum(1 for row in rows if row["status"] == "error")
+    print("")
+    print(
+        f"Batch finished in {time.perf_counter() - started_at:.1f} s: "
+        f"{len(rows) - failed_count} converted, {failed_count} failed."
+    )
+    print(f"Summary CSV: {summary_path}")
+    return rows
+
+
 def build_arg_parser():
     parser = argparse.ArgumentParser(
         description="Convert a MIDI file for the autonomous piano player and optionally send it over USB."
@@ -3654,7 +7090,7 @@ def build_arg_parser():
     )
     parser.add_argument(
         "--fit-mode",
-        choices=("strict", "transpose", "cancel"),
+        choices=FIT_MODE_CHOICES,
         help="Choose how out-of-range notes are handled without prompting.",
     )
     parser.add_argument(
@@ -3695,6 +7131,35 @@ def build_arg_parser():
         action="store_true",
         help="If the MIDI has no sustain pedal events, synthesize sustain down/up events once per 4-beat measure.",
     )
+    parser.add_argument(
+        "--batch",
+        metavar="DIR",
+        help="Convert every MIDI under DIR without prompts or USB playback and write a summary CSV.",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        help="Worker processes for --batch. Defaults to the number of CPU cores.",
+    )
+    parser.add_argument(
+        "--batch-summary",
+        help="Where --batch writes its CSV summary. Defaults to songs/metadata/batch_conversion_summary.csv.",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Ignore cached conversions and re-run the full pipeline for this song.",
+    )
+    parser.add_argument(
+        "--max-tempo",
+        action="store_true",
+        help="Analyse only: binary-search the fastest tempo that still schedules cleanly, then exit.",
+    )
+    parser.add_argument(
+        "--perf",
+        action="store_true",
+        help="Poll the runtime's PERF loop timing during USB playback and save it to songs/metadata/last_stream_perf.csv.",
+    )
     return parser
 
 
@@ -3710,11 +7175,47 @@ def main():
     config = load_config()
     user_preferences = load_user_preferences()
     deployment_config = load_deployment_config()
+    if args.batch:
+        run_batch_conversion(
+            args.batch,
+            jobs=args.jobs,
+            summary_path=args.batch_summary,
+            dry_run=args.dry_run,
+            config=config,
+            user_preferences=user_preferences,
+            deployment_config=deployment_config,
+            active_channel_count=args.active_channels,
+            preferred_range=args.playable_range,
+            preferred_fit_mode=args.fit_mode,
+            preferred_tempo=args.tempo,
+            performance_feel_enabled=False if args.no_feel else None,
+            auto_measure_pedal=args.auto_measure_pedal,
+            use_conversion_cache=not args.no_cache,
+        )
+        return
+
     if args.port:
         deployment_config.setdefault("serial_runtime", {})
         deployment_config["serial_runtime"]["preferred_port"] = args.port
+    if args.perf:
+        serial_runtime = deployment_config.setdefault("serial_runtime", {})
+        if int(serial_runtime.get("perf_poll_ms", 0)) <= 0:
+            serial_runtime["perf_poll_ms"] = DEFAULT_PERF_POLL_MS
 
     selected_midi_source, selection_reason = choose_input_midi(args, user_preferences)
+    if args.max_tempo:
+        run_tempo_search_workflow(
+            selected_midi_source,
+            selection_reason,
+            active_channel_count=args.active_channels,
+            preferred_range=args.playable_range,
+            preferred_fit_mode=args.fit_mode,
+            config=config,
+            user_preferences=user_preferences,
+            reporter=print,
+        )
+        return
+
     run_conversion_workflow(
         selected_midi_source=selected_midi_source,
         selection_reason=selection_reason,
@@ -3731,6 +7232,7 @@ def main():
         config=config,
         user_preferences=user_preferences,
         deployment_config=deployment_config,
+        use_conversion_cache=not args.no_cache,
         reporter=print,
     )
 
@@ -10,10 +10,14 @@ from __future__ import annotations
 import copy
 import csv
 import json
+import multiprocessing
+import os
 import queue
 import threading
 import time
 import tkinter as tk
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
 from tkinter import filedialog, font as tkfont, messagebox, simpledialog, ttk
 
@@ -35,6 +39,20 @@ LOG_BG = "#10151c"
 LOG_TEXT = "#e7edf5"
 LOG_MUTED = "#90a0b5"
 QUEUE_INTER_SONG_DELAY_SECONDS = 3.0
+# Background conversions run at this niceness so the streamer's process wins the CPU.
+SPECULATIVE_PROCESS_NICENESS = 10
+SONG_SORT_NAME = "Sort by name"
+SONG_SORT_BEST = "Most playable first"
+SONG_SORT_SHORTEST = "Shortest first"
+SONG_SORT_LEAST_DENSE = "Least dense first"
+SONG_SORT_CHOICES = [SONG_SORT_NAME, SONG_SORT_BEST, SONG_SORT_SHORTEST, SONG_SORT_LEAST_DENSE]
+SONG_COVERAGE_FILTERS = {
+    "Any coverage": 0.0,
+    "50%+ playable": 0.5,
+    "70%+ playable": 0.7,
+    "90%+ playable": 0.9,
+    "100% playable": 1.0,
+}
 SPEED_TEST_SPEEDS = [
     ("8ths", 8),
     ("16ths", 16),
@@ -1768,6 +1786,135 @@ class PlaybackControlState:
         return lines
 
 
+speculative_cancel_event = None
+
+
+def init_speculative_process(cancel_event):
+    global speculative_cancel_event
+    speculative_cancel_event = cancel_event
+    try:
+        os.nice(SPECULATIVE_PROCESS_NICENESS)
+    except (AttributeError, OSError):
+        pass
+
+
+def warm_conversion_cache_in_process(job):
+    return engine.warm_conversion_cache(cancel_check=speculative_cancel_event.is_set, **job)
+
+
+class SpeculativeConversionWorker:
+    """Converts upcoming songs in the background so playback starts warm.
+
+    Jobs only fill the engine's conversion cache, which is shared on disk, and
+    run one at a time in a separate low-priority process. Scheduling, beam
+    search and DP hold the GIL for long stretches, and in this process they
+    would stretch the STATUS/COMMIT round trips of a song that is streaming.
+    Submitting a new job list replaces the pending jobs and cancels the
+    in-flight one unless it is still wanted, so stale selections never hold
+    up the next song.
+    """
+
+    def __init__(self, reporter=None):
+        self.condition = threading.Condition()
+        self.reporter = reporter
+        self._pending_jobs = []
+        self._wanted_signatures = set()
+        self._active_signature = None
+        self._closed = False
+        # Spawn rather than fork: this process runs Tk and several threads.
+        self._process_context = multiprocessing.get_context("spawn")
+        self._cancel_event = self._process_context.Event()
+        self._executor = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    @staticmethod
+    def job_signature(job):
+        return json.dumps(
+            {key: str(value) for key, value in job.items()},
+            sort_keys=True,
+        )
+
+    def submit(self, jobs):
+        unique_jobs = []
+        signatures = set()
+        for job in jobs:
+            signature = self.job_signature(job)
+            if signature in signatures:
+                continue
+            signatures.add(signature)
+            unique_jobs.append((signature, job))
+
+        with self.condition:
+            self._wanted_signatures = signatures
+            if self._active_signature is not None and self._active_signature not in signatures:
+                self._cancel_event.set()
+            # Re-submitting an already converted job is cheap because the run
+            # becomes an engine cache hit, so only the in-flight job is skipped.
+            self._pending_jobs = [
+                (signature, job) for signature, job in unique_jobs if signature != self._active_signature
+            ]
+            self.condition.notify_all()
+
+    def cancel_all(self):
+        self.submit([])
+
+    def close(self):
+        with self.condition:
+            self._closed = True
+            self._pending_jobs = []
+            self._wanted_signatures = set()
+            self._cancel_event.set()
+            self.condition.notify_all()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def wait_for(self, job, timeout_seconds=None):
+        """Block while this exact job is being converted in the background."""
+        signature = self.job_signature(job)
+        deadline = None if timeout_seconds is None else time.monotonic() + timeout_seconds
+        with self.condition:
+            while self._active_signature == signature:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self.condition.wait(remaining)
+            return True
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while not self._pending_jobs and not self._closed:
+                    self.condition.wait()
+                if self._closed:
+                    return
+                signature, job = self._pending_jobs.pop(0)
+                self._active_signature = signature
+                self._cancel_event.clear()
+
+            try:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=1,
+                        mp_context=self._process_context,
+                        initializer=init_speculative_process,
+                        initargs=(self._cancel_event,),
+                    )
+                self._executor.submit(warm_conversion_cache_in_process, job).result()
+            except Exception as error:
+                if isinstance(error, BrokenProcessPool):
+                    # The worker process died; start a fresh one for the next job.
+                    self._executor = None
+                # The foreground run will report the same problem with full
+                # context, so a failed speculative job only leaves a log line.
+                if self.reporter is not None:
+                    self.reporter(f"Background conversion skipped {Path(job['selected_midi_source']).name}: {error}")
+
+            with self.condition:
+                self._active_signature = None
+                self.condition.notify_all()
+
+
 class PianoPlayerApp(tk.Tk):
     def __init__(self):
         super().__init__()
@@ -1793,7 +1940,12 @@ class PianoPlayerApp(tk.Tk):
         self.queue_lock = threading.Lock()
         self.current_queue_item = None
         self.queue_is_playing = False
+        self.queue_run_options = None
         self.playback_control = None
+        self.speculative_converter = SpeculativeConversionWorker(
+            reporter=lambda message: self.message_queue.put(("log", message))
+        )
+        self.speculative_after_id = None
         self.note_marker_control = None
         self.sweep_marker_dialog = None
         self.speed_test_dialog = None
@@ -1808,7 +1960,7 @@ class PianoPlayerApp(tk.Tk):
         )
         default_playable_range = playback_preferences.get("default_playable_range", "")
         default_fit_mode = playback_preferences.get("default_fit_mode", "strict")
-        if default_fit_mode not in {"strict", "transpose"}:
+        if default_fit_mode not in {"strict", "transpose", "best-shift", "phrase-octave"}:
             default_fit_mode = "strict"
 
         self.song_name_var = tk.StringVar(value="No song selected")
@@ -1816,6 +1968,13 @@ class PianoPlayerApp(tk.Tk):
         self.song_info_var = tk.StringVar(value="No MIDI selected yet.")
         self.song_catalog_status_var = tk.StringVar(value="Loading available songs...")
         self.song_search_var = tk.StringVar(value="")
+        self.song_sort_var = tk.StringVar(value=SONG_SORT_NAME)
+        self.song_coverage_filter_var = tk.StringVar(value="Any coverage")
+        self.playability_profiles = {}
+        self.playability_refresh_in_progress = False
+        self.pending_playability_entries = None
+        self.playability_masks_key = None
+        self.playability_masks = None
         self.queue_status_var = tk.StringVar(value="Queue empty.")
         self.active_channels_var = tk.StringVar(value=str(default_active_channels))
         self.tempo_var = tk.StringVar(value="")
@@ -1831,6 +1990,17 @@ class PianoPlayerApp(tk.Tk):
         self.bind_all("<space>", self.handle_note_marker_return, add="+")
         self.refresh_song_catalog(use_suggested=True, recursive_downloads=False)
         self.refresh_song_catalog_async(use_suggested=True)
+        for variable in (
+            self.active_channels_var,
+            self.tempo_var,
+            self.range_var,
+            self.fit_mode_var,
+            self.performance_feel_var,
+            self.auto_measure_pedal_var,
+        ):
+            variable.trace_add("write", lambda *_args: self.schedule_speculative_conversion())
+        for variable in (self.active_channels_var, self.range_var, self.fit_mode_var):
+            variable.trace_add("write", lambda *_args: self.refresh_song_list())
         self.after(100, self.process_worker_messages)
 
     def _configure_theme(self):
@@ -2140,7 +2310,7 @@ class PianoPlayerApp(tk.Tk):
         self.fit_mode_box = ttk.Combobox(
             options_body,
             state="readonly",
-            values=("transpose", "strict"),
+            values=("transpose", "strict", "best-shift", "phrase-octave"),
             textvariable=self.fit_mode_var,
             style="Panel.TCombobox",
         )
@@ -2213,7 +2383,7 @@ class PianoPlayerApp(tk.Tk):
         song_selection_frame.grid(row=3, column=0, sticky="nsew", pady=(0, 10))
         song_body = self._create_section_body(song_selection_frame)
         song_body.columnconfigure(0, weight=1)
-        song_body.rowconfigure(3, weight=1, minsize=180)
+        song_body.rowconfigure(4, weight=1, minsize=180)
 
         ttk.Label(
             song_body,
@@ -2245,8 +2415,34 @@ class PianoPlayerApp(tk.Tk):
             row=0, column=3, padx=(8, 0)
         )
 
+        playability_row = ttk.Frame(song_body, style="Panel.TFrame")
+        playability_row.grid(row=3, column=0, sticky="ew", pady=(0, 10))
+        song_sort_box = ttk.Combobox(
+            playability_row,
+            state="readonly",
+            values=SONG_SORT_CHOICES,
+            textvariable=self.song_sort_var,
+            style="Panel.TCombobox",
+        )
+        song_sort_box.grid(row=0, column=0, sticky="w")
+        song_sort_box.bind("<<ComboboxSelected>>", self.refresh_song_list)
+        song_coverage_box = ttk.Combobox(
+            playability_row,
+            state="readonly",
+            values=list(SONG_COVERAGE_FILTERS),
+            textvariable=self.song_coverage_filter_var,
+            style="Panel.TCombobox",
+        )
+        song_coverage_box.grid(row=0, column=1, sticky="w", padx=(8, 0))
+        song_coverage_box.bind("<<ComboboxSelected>>", self.refresh_song_list)
+        ttk.Label(
+            playability_row,
+            text="Coverage uses the current fit mode, range, and installed solenoids.",
+            style="Muted.Panel.TLabel",
+        ).grid(row=0, column=2, sticky="w", padx=(12, 0))
+
         song_list_frame = ttk.Frame(song_body, style="Panel.TFrame")
-        song_list_frame.grid(row=3, column=0, sticky="nsew")
+        song_list_frame.grid(row=4, column=0, sticky="nsew")
         song_list_frame.columnconfigure(0, weight=1)
         song_list_frame.rowconfigure(0, weight=1)
 
@@ -2644,6 +2840,7 @@ class PianoPlayerApp(tk.Tk):
         self.update_song_catalog_status()
         if hasattr(self, "song_listbox"):
             self.refresh_song_list()
+        self.refresh_playability_index_async(self.song_catalog.get("entries", []))
         if reveal_selection:
             self.scroll_page_to_top()
             current_selected_path = self.selected_song_path.resolve() if self.selected_song_path is not None else None
@@ -2719,20 +2916,111 @@ class PianoPlayerApp(tk.Tk):
             )
         )
 
+    def refresh_playability_index_async(self, entries):
+        if self.playability_refresh_in_progress:
+            self.pending_playability_entries = entries
+            return
+
+        self.playability_refresh_in_progress = True
+        midi_paths = [Path(entry["path"]) for entry in entries]
+        worker = threading.Thread(target=self._refresh_playability_index_worker, args=(midi_paths,), daemon=True)
+        worker.start()
+
+    def _refresh_playability_index_worker(self, midi_paths):
+        try:
+            profiles = engine.refresh_playability_index(midi_paths)
+        except Exception as error:
+            self.message_queue.put(("playability_index_error", str(error)))
+            return
+
+        self.message_queue.put(("playability_index", profiles))
+
+    def get_playability_masks(self):
+        """Note masks for the form's hardware count and range, cached per setting."""
+        active_channels = self.active_channels_var.get().strip()
+        preferred_range = self.range_var.get().strip()
+        masks_key = (id(self.config_data), active_channels, preferred_range)
+        if masks_key == self.playability_masks_key:
+            return self.playability_masks
+
+        try:
+            mapping_config = engine.build_effective_mapping(
+                self.config_data,
+                active_channel_count=self.get_active_channel_count() if active_channels else None,
+                preferred_range=preferred_range,
+            )
+        except ValueError:
+            # Half-typed ranges or counts fall back to the saved layout.
+            mapping_config = self.config_data["mapping"]
+        self.playability_masks_key = masks_key
+        self.playability_masks = (
+            engine.build_playable_note_mask(mapping_config),
+            engine.build_octave_transpose_note_mask(mapping_config),
+        )
+        return self.playability_masks
+
+    def get_entry_playability(self, entry):
+        profile = self.playability_profiles.get(str(entry["path"]))
+        if profile is None or profile.get("error"):
+            return profile, None
+
+        strict_mask, transpose_mask = self.get_playability_masks()
+        score = engine.score_playability_profile(profile, strict_mask, transpose_mask)
+        fit_mode = self.fit_mode_var.get()
+        if fit_mode == "strict":
+            score["ratio"] = score["strict_ratio"]
+        elif fit_mode == "best-shift" and profile.get("histogram") and profile.get("note_count"):
+            shift_scores = engine.score_semitone_shifts(profile["histogram"], strict_mask)
+            best_shift = engine.choose_best_semitone_shift(shift_scores)
+            score["ratio"] = shift_scores[best_shift] / int(profile["note_count"])
+        else:
+            # Phrase octave fitting needs note timing, so the octave-fold ratio stands in as its ceiling.
+            score["ratio"] = score["transpose_ratio"]
+        return profile, score
+
+    def describe_song_entry(self, entry, profile, score):
+        if profile is None:
+            return f"{entry['description']}  |  scanning..."
+        if score is None:
+            return f"{entry['description']}  |  unreadable MIDI"
+
+        duration_seconds = int(profile.get("duration_ms", 0) // 1000)
+        return (
+            f"{entry['description']}  |  strict {score['strict_ratio']:.0%}, "
+            f"octave {score['transpose_ratio']:.0%}  |  "
+            f"{duration_seconds // 60}:{duration_seconds % 60:02d}, "
+            f"{profile.get('peak_notes_per_second', 0):g} notes/s peak"
+        )
+
     def refresh_song_list(self, _event=None):
         entries = self.song_catalog.get("entries", []) if self.song_catalog else []
         query = self.song_search_var.get().strip().lower()
-        self.filtered_song_entries = [
-            entry
-            for entry in entries
-            if not query or query in entry["description"].lower() or query in entry["display_name"].lower()
-        ]
+        minimum_ratio = SONG_COVERAGE_FILTERS.get(self.song_coverage_filter_var.get(), 0.0)
+        rows = []
+        for entry in entries:
+            if query and query not in entry["description"].lower() and query not in entry["display_name"].lower():
+                continue
+            profile, score = self.get_entry_playability(entry)
+            # Songs that are still being scanned stay visible only without a
+            # coverage filter, so the list never silently hides new downloads.
+            if minimum_ratio > 0 and (score is None or score["ratio"] < minimum_ratio):
+                continue
+            rows.append((entry, profile, score))
+
+        sort_mode = self.song_sort_var.get()
+        if sort_mode == SONG_SORT_BEST:
+            rows.sort(key=lambda row: -row[2]["ratio"] if row[2] is not None else 1.0)
+        elif sort_mode == SONG_SORT_SHORTEST:
+            rows.sort(key=lambda row: row[1].get("duration_ms", 0) if row[2] is not None else float("inf"))
+        elif sort_mode == SONG_SORT_LEAST_DENSE:
+            rows.sort(key=lambda row: row[1].get("peak_notes_per_second", 0) if row[2] is not None else float("inf"))
+        self.filtered_song_entries = [entry for entry, _profile, _score in rows]
 
         self.song_listbox.delete(0, tk.END)
         selected_index = None
         selected_path = self.selected_song_path.resolve() if self.selected_song_path is not None else None
-        for index, entry in enumerate(self.filtered_song_entries):
-            self.song_listbox.insert(tk.END, entry["description"])
+        for index, (entry, profile, score) in enumerate(rows):
+            self.song_listbox.insert(tk.END, self.describe_song_entry(entry, profile, score))
             if selected_path is not None and Path(entry["path"]).resolve() == selected_path:
                 selected_index = index
 
@@ -2771,6 +3059,7 @@ class PianoPlayerApp(tk.Tk):
         self.song_name_var.set(self.selected_song_path.name)
         self.song_reason_var.set(reason)
         self.update_song_preview()
+        self.schedule_speculative_conversion()
 
     def build_queue_item(self, midi_path, reason, source="Selection"):
         path = Path(midi_path)
@@ -2943,6 +3232,54 @@ class PianoPlayerApp(tk.Tk):
         self.queue_status_var.set(status)
         self.refresh_queue_reorder_buttons()
         self.refresh_playback_control_buttons()
+        self.schedule_speculative_conversion()
+
+    def schedule_speculative_conversion(self, delay_ms=400):
+        # Debounce so typing a tempo or range does not start a job per key.
+        if self.speculative_after_id is not None:
+            self.after_cancel(self.speculative_after_id)
+        self.speculative_after_id = self.after(delay_ms, self.refresh_speculative_conversion)
+
+    def build_speculative_job(self, item, run_options, preferred_fit_mode):
+        return {
+            "selected_midi_source": str(item["path"]),
+            "active_channel_count": run_options["active_channel_count"],
+            "preferred_range": run_options["preferred_range"],
+            "preferred_fit_mode": preferred_fit_mode,
+            "preferred_tempo": run_options["preferred_tempo"],
+            "performance_feel_enabled": run_options["performance_feel_enabled"],
+            "auto_measure_pedal": run_options["auto_measure_pedal"],
+        }
+
+    def refresh_speculative_conversion(self):
+        """Work ahead on the playing queue and the current selection.
+
+        The queue uses the options captured when playback started; the
+        selection uses whatever is in the form right now. Anything no longer
+        listed here is cancelled by the background worker.
+        """
+        self.speculative_after_id = None
+        form_options = self.collect_run_options(base_tempo_bpm=120.0, show_errors=False)
+        with self.queue_lock:
+            current_item = self.current_queue_item
+            queued_items = list(self.playback_queue)
+            queue_run_options = self.queue_run_options
+
+        jobs = []
+        if queue_run_options is not None:
+            queue_options, queue_fit_mode = queue_run_options
+            upcoming_items = ([current_item] if current_item is not None else []) + queued_items
+            for item in upcoming_items:
+                jobs.append(self.build_speculative_job(item, queue_options, queue_fit_mode))
+        elif form_options is not None:
+            for item in queued_items:
+                jobs.append(self.build_speculative_job(item, form_options, self.fit_mode_var.get()))
+
+        if form_options is not None and self.selected_song_path is not None:
+            selected_item = self.build_queue_item(self.selected_song_path, self.selection_reason)
+            jobs.append(self.build_speculative_job(selected_item, form_options, self.fit_mode_var.get()))
+
+        self.speculative_converter.submit(jobs)
 
     def refresh_queue_reorder_buttons(self, _event=None):
         if not hasattr(self, "move_queue_item_up_button"):
@@ -3940,6 +4277,9 @@ class PianoPlayerApp(tk.Tk):
 
         engine.CONFIG_PATH.write_text(json.dumps(config, indent=2) + "\n", encoding="utf-8")
         self.config_data = engine.load_config()
+        # Only this channel's override changed, so queued and selected songs
+        # re-render just that channel from the conversion cache.
+        self.schedule_speculative_conversion()
         self.append_log(
             f"Saved solenoid config for {request['note_label']} on channel {channel}: "
             f"velocity {velocity}, minimum repeat {minimum_repeat_period_ms} ms."
@@ -3981,6 +4321,7 @@ class PianoPlayerApp(tk.Tk):
 
         engine.CONFIG_PATH.write_text(json.dumps(config, indent=2) + "\n", encoding="utf-8")
         self.config_data = engine.load_config()
+        self.schedule_speculative_conversion()
         resolved = engine.resolve_note_actuation(note, channel, self.config_data)
         saved_settings = {
             "saved_playback_velocity_override": resolved.get("playback_velocity_override"),
@@ -4457,6 +4798,7 @@ class PianoPlayerApp(tk.Tk):
         with self.queue_lock:
             queued_count = len(self.playback_queue)
             self.queue_is_playing = True
+            self.queue_run_options = (run_options, self.fit_mode_var.get())
         self.playback_control = PlaybackControlState()
         self.append_log(f"Starting playback queue with {queued_count} song(s).")
         self.set_playback_controls_enabled(False)
@@ -4469,11 +4811,12 @@ class PianoPlayerApp(tk.Tk):
         self.worker = threading.Thread(target=self._run_queue_workflow, args=(worker_args,), daemon=True)
         self.worker.start()
 
-    def collect_run_options(self, base_tempo_bpm):
+    def collect_run_options(self, base_tempo_bpm, show_errors=True):
         try:
             active_channel_count = self.get_active_channel_count()
         except ValueError as error:
-            messagebox.showerror("Invalid hardware count", str(error), parent=self)
+            if show_errors:
+                messagebox.showerror("Invalid hardware count", str(error), parent=self)
             return None
 
         preferred_range = self.range_var.get().strip()
@@ -4481,7 +4824,8 @@ class PianoPlayerApp(tk.Tk):
             try:
                 engine.parse_inclusive_note_range(preferred_range)
             except ValueError as error:
-                messagebox.showerror("Invalid note range", str(error), parent=self)
+                if show_errors:
+                    messagebox.showerror("Invalid note range", str(error), parent=self)
                 return None
         else:
             preferred_range = ""
@@ -4491,7 +4835,8 @@ class PianoPlayerApp(tk.Tk):
             try:
                 engine.parse_tempo_override_input(preferred_tempo, base_tempo_bpm)
             except ValueError as error:
-                messagebox.showerror("Invalid tempo", str(error), parent=self)
+                if show_errors:
+                    messagebox.showerror("Invalid tempo", str(error), parent=self)
                 return None
         else:
             preferred_tempo = ""
@@ -4847,6 +5192,11 @@ class PianoPlayerApp(tk.Tk):
                     playback_control=playback_control,
                 )
                 conversion_args.pop("workflow_kind", None)
+                # If the background worker is already converting this song,
+                # let it finish so this run becomes a cache hit.
+                self.speculative_converter.wait_for(
+                    self.build_speculative_job(item, run_options, preferred_fit_mode)
+                )
                 result = engine.run_conversion_workflow(**conversion_args)
                 stream_manifest = result.get("stream_manifest") or {}
                 control_action = stream_manifest.get("control_action")
@@ -4892,6 +5242,18 @@ class PianoPlayerApp(tk.Tk):
                         pending_refresh = self.pending_song_catalog_refresh
                         self.pending_song_catalog_refresh = None
                         self.refresh_song_catalog_async(**pending_refresh)
+                elif message_type == "playability_index":
+                    self.playability_refresh_in_progress = False
+                    self.playability_profiles = payload
+                    self.refresh_song_list()
+                    if self.pending_playability_entries is not None:
+                        pending_entries = self.pending_playability_entries
+                        self.pending_playability_entries = None
+                        self.refresh_playability_index_async(pending_entries)
+                elif message_type == "playability_index_error":
+                    self.playability_refresh_in_progress = False
+                    self.pending_playability_entries = None
+                    self.append_log(f"Playability scan error: {payload}")
                 elif message_type == "song_catalog_error":
                     self.song_catalog_refresh_in_progress = False
                     self.update_song_catalog_status()
@@ -4952,6 +5314,7 @@ class PianoPlayerApp(tk.Tk):
                     self.worker = None
                     with self.queue_lock:
                         self.queue_is_playing = False
+                        self.queue_run_options = None
                         self.current_queue_item = None
                     self.playback_control = None
                     self.refresh_queue_list()
@@ -4962,6 +5325,7 @@ class PianoPlayerApp(tk.Tk):
                     self.worker = None
                     with self.queue_lock:
                         self.queue_is_playing = False
+                        self.queue_run_options = None
                         self.current_queue_item = None
                     self.playback_control = None
                     self.refresh_queue_list()
@@ -5090,6 +5454,7 @@ class PianoPlayerApp(tk.Tk):
 def main():
     app = PianoPlayerApp()
     app.mainloop()
+    app.speculative_converter.close()
 
 
 if __name__ == "__main__":
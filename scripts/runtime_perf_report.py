@@ -0,0 +1,108 @@
+"""Summarize and plot the runtime's PERF loop timing from a streamed song.
+
+Run a song with `convert_midi.py --perf` (or set `serial_runtime.perf_poll_ms`)
+so the streamer polls the Arduino's PERF command during playback and saves the
+samples to songs/metadata/last_stream_perf.csv. This script reads that file,
+prints the worst windows, and plots the timeline when matplotlib is installed.
+"""
+
+import argparse
+import csv
+from pathlib import Path
+
+import convert_midi as engine
+
+# matplotlib is optional; without it the report is text only.
+try:
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as pyplot
+except ImportError:
+    pyplot = None
+
+DEFAULT_PLOT_PATH = engine.METADATA_DIR / "last_stream_perf.png"
+
+
+def load_perf_samples(path):
+    with Path(path).open(newline="", encoding="utf-8") as handle:
+        return [{key: int(value) for key, value in row.items()} for row in csv.DictReader(handle)]
+
+
+def print_perf_report(perf_samples, worst_count=5):
+    summary = engine.summarize_perf_samples(perf_samples)
+    print(f"PERF samples: {summary['samples']}")
+    print(f"loop(): avg {summary['loop_avg_us']} us, worst {summary['loop_max_us']} us")
+    print(f"setPWM: avg {summary['pwm_avg_us']} us, worst {summary['pwm_max_us']} us")
+    print(f"Dispatch lateness: avg {summary['late_avg_us']} us, worst {summary['late_max_us']} us")
+
+    print()
+    print(f"Worst {worst_count} windows by loop time:")
+    print("  t_ms    loop max  poll max  play max  fs max   late max")
+    for sample in sorted(perf_samples, key=lambda item: item["loop_max_us"], reverse=True)[:worst_count]:
+        print(
+            f"  {sample['elapsed_ms']:<7} {sample['loop_max_us']:<9} {sample['poll_max_us']:<9} "
+            f"{sample['playback_max_us']:<9} {sample['failsafe_max_us']:<8} {sample['late_max_us']}"
+        )
+
+
+def plot_perf_samples(perf_samples, output_path):
+    seconds = [sample["elapsed_ms"] / 1000.0 for sample in perf_samples]
+    figure, (loop_axis, section_axis, late_axis) = pyplot.subplots(3, 1, sharex=True, figsize=(10, 8))
+
+    loop_axis.plot(seconds, [sample["loop_max_us"] for sample in perf_samples], label="loop max")
+    loop_axis.plot(seconds, [sample["loop_avg_us"] for sample in perf_samples], label="loop avg")
+    loop_axis.set_ylabel("us")
+    loop_axis.legend(loc="upper right")
+
+    for key, label in (
+        ("poll_max_us", "pollSerial max"),
+        ("playback_max_us", "servicePlayback max"),
+        ("failsafe_max_us", "serviceOutputFailsafe max"),
+        ("pwm_max_us", "setPWM max"),
+    ):
+        section_axis.plot(seconds, [sample[key] for sample in perf_samples], label=label)
+    section_axis.set_ylabel("us")
+    section_axis.legend(loc="upper right")
+
+    late_axis.plot(seconds, [sample["late_max_us"] / 1000.0 for sample in perf_samples], label="dispatch lateness max")
+    late_axis.plot(seconds, [sample["late_avg_us"] / 1000.0 for sample in perf_samples], label="dispatch lateness avg")
+    late_axis.set_ylabel("ms")
+    late_axis.set_xlabel("seconds since PLAY")
+    late_axis.legend(loc="upper right")
+
+    figure.tight_layout()
+    figure.savefig(output_path)
+    pyplot.close(figure)
+
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(description="Summarize and plot runtime PERF samples from the last streamed song.")
+    parser.add_argument("--csv", default=str(engine.STREAM_PERF_PATH), help="PERF samples CSV to read.")
+    parser.add_argument("--output", default=str(DEFAULT_PLOT_PATH), help="Where to save the plot PNG.")
+    parser.add_argument("--no-plot", action="store_true", help="Print the text report only.")
+    return parser
+
+
+def main():
+    args = build_arg_parser().parse_args()
+    perf_samples = load_perf_samples(args.csv)
+    if not perf_samples:
+        raise ValueError(f"No PERF samples in {args.csv}.")
+
+    print_perf_report(perf_samples)
+    if args.no_plot:
+        return
+    if pyplot is None:
+        print("\nmatplotlib is not installed, so no plot was written. Install it with 'pip install matplotlib'.")
+        return
+    plot_perf_samples(perf_samples, args.output)
+    print(f"\nPlot saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except (FileNotFoundError, RuntimeError, ValueError, OSError) as error:
+        print(f"\nUnable to continue: {error}")
+        raise SystemExit(1)